@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from helioc.math_functions import (
+    get_normal_vector,
+    get_degrees,
+    euclidean_vector_distance,
+)
+from helioc.solar_position import solar_az_el
+from plot3d_surfaces import get_mirror_normal
+
+
+def _to_utc(time):
+    time = pd.Timestamp(time)
+    if time.tzinfo is None:
+        return time.tz_localize("UTC")
+    return time.tz_convert("UTC")
+
+
+def _sun_position(time, latitude, longitude):
+    return solar_az_el(
+        time.year,
+        time.month,
+        time.day,
+        time.hour,
+        time.minute,
+        time.second,
+        latitude,
+        longitude,
+        0,
+    )
+
+
+def _wrapped_delta(degrees_from, degrees_to):
+    return (degrees_to - degrees_from + 180.0) % 360.0 - 180.0
+
+
+def angular_error(degrees_a, degrees_b):
+    """
+    Calculate the angle between the mirror normals of two actuator positions.
+
+    Parameters:
+        degrees_a (tuple): (degrees_from_north, degrees_elevation) of the first position.
+        degrees_b (tuple): (degrees_from_north, degrees_elevation) of the second position.
+
+    Returns:
+        float: The angle between the two normals in degrees.
+    """
+
+    chord = euclidean_vector_distance(
+        get_normal_vector(*degrees_a), get_normal_vector(*degrees_b)
+    )
+    return np.degrees(2 * np.arcsin(min(chord / 2, 1.0)))
+
+
+class _Evaluator:
+    def __init__(self, start, latitude, longitude, vector_dests, azimuth_offset):
+        self.start = start
+        self.latitude = latitude
+        self.longitude = longitude
+        self.vector_dests = vector_dests
+        self.azimuth_offset = azimuth_offset
+        self.cache = {}
+
+    def degrees(self, second):
+        """Actuator angles of every heliostat, shape (n, 2), at `second` after start."""
+        if second not in self.cache:
+            time = self.start + pd.Timedelta(seconds=int(second))
+            az, el = _sun_position(time, self.latitude, self.longitude)
+            self.cache[second] = np.array(
+                [
+                    get_degrees(get_mirror_normal(az + self.azimuth_offset, el, dest))
+                    for dest in self.vector_dests
+                ]
+            )
+        return self.cache[second]
+
+    def segment_error(self, second_0, second_1, probes):
+        """Largest angular error when linearly interpolating between two seconds."""
+        degrees_0 = self.degrees(second_0)
+        delta = _wrapped_delta(degrees_0, self.degrees(second_1))
+
+        error = 0.0
+        for fraction in probes:
+            second = second_0 + int(round((second_1 - second_0) * fraction))
+            if second in (second_0, second_1):
+                continue
+            fraction = (second - second_0) / (second_1 - second_0)
+            interpolated = degrees_0 + fraction * delta
+            for true, approx in zip(self.degrees(second), interpolated):
+                error = max(error, angular_error(true, approx))
+        return error
+
+
+def sample_times(
+    start,
+    end,
+    latitude,
+    longitude,
+    vector_dests,
+    tolerance=0.1,
+    min_step="1min",
+    max_step="1h",
+    azimuth_offset=0,
+    probes=(0.25, 0.5, 0.75),
+):
+    """
+    Pick tracking timestamps so that linear interpolation of actuator angles
+    between consecutive timestamps keeps the mirror normals within `tolerance`.
+
+    The interval is first split into `max_step` segments, after which every
+    segment whose interpolated normals deviate more than `tolerance` at any of
+    the `probes` is bisected until it is no longer than `min_step`.
+
+    Parameters:
+        start (str or pd.Timestamp): First timestamp. Naive times are taken as UTC.
+        end (str or pd.Timestamp): Last timestamp. Naive times are taken as UTC.
+        latitude (float): Latitude of the field in decimal degrees.
+        longitude (float): Longitude of the field in decimal degrees.
+        vector_dests (np.array): Direction from mirror to destination, either a
+            single (3,) vector for one heliostat or (n, 3) for a whole field, in
+            which case the returned timestamps are shared by all heliostats.
+        tolerance (float): Maximum angular error of the interpolated normals in degrees.
+        min_step (str or pd.Timedelta): Smallest allowed step between timestamps.
+        max_step (str or pd.Timedelta): Largest allowed step between timestamps.
+        azimuth_offset (float): Offset added to the solar azimuth in degrees.
+        probes (tuple): Fractions of a segment at which the error is evaluated.
+
+    Returns:
+        pd.DatetimeIndex: The selected timestamps in UTC, including `start` and `end`.
+    """
+
+    start, end = _to_utc(start), _to_utc(end)
+    min_seconds = max(int(pd.Timedelta(min_step).total_seconds()), 1)
+    max_seconds = max(int(pd.Timedelta(max_step).total_seconds()), min_seconds)
+    total_seconds = int((end - start).total_seconds())
+
+    vector_dests = np.atleast_2d(np.asarray(vector_dests, dtype=np.float64))
+    evaluator = _Evaluator(start, latitude, longitude, vector_dests, azimuth_offset)
+
+    seconds = list(range(0, total_seconds, max_seconds)) + [total_seconds]
+    stack = list(zip(seconds[:-1], seconds[1:]))
+    selected = set(seconds)
+
+    while stack:
+        second_0, second_1 = stack.pop()
+        if second_1 - second_0 <= min_seconds:
+            continue
+        if evaluator.segment_error(second_0, second_1, probes) <= tolerance:
+            continue
+
+        # Split on a multiple of min_step so the output stays on a regular grid
+        midpoint = second_0 + max((second_1 - second_0) // (2 * min_seconds), 1) * min_seconds
+        selected.add(midpoint)
+        stack.append((second_0, midpoint))
+        stack.append((midpoint, second_1))
+
+    return pd.DatetimeIndex(
+        [start + pd.Timedelta(seconds=int(second)) for second in sorted(selected)]
+    )
+
+
+def tracking_table(times, latitude, longitude, vector_dests, azimuth_offset=0):
+    """
+    Calculate the actuator angles of each heliostat at the given timestamps.
+
+    Parameters:
+        times (pd.DatetimeIndex): Timestamps, e.g. from `sample_times`. Naive times are taken as UTC.
+        latitude (float): Latitude of the field in decimal degrees.
+        longitude (float): Longitude of the field in decimal degrees.
+        vector_dests (np.array): Direction from mirror to destination, (3,) or (n, 3).
+        azimuth_offset (float): Offset added to the solar azimuth in degrees.
+
+    Returns:
+        pd.DataFrame: One row per timestamp and heliostat with columns time,
+                      heliostat, degrees_from_north and degrees_elevation.
+    """
+
+    vector_dests = np.atleast_2d(np.asarray(vector_dests, dtype=np.float64))
+
+    rows = []
+    for time in times:
+        time = _to_utc(time)
+        az, el = _sun_position(time, latitude, longitude)
+        for heliostat, dest in enumerate(vector_dests):
+            degrees_from_north, degrees_elevation = get_degrees(
+                get_mirror_normal(az + azimuth_offset, el, dest)
+            )
+            rows.append([time, heliostat, degrees_from_north, degrees_elevation])
+
+    return pd.DataFrame(
+        rows, columns=["time", "heliostat", "degrees_from_north", "degrees_elevation"]
+    )
+
+
+if __name__ == "__main__":
+    vector_dest = np.array([9.5, -13, -2.2])
+
+    times = sample_times(
+        "2023-08-01 06:00", "2023-08-01 16:30", -33.8352, 18.6510, vector_dest
+    )
+    print(f"{len(times)} timestamps instead of {10.5 * 60 + 1:.0f}")
+    print(tracking_table(times, -33.8352, 18.6510, vector_dest))
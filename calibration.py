@@ -0,0 +1,361 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+import helioc  # noqa
+from helioc.math_functions import get_degrees_batch, get_normal_vector_batch
+
+
+# Calibrated parameters of every heliostat, in degrees. The first two are the mount
+# offsets of `FieldState`, i.e. encoder biases added to the commanded actuator angles.
+# tilt rotates the pedestal about the y axis and yaw about the vertical z axis, the
+# per-mirror equivalent of the azimuth offset hand-tuned in plot3d_surfaces.
+parameters = ("offset_from_north", "offset_elevation", "tilt", "yaw")
+
+_RADIANS = np.pi / 180.0
+_X = np.array([1.0, 0.0, 0.0])
+_Z = np.array([0.0, 0.0, 1.0])
+
+
+def _mount_rotations(tilt, yaw):
+    """Returns the (m, 3, 3) rotations Rz(yaw) @ Ry(tilt) of the pedestals, angles in degrees."""
+    sin_tilt, cos_tilt = np.sin(tilt * _RADIANS), np.cos(tilt * _RADIANS)
+    sin_yaw, cos_yaw = np.sin(yaw * _RADIANS), np.cos(yaw * _RADIANS)
+
+    rotations = np.empty(np.shape(tilt) + (3, 3))
+    rotations[..., 0, 0] = cos_yaw * cos_tilt
+    rotations[..., 0, 1] = -sin_yaw
+    rotations[..., 0, 2] = cos_yaw * sin_tilt
+    rotations[..., 1, 0] = sin_yaw * cos_tilt
+    rotations[..., 1, 1] = cos_yaw
+    rotations[..., 1, 2] = sin_yaw * sin_tilt
+    rotations[..., 2, 0] = -sin_tilt
+    rotations[..., 2, 1] = 0.0
+    rotations[..., 2, 2] = cos_tilt
+    return rotations
+
+
+def sun_rays(sun_degrees_azimuth, sun_degrees_elevation):
+    """Returns the (m, 3) directions of the sun rays, see `get_sunray`."""
+    # The sun ray of get_sunray is the negative of get_normal_vector for the same angles
+    return -get_normal_vector_batch(
+        np.column_stack([np.ravel(sun_degrees_azimuth), np.ravel(sun_degrees_elevation)])
+    )
+
+
+def observed_directions(spots, positions):
+    """
+    Converts measured spot centroids to reflected beam directions.
+
+    Parameters:
+        spots (np.array): (m, 3) positions of the spot centroids in field coordinates,
+            e.g. from a camera looking at the target.
+        positions (np.array): (m, 3) positions of the mirrors that cast the spots.
+
+    Returns:
+        np.array: (m, 3) unit directions from the mirrors to the spots.
+    """
+    directions = np.asarray(spots, dtype=np.float64) - np.asarray(positions, dtype=np.float64)
+    return directions / np.linalg.norm(directions, axis=1, keepdims=True)
+
+
+def mirror_normals(degrees, params, jacobian=False):
+    """
+    Calculate the normals of mirrors commanded to actuator angles.
+
+    Parameters:
+        degrees (np.array): (m, 2) commanded degrees_from_north and degrees_elevation.
+        params (np.array): (m, 4) parameters of the mirrors, see `parameters`.
+        jacobian (bool): Also return the derivatives of the normals.
+
+    Returns:
+        np.array: (m, 3) unit normals, and if `jacobian` is set the (m, 3, 4) derivatives
+            of the normals by the parameters, per degree.
+    """
+    degrees = np.asarray(degrees, dtype=np.float64)
+    params = np.asarray(params, dtype=np.float64)
+    rotations = _mount_rotations(params[:, 2], params[:, 3])
+    normals = np.einsum("mij,mj->mi", rotations, get_normal_vector_batch(degrees + params[:, :2]))
+    if not jacobian:
+        return normals
+
+    # Every parameter rotates the normal about an axis, so its derivative is the cross
+    # product of that axis with the normal. degrees_elevation is the outer actuator axis,
+    # fixed to x, and degrees_from_north the inner one, which degrees_elevation tilts.
+    phi = (degrees[:, 1] + params[:, 1]) * _RADIANS
+    inner_axes = np.column_stack([np.zeros_like(phi), np.sin(phi), np.cos(phi)])
+    # The tilt axis is y turned by the yaw, which the tilt leaves unchanged
+    tilt_axes = rotations[:, :, 1]
+
+    derivatives = np.empty(normals.shape + (4,))
+    derivatives[:, :, 0] = -np.cross(np.einsum("mij,mj->mi", rotations, inner_axes), normals)
+    derivatives[:, :, 1] = -np.cross(rotations @ _X, normals)
+    derivatives[:, :, 2] = np.cross(tilt_axes, normals)
+    derivatives[:, :, 3] = np.cross(_Z, normals)
+    return normals, derivatives * _RADIANS
+
+
+def reflected_directions(rays, degrees, params, jacobian=False):
+    """
+    Calculate the directions of the beams reflected by mirrors commanded to actuator angles.
+
+    Parameters:
+        rays (np.array): (m, 3) unit directions of the sun rays, see `sun_rays`.
+        degrees (np.array): (m, 2) commanded degrees_from_north and degrees_elevation.
+        params (np.array): (m, 4) parameters of the mirrors, see `parameters`.
+        jacobian (bool): Also return the derivatives of the directions.
+
+    Returns:
+        np.array: (m, 3) unit directions, and if `jacobian` is set the (m, 3, 4)
+            derivatives of the directions by the parameters, per degree.
+    """
+    if not jacobian:
+        normals = mirror_normals(degrees, params)
+        return rays - 2 * np.sum(rays * normals, axis=1, keepdims=True) * normals
+
+    normals, derivatives = mirror_normals(degrees, params, jacobian=True)
+    cos_incidence = np.sum(rays * normals, axis=1)
+    directions = rays - 2 * cos_incidence[:, None] * normals
+    jacobians = -2 * (
+        np.einsum("mk,mkp->mp", rays, derivatives)[:, None, :] * normals[:, :, None]
+        + cos_incidence[:, None, None] * derivatives
+    )
+    return directions, jacobians
+
+
+def commanded_degrees(surface_normals, params):
+    """
+    Calculate the actuator angles that turn calibrated mirrors to the desired normals,
+    the inverse of `mirror_normals`.
+
+    With the tilt and yaw at zero this is what `FieldState.set_normals` stores when the
+    mount_offset column holds the first two parameters.
+
+    Parameters:
+        surface_normals (np.array): (m, 3) desired normals.
+        params (np.array): (m, 4) parameters of the mirrors, see `parameters`.
+
+    Returns:
+        np.array: (m, 2) degrees_from_north and degrees_elevation to command.
+    """
+    params = np.asarray(params, dtype=np.float64)
+    rotations = _mount_rotations(params[:, 2], params[:, 3])
+    # Undo the rotation of the pedestal, then the encoder biases
+    mount_normals = np.einsum("mji,mj->mi", rotations, np.asarray(surface_normals, dtype=np.float64))
+    return get_degrees_batch(mount_normals) - params[:, :2]
+
+
+def _fit_chunk(heliostats, rays, degrees, directions, weights, initial, max_iterations, tolerance, damping, regularization):
+    """Levenberg-Marquardt fit of the heliostats of one chunk, all mirrors updated at once."""
+    n, n_params = len(initial), len(parameters)
+    params = initial.copy()
+    lambdas = np.full(n, damping)
+    active = np.ones(n, dtype=bool)
+    iterations = np.zeros(n, dtype=np.int64)
+    counts = np.bincount(heliostats, minlength=n)
+    diagonal = np.arange(n_params)
+
+    def per_heliostat(values):
+        # Sums the rows of values of every heliostat
+        flat = values.reshape(len(values), -1)
+        sums = np.zeros((n, flat.shape[1]))
+        starts = np.flatnonzero(counts)
+        sums[counts > 0] = np.add.reduceat(flat, np.cumsum(counts)[starts] - counts[starts], axis=0)
+        return sums.reshape((n,) + values.shape[1:])
+
+    def cost(candidate):
+        residuals = reflected_directions(rays, degrees, candidate[heliostats]) - directions
+        return per_heliostat(weights * np.sum(residuals**2, axis=1)) + regularization * np.sum(
+            (candidate * _RADIANS) ** 2, axis=1
+        )
+
+    current_cost = cost(params)
+    for _ in range(max_iterations):
+        predicted, jacobians = reflected_directions(rays, degrees, params[heliostats], jacobian=True)
+        residuals = predicted - directions
+
+        # Normal equations of every heliostat, in radians so that the prior is unit free
+        jacobians = jacobians / _RADIANS
+        hessians = per_heliostat(weights[:, None, None] * np.einsum("mki,mkj->mij", jacobians, jacobians))
+        gradients = per_heliostat(weights[:, None] * np.einsum("mki,mk->mi", jacobians, residuals))
+        hessians[:, diagonal, diagonal] += regularization
+        gradients += regularization * params * _RADIANS
+
+        damped = hessians.copy()
+        damped[:, diagonal, diagonal] *= 1 + lambdas[:, None]
+        steps = -np.linalg.solve(damped, gradients[..., None])[..., 0] / _RADIANS
+        steps[~active] = 0.0
+
+        candidate_cost = cost(params + steps)
+        accepted = active & (candidate_cost <= current_cost)
+        params[accepted] += steps[accepted]
+        current_cost[accepted] = candidate_cost[accepted]
+        lambdas = np.where(accepted, np.maximum(lambdas / 3, 1e-12), np.minimum(lambdas * 4, 1e12))
+        iterations += active
+
+        active &= (np.abs(steps).max(axis=1) > tolerance) & (lambdas < 1e12)
+        if not active.any():
+            break
+
+    # Standard deviations of the parameters from the undamped normal equations
+    n_residuals = 3 * counts
+    variance = current_cost / np.maximum(n_residuals - n_params, 1)
+    covariance = np.linalg.pinv(hessians)
+    std = np.sqrt(np.abs(variance[:, None] * covariance[:, diagonal, diagonal])) / _RADIANS
+    rms = np.sqrt(current_cost / np.maximum(counts, 1))
+    return params, std, rms, counts, iterations
+
+
+def fit_calibration(
+    heliostats,
+    sun_degrees_azimuth,
+    sun_degrees_elevation,
+    degrees,
+    directions,
+    n_heliostats=None,
+    initial=None,
+    weights=None,
+    max_iterations=50,
+    tolerance=1e-6,
+    damping=1e-3,
+    regularization=1e-9,
+    chunk_size=2048,
+    workers=1,
+):
+    """
+    Fit the mount offsets, tilt and yaw of every heliostat to observed beam directions.
+
+    Every heliostat is an independent least squares problem of `len(parameters)`
+    parameters, solved with Levenberg-Marquardt. The residuals are the differences
+    between the predicted and the observed unit directions of the reflected beams,
+    i.e. pointing errors in radians. The residuals and their analytic Jacobians are
+    computed for all observations at once, the normal equations summed per heliostat,
+    and the 4x4 systems of all heliostats solved as one batch, so the mirrors converge
+    in parallel. Heliostats are processed in chunks of `chunk_size`, which `workers`
+    threads fit concurrently, NumPy releasing the GIL in the heavy operations.
+
+    Every parameter needs observations at several sun positions to be determined, a
+    heliostat seen at a single position only fixes two. The `regularization` pulls
+    undetermined parameters towards zero instead of letting them drift.
+
+    Parameters:
+        heliostats (np.array): (m,) index of the heliostat of every observation.
+        sun_degrees_azimuth (np.array): (m,) azimuth angles of the sun in degrees.
+        sun_degrees_elevation (np.array): (m,) elevation angles of the sun in degrees.
+        degrees (np.array): (m, 2) commanded degrees_from_north and degrees_elevation,
+            e.g. the degrees column of `FieldState` at the time of the observation.
+        directions (np.array): (m, 3) observed beam directions, see `observed_directions`.
+        n_heliostats (int): Number of heliostats, defaults to the largest index plus one.
+        initial (np.array): (n, 4) starting parameters, defaults to zeros.
+        weights (np.array): (m,) weights of the observations, defaults to ones.
+        max_iterations (int): Largest number of iterations per heliostat.
+        tolerance (float): A heliostat has converged when no parameter moves by more
+            degrees than this.
+        damping (float): Initial Levenberg-Marquardt damping.
+        regularization (float): Weight of the squared parameters, in radians, added to the cost.
+        chunk_size (int): Number of heliostats fitted at a time.
+        workers (int): Number of threads fitting chunks concurrently.
+
+    Returns:
+        SimpleNamespace: parameters (n, 4) in degrees, see `parameters`, std (n, 4)
+            their standard deviations, rms (n,) root mean square pointing error in
+            radians, observations (n,) number of observations and iterations (n,)
+            number of iterations of every heliostat.
+    """
+    heliostats = np.asarray(heliostats, dtype=np.intp)
+    n = int(heliostats.max()) + 1 if n_heliostats is None else n_heliostats
+    rays = sun_rays(sun_degrees_azimuth, sun_degrees_elevation)
+    degrees = np.asarray(degrees, dtype=np.float64)
+    directions = observed_directions(directions, np.zeros(3))
+    weights = np.ones(len(heliostats)) if weights is None else np.asarray(weights, dtype=np.float64)
+    initial = np.zeros((n, len(parameters))) if initial is None else np.asarray(initial, dtype=np.float64)
+    if not (len(rays) == len(degrees) == len(directions) == len(weights) == len(heliostats)):
+        raise ValueError("Every observation needs a heliostat, sun position, degrees, direction and weight")
+
+    # Sorting by heliostat makes the observations of every chunk and heliostat contiguous
+    order = np.argsort(heliostats, kind="stable")
+    heliostats, rays, degrees, directions, weights = (
+        i[order] for i in (heliostats, rays, degrees, directions, weights)
+    )
+    starts = np.arange(0, n, chunk_size)
+    bounds = np.searchsorted(heliostats, np.append(starts, n))
+
+    def fit(k):
+        observations = slice(bounds[k], bounds[k + 1])
+        heliostat_range = slice(starts[k], min(starts[k] + chunk_size, n))
+        return _fit_chunk(
+            heliostats[observations] - starts[k],
+            rays[observations],
+            degrees[observations],
+            directions[observations],
+            weights[observations],
+            initial[heliostat_range],
+            max_iterations,
+            tolerance,
+            damping,
+            regularization,
+        )
+
+    with ThreadPoolExecutor(workers) as executor:
+        chunks = list(executor.map(fit, range(len(starts))))
+
+    params, std, rms, counts, iterations = (np.concatenate(i) for i in zip(*chunks))
+    return SimpleNamespace(
+        parameters=params, std=std, rms=rms, observations=counts, iterations=iterations
+    )
+
+
+def apply_calibration(state, result):
+    """
+    Stores the fitted mount offsets in the mount_offset column of a `FieldState`.
+
+    The tilt and yaw are not part of the store, command `commanded_degrees` instead of
+    `FieldState.set_normals` to compensate them as well.
+    """
+    state.mount_offset[:] = result.parameters[:, :2]
+
+
+if __name__ == "__main__":
+    import time
+
+    import pandas as pd
+
+    from field_state import FieldState
+    from sun_vector import get_solar_position_spa
+
+    rng = np.random.default_rng(0)
+    n, target = 10_000, np.array([0.0, 0.0, 60.0])
+    state = FieldState.from_positions(
+        np.column_stack([rng.uniform(-400, 400, (n, 2)), np.zeros(n)])
+    )
+    true_params = np.column_stack(
+        [rng.normal(0, 0.5, n), rng.normal(0, 0.5, n), rng.normal(0, 0.2, n), rng.normal(-8, 0.3, n)]
+    )
+
+    # A day of camera observations, every heliostat is measured once every 20 minutes
+    times = pd.date_range("2023-08-01 07:00", "2023-08-01 16:00", freq="20min", tz="UTC")
+    azimuth, elevation = (i[:, 0] for i in get_solar_position_spa(times, -33.8352, 18.6510))
+    sun_azimuth, sun_elevation = np.repeat(azimuth, n), np.repeat(elevation, n)
+    heliostats = np.tile(np.arange(n), len(times))
+
+    degrees = np.concatenate(
+        [get_degrees_batch(state.surface_normals(az, el, target)) for az, el in zip(azimuth, elevation)]
+    )
+    beams = reflected_directions(sun_rays(sun_azimuth, sun_elevation), degrees, true_params[heliostats])
+    distances = np.linalg.norm(target - state.position[heliostats], axis=1, keepdims=True)
+    spots = state.position[heliostats] + beams * distances + rng.normal(0, 0.05, beams.shape)
+    directions = observed_directions(spots, state.position[heliostats])
+
+    start = time.perf_counter()
+    result = fit_calibration(heliostats, sun_azimuth, sun_elevation, degrees, directions, n, workers=4)
+    print(f"{n} heliostats, {len(heliostats)} observations in {time.perf_counter() - start:.2f} s")
+    print(f"iterations: median {np.median(result.iterations):.0f}, max {result.iterations.max()}")
+    print(f"rms pointing error: {np.median(result.rms) * 1e3:.3f} mrad")
+    # A single day leaves some heliostats with nearly degenerate parameters, see std
+    errors = np.abs(result.parameters - true_params)
+    for name, error, std in zip(parameters, errors.T, result.std.T):
+        print(
+            f"{name:<18} error median {np.median(error):.4f} max {error.max():.4f} deg, "
+            f"within 3 std {np.mean(error <= 3 * std):.1%}"
+        )
@@ -7,6 +7,8 @@ from contextlib import contextmanager
 import tempfile
 import os
 
+from pycparser import c_ast, c_generator, c_parser
+
 cygwin_dir = Path(__file__).parent.resolve() / "bin/cygwin/cygwin/bin"
 tcc_path = Path(__file__).parent.resolve() / "bin/tcc/tcc.exe"
 w64devkit_path = Path(__file__).parent.resolve() / "bin/w64devkit/bin/sh.exe"
@@ -28,7 +30,239 @@ type_map = {
     "void": "None",
 }
 
-function_pattern = f"(({'|'.join([re.escape(i) for i in type_map])})\\s+(\\w+)\\s*\\((.*?)\\)\\s*(;|\\{{)?)(\\s*/\\*.*?\\*/)?"
+# Suffix of the generated module for every supported floating point precision
+precision_suffix = {
+    "double": "",
+    "float": "_f32",
+}
+
+# Extra compiler flags so that literals and <tgmath.h> stay in the requested precision
+precision_flags = {
+    "double": "",
+    "float": "-fsingle-precision-constant",
+}
+
+# Sources that are only built in double precision. The SPA works with Julian days of
+# about 2.46e6, which float resolves to a quarter of a day, and its time terms need
+# double precision constants, which -fsingle-precision-constant would truncate.
+double_only = {"spa"}
+
+# Suffix of the generated module for every accuracy tier of the trigonometric functions
+tier_suffix = {
+    "exact": "",
+    "fast": "_fast",
+    "coarse": "_coarse",
+}
+
+# Compiler flags that select the tier in helioc/c/math_tier.h
+tier_flags = {
+    "exact": "",
+    "fast": "-DHELIOC_MATH_TIER=1",
+    "coarse": "-DHELIOC_MATH_TIER=2",
+}
+
+# Comments and string literals, string literals are matched so that "/*" inside them is kept
+comment_pattern = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|//[^\n]*'
+
+# Integer parameters named n or n_* give the length of the pointer arguments before them
+length_pattern = r"n(_\w+)?"
+
+
+# Runtime of the instrumented wrappers, written to helioc/_profiling.py
+profiling_module_code = r'''import os as _os
+
+_enabled = False
+_functions = []
+_stats = {}
+
+
+def register(function, profiled_function):
+    _functions.append((function, function.__code__, profiled_function.__code__))
+    if _enabled:
+        function.__code__ = profiled_function.__code__
+
+
+def record(name, prepare_seconds, native_seconds):
+    entry = _stats.get(name)
+    if entry is None:
+        entry = _stats[name] = [0, 0.0, 0.0]
+    entry[0] += 1
+    entry[1] += prepare_seconds
+    entry[2] += native_seconds
+
+
+def set_profiling(enabled=True):
+    """
+    Switches the helioc wrappers between the plain and the instrumented code. The
+    code object of each wrapper is swapped in place, so functions that were
+    imported by name are switched too and the plain code has no overhead at all.
+    """
+    global _enabled
+    _enabled = bool(enabled)
+    for function, plain_code, profiled_code in _functions:
+        function.__code__ = profiled_code if _enabled else plain_code
+
+
+def is_profiling():
+    return _enabled
+
+
+def stats(reset=False):
+    """
+    Returns the counters of every profiled function as
+    {name: {"calls": int, "prepare_seconds": float, "native_seconds": float}},
+    where prepare_seconds is the time spent marshalling arguments in Python and
+    native_seconds the time spent in the ctypes call.
+    """
+    result = {
+        name: {"calls": calls, "prepare_seconds": prepare, "native_seconds": native}
+        for name, (calls, prepare, native) in sorted(_stats.items())
+    }
+    if reset:
+        reset_stats()
+    return result
+
+
+def reset_stats():
+    _stats.clear()
+
+
+def print_stats(reset=False):
+    print(f"{'function':<40}{'calls':>12}{'prepare [s]':>14}{'native [s]':>14}{'us/call':>10}")
+    for name, entry in stats(reset).items():
+        total = entry["prepare_seconds"] + entry["native_seconds"]
+        print(
+            f"{name:<40}{entry['calls']:>12}{entry['prepare_seconds']:>14.6f}"
+            f"{entry['native_seconds']:>14.6f}{1e6 * total / entry['calls']:>10.2f}"
+        )
+
+
+set_profiling(_os.environ.get("HELIOC_PROFILE", "0") not in ("", "0"))
+'''
+
+
+def _blank(match):
+    """Replaces a comment or preprocessor line by spaces, keeping newlines and offsets."""
+    return re.sub(r"[^\n]", " ", match.group(0))
+
+
+def strip_source(c_code):
+    """
+    Blanks out comments and preprocessor lines so that pycparser can parse a source
+    without running the preprocessor. Every offset in the result matches `c_code`.
+    Macros are left unexpanded, which is fine as long as they are used as values.
+    """
+    c_code = re.sub(
+        comment_pattern,
+        lambda match: match.group(0) if match.group(0)[0] in "\"'" else _blank(match),
+        c_code,
+        flags=re.DOTALL,
+    )
+    return re.sub(r"^[ \t]*#(?:[^\n]*\\\n)*[^\n]*", _blank, c_code, flags=re.MULTILINE)
+
+
+def _offset(c_code, coord):
+    lines = c_code.split("\n")
+    return sum(len(line) + 1 for line in lines[: coord.line - 1]) + coord.column - 1
+
+
+def _type_name(node, function_name):
+    name = " ".join(node.type.names)
+    if name not in type_map:
+        raise ValueError(
+            f"{function_name}: unsupported type {name!r}, expected one of {list(type_map)}"
+        )
+    return name
+
+
+def _dims(node, function_name):
+    """Returns the fixed dimensions of nested ArrayDecl nodes and the innermost node."""
+    dims = []
+    while isinstance(node, c_ast.ArrayDecl):
+        if not (isinstance(node.dim, c_ast.Constant) and node.dim.type == "int"):
+            raise ValueError(
+                f"{function_name}: array dimensions must be integer literals, "
+                f"use a pointer with a length parameter for variable lengths"
+            )
+        dims.append(int(node.dim.value, 0))
+        node = node.type
+    return tuple(dims), node
+
+
+def parse_arg(param, function_name):
+    """
+    Describes one parameter of an exported function.
+
+    - `double x`: a scalar.
+    - `double x[3]`, `double x[3][3]`: fixed shape arrays.
+    - `double *x`, `double x[]`, `double (*x)[3]`, `double x[][3]`: arrays of a variable
+      number of rows, whose length is given by the next `int n` or `int n_*` parameter.
+      Without a length parameter a pointer stands for a single value, shape (1,).
+    """
+    node = param.type
+    pointer = False
+    if isinstance(node, c_ast.PtrDecl):
+        # Also covers pointers to arrays, e.g. double (*x)[3]
+        pointer = True
+        dims, node = _dims(node.type, function_name)
+    elif isinstance(node, c_ast.ArrayDecl) and node.dim is None:
+        pointer = True
+        dims, node = _dims(node.type, function_name)
+    else:
+        dims, node = _dims(node, function_name)
+
+    if not isinstance(node, c_ast.TypeDecl) or not isinstance(node.type, c_ast.IdentifierType):
+        raise ValueError(f"{function_name}: unsupported parameter {param.name!r}")
+
+    return SimpleNamespace(
+        name=param.name,
+        type=_type_name(node, function_name),
+        const="const" in node.quals,
+        pointer=pointer,
+        dims=dims,
+    )
+
+
+def extract_functions(c_code):
+    """
+    Parses the non-static function definitions of a C source with pycparser.
+
+    Returns a list of SimpleNamespace with the return type, name, parsed args (see
+    `parse_arg`), the declaration for the header, the docstring (the comment that
+    opens the function body) and the offset at which the definition starts.
+    """
+    stripped = strip_source(c_code)
+    ast = c_parser.CParser().parse(stripped)
+    generator = c_generator.CGenerator()
+
+    functions = []
+    for node in ast.ext:
+        if not isinstance(node, c_ast.FuncDef) or "static" in node.decl.storage:
+            continue
+
+        function_type = node.decl.type
+        name = node.decl.name
+        params = function_type.args.params if function_type.args else []
+        args = [
+            parse_arg(param, name)
+            for param in params
+            if not (isinstance(param, c_ast.Typename) and param.name is None)
+        ]
+
+        body_start = _offset(c_code, node.body.coord)
+        docstring = re.match(r"\{\s*(/\*.*?\*/)?", c_code[body_start:], re.DOTALL).group(1)
+
+        functions.append(
+            SimpleNamespace(
+                ret_type=_type_name(function_type.type, name),
+                name=name,
+                args=args,
+                declaration=generator.visit(node.decl),
+                docstring=docstring or "",
+                start=_offset(c_code, function_type.type.type.coord),
+            )
+        )
+    return functions
 
 
 @contextmanager
@@ -37,10 +271,10 @@ def dll_exported_source(c_dir):
         for file in c_dir.rglob("*.c"):
             c_code = file.read_text()
 
-            def replace(match):
-                return f"__declspec(dllexport) {match.group(1)}"
-
-            c_code = re.sub(function_pattern, replace, c_code)
+            for function in reversed(extract_functions(c_code)):
+                c_code = (
+                    c_code[: function.start] + "__declspec(dllexport) " + c_code[function.start :]
+                )
 
             outfile = Path(tdir) / file.relative_to(c_dir)
             outfile.parent.mkdir(exist_ok=True, parents=True)
@@ -49,47 +283,96 @@ def dll_exported_source(c_dir):
         yield Path(tdir)
 
 
-def extract_functions(c_code):
-    # Add re.DOTALL to make '.' match any character including newlines
-    unpacked = [
-        [ret_type, func_name, args, docstring]
-        for _, ret_type, func_name, args, _, docstring in re.findall(
-            function_pattern, c_code, re.DOTALL
-        )
-    ]
-    return unpacked
-
+def write_variant(c_file, gcc_dir, precision, tier="exact"):
+    """
+    Writes a copy of `c_file` to `gcc_dir` that includes its own header, leaving the
+    original source untouched. For single precision every double is replaced by
+    float and <tgmath.h> is used so that the math functions resolve to their single
+    precision versions. The tier is selected by the compiler flags, see `tier_flags`.
+    """
+    suffix = precision_suffix[precision] + tier_suffix[tier]
+    c_code = Path(c_file).read_text()
 
-def extract_arg_type(arg_str):
-    regex = r"(\w+)\s*(\*?)\s*(\w+)((\[\s*\d+\s*\]\s*)*)"
-    match = re.match(regex, arg_str)
+    c_code = c_code.replace(
+        f'#include "{Path(c_file).stem}.h"', f'#include "{Path(c_file).stem}{suffix}.h"'
+    )
+    if precision != "double":
+        c_code = c_code.replace("#include <math.h>", "#include <tgmath.h>")
+        c_code = re.sub(r"\bdouble\b", precision, c_code)
+
+    variant_file = Path(gcc_dir) / (Path(c_file).stem + suffix + ".c")
+    variant_file.write_text(c_code)
+    return variant_file
+
+
+def get_precisions():
+    """
+    Returns the precisions to build, from the comma separated HELIOC_PRECISIONS
+    environment variable (e.g. "double,float"), defaulting to double only.
+    """
+    precisions = os.environ.get("HELIOC_PRECISIONS", "double")
+    precisions = [i.strip() for i in precisions.split(",") if i.strip()]
+    for precision in precisions:
+        if precision not in precision_suffix:
+            raise ValueError(
+                f"Unknown precision {precision!r}, expected one of {list(precision_suffix)}"
+            )
+    return precisions
+
+
+def get_tiers():
+    """
+    Returns the accuracy tiers to build, from the comma separated HELIOC_TIERS
+    environment variable (e.g. "exact,fast"), defaulting to exact only.
+    """
+    tiers = os.environ.get("HELIOC_TIERS", "exact")
+    tiers = [i.strip() for i in tiers.split(",") if i.strip()]
+    for tier in tiers:
+        if tier not in tier_suffix:
+            raise ValueError(f"Unknown tier {tier!r}, expected one of {list(tier_suffix)}")
+    return tiers
+
+
+def prepare_sources(c_files, gcc_dir, precisions, profiling=True, tiers=("exact",)):
+    """
+    Generates the headers and Python wrappers for every c file in every precision
+    and accuracy tier.
+
+    Returns a list of (c source, compiler flags) to compile.
+    """
+    sources = []
+    for c_file in c_files:
+        for precision in precisions:
+            if precision != "double" and Path(c_file).stem in double_only:
+                continue
+            for tier in tiers:
+                if precision == "double" and tier == "exact":
+                    source = c_file
+                else:
+                    source = write_variant(c_file, gcc_dir, precision, tier)
 
-    arg_type, pointer, arg_name, all_brackets = match.groups()[:4]
+                generate_files(source, profiling)
+                flags = " ".join(i for i in (precision_flags[precision], tier_flags[tier]) if i)
+                sources.append((source, flags))
 
-    if all_brackets:
-        dims = tuple(int(x) for x in re.findall(r"\[(\d+)\]", all_brackets))
-    else:
-        dims = ()
+    return sources
 
-    return arg_type, bool(pointer), arg_name, dims
 
-
-def generate_files(c_file):
+def generate_files(c_file, profiling=True):
     gccdir = Path(c_file).parent.parent / "gcc"
     gccdir.mkdir(exist_ok=True)
 
     pydir = Path(c_file).parent.parent
     pydir.mkdir(exist_ok=True)
 
-    # Regular expression for function declarations in C code
     c_code = Path(c_file).read_text()
     function_declarations = extract_functions(c_code)
 
     # Generate header file
     guardname = Path(c_file).stem.upper() + "_H"
     header_code = f"#ifndef {guardname}\n#define {guardname}\n\n"
-    for ret_type, func_name, args, docstring in function_declarations:
-        header_code += f"{ret_type} {func_name}({args});\n"
+    for function in function_declarations:
+        header_code += f"{function.declaration};\n"
     header_code += f"\n#endif // {guardname}"
 
     # Generate Python wrapper
@@ -99,58 +382,120 @@ import numpy as _np
 _this_dir = _Path(__file__).parent.absolute()
 _lib = _ctypes.CDLL(str(_this_dir / 'gcc/{Path(c_file).stem}.dll'))\n\n"""
 
-    for ret_type, func_name, args, docstring in function_declarations:
-        ret_type_py = ctype_map[ret_type.strip()]
+    if profiling:
+        python_wrapper_code = python_wrapper_code.replace(
+            "import numpy as _np\n",
+            "import numpy as _np\nfrom time import perf_counter as _perf_counter\nfrom . import _profiling\n",
+        )
 
-        args_c = [arg.strip() for arg in args.split(",") if arg]
+    for function in function_declarations:
+        func_name, docstring = function.name, function.docstring
+        ret_type_py = ctype_map[function.ret_type]
 
         typewrap = (
             lambda x, dims: f"_ctypes.POINTER({ctype_map[x]})" if dims else ctype_map[x]
         )
 
+        # Bind every pointer to the length parameter that follows it
         args_py = []
-        for arg in args_c:
-            arg_type, pointer, arg_name, dims = extract_arg_type(arg)
-
-            if pointer:
-                dims = (1,)
-
-            args_py.append(
-                SimpleNamespace(
-                    name=arg_name,
-                    passname=arg_name,
-                    type=arg_type,
-                    ctype=typewrap(arg_type, dims),
-                    npobj=f"_np.zeros({tuple((int(i) for i in dims))}, dtype={type_map[arg_type]})",
-                    pointer=pointer,
-                    dims=tuple((int(i) for i in dims)),
-                    returns=arg_name.startswith("return_"),
-                )
+        unbound = []
+        for arg in function.args:
+            arg = SimpleNamespace(
+                **vars(arg),
+                passname=arg.name,
+                returns=arg.name.startswith("return_"),
+                length=None,
+                bound=[],
+                inferred=False,
             )
+            if arg.pointer:
+                unbound.append(arg)
+            elif arg.type == "int" and not arg.dims and unbound and re.fullmatch(length_pattern, arg.name):
+                for i in unbound:
+                    i.length = arg
+                arg.bound, unbound = unbound, []
+            args_py.append(arg)
+
+        # Pointers without a length parameter point to a single value
+        for arg in unbound:
+            arg.dims = (1,) + arg.dims
+
+        for arg in args_py:
+            arg.ctype = typewrap(arg.type, arg.dims or arg.pointer)
+            arg.npobj = f"_np.zeros({arg.dims}, dtype={type_map[arg.type]})"
+
+        prepare_code = ""
+        for arg in [arg for arg in args_py if arg.returns and arg.dims and not arg.length]:
+            prepare_code += f"    {arg.name} = {arg.npobj}\n"
+        for arg in [arg for arg in args_py if arg.dims and not arg.length]:
+            prepare_code += f"    assert {arg.name}.shape == {(arg.dims)}\n"
+            prepare_code += f"    {arg.name} = _np.ascontiguousarray({arg.name}).astype({type_map[arg.type]})\n"
+            prepare_code += f"    {arg.name}_p = {arg.name}.ctypes.data_as({typewrap(arg.type, True)})\n"
+            arg.passname = arg.name + "_p"
+
+        # Arrays with a length parameter are passed without copying where possible
+        for length in [arg for arg in args_py if arg.bound]:
+            inputs = [arg for arg in length.bound if not arg.returns]
+            length.inferred = bool(inputs)
+            for arg in inputs:
+                dtype = type_map[arg.type]
+                if arg.const:
+                    prepare_code += f"    {arg.name} = _np.ascontiguousarray({arg.name}, dtype={dtype})\n"
+                else:
+                    # Written in place, so a converted copy would silently lose the result
+                    prepare_code += f"    if not (isinstance({arg.name}, _np.ndarray) and {arg.name}.dtype == {dtype} and {arg.name}.flags.c_contiguous):\n"
+                    prepare_code += f"        raise TypeError('{arg.name} is written in place and must be a C-contiguous {arg.type} array')\n"
+            if inputs:
+                prepare_code += f"    {length.name} = {inputs[0].name}.shape[0]\n"
+            for arg in length.bound:
+                shape = f"({', '.join([length.name] + [str(i) for i in arg.dims])}{',' if not arg.dims else ''})"
+                if arg.returns:
+                    prepare_code += f"    {arg.name} = _np.empty({shape}, dtype={type_map[arg.type]})\n"
+                else:
+                    prepare_code += f"    if {arg.name}.shape != {shape}:\n"
+                    prepare_code += f"        raise ValueError(f'{arg.name} must have shape {{{shape}}}, got {{{arg.name}.shape}}')\n"
+                prepare_code += f"    {arg.name}_p = {arg.name}.ctypes.data_as({typewrap(arg.type, True)})\n"
+                arg.passname = arg.name + "_p"
+
+        signature = ', '.join([arg.name for arg in args_py if not arg.returns and not arg.inferred])
+        call_code = f"_lib.{func_name}({', '.join([arg.passname for arg in args_py])})"
+        return_code = f"    return ({', '.join([arg.name + ('[0]' if arg.pointer and not arg.length else '') for arg in args_py if arg.returns])})\n"
 
         python_wrapper_code += f"\n"
         python_wrapper_code += f"_lib.{func_name}.argtypes = [{', '.join([arg.ctype for arg in args_py])}]\n"
         if ret_type_py != "None":
             python_wrapper_code += f"_lib.{func_name}.restype = {ret_type_py}\n"
-        python_wrapper_code += f"def {func_name}({', '.join([arg.name for arg in args_py if not arg.returns])}):\n"
+        python_wrapper_code += f"def {func_name}({signature}):\n"
         if docstring:
             python_wrapper_code += f"    r'''{docstring.strip()[2:-2]}'''\n"
 
-        for arg in [arg for arg in args_py if arg.returns and arg.dims]:
-            python_wrapper_code += f"    {arg.name} = {arg.npobj}\n"
-        for arg in [arg for arg in args_py if arg.dims]:
-            python_wrapper_code += f"    assert {arg.name}.shape == {(arg.dims)}\n"
-            python_wrapper_code += f"    {arg.name} = _np.ascontiguousarray({arg.name}).astype({type_map[arg.type]})\n"
-            python_wrapper_code += f"    {arg.name}_p = {arg.name}.ctypes.data_as({typewrap(arg.type, True)})\n"
-            arg.passname = arg.name + "_p"
-
+        python_wrapper_code += prepare_code
         if ret_type_py != "None":
-            python_wrapper_code += f"    return _lib.{func_name}({', '.join([arg.passname for arg in args_py])})\n"
+            python_wrapper_code += f"    return {call_code}\n"
         else:
-            python_wrapper_code += f"    _lib.{func_name}({', '.join([arg.passname for arg in args_py])})\n"
-            python_wrapper_code += f"    return ({', '.join([arg.name + ('[0]' if arg.pointer else '') for arg in args_py if arg.returns])})\n"
+            python_wrapper_code += f"    {call_code}\n"
+            python_wrapper_code += return_code
         python_wrapper_code += f"\n"
 
+        # Instrumented twin of the wrapper, swapped in by helioc.set_profiling(True)
+        if profiling:
+            python_wrapper_code += f"def _profiled_{func_name}({signature}):\n"
+            python_wrapper_code += f"    _t0 = _perf_counter()\n"
+            python_wrapper_code += prepare_code
+            python_wrapper_code += f"    _t1 = _perf_counter()\n"
+            if ret_type_py != "None":
+                python_wrapper_code += f"    _result = {call_code}\n"
+            else:
+                python_wrapper_code += f"    {call_code}\n"
+            python_wrapper_code += f"    _t2 = _perf_counter()\n"
+            python_wrapper_code += f"    _profiling.record('{Path(c_file).stem}.{func_name}', _t1 - _t0, _t2 - _t1)\n"
+            if ret_type_py != "None":
+                python_wrapper_code += f"    return _result\n"
+            else:
+                python_wrapper_code += return_code
+            python_wrapper_code += f"_profiling.register({func_name}, _profiled_{func_name})\n"
+            python_wrapper_code += f"\n"
+
     with open(gccdir / (Path(c_file).stem + ".h"), "w") as f:
         f.write(header_code)
 
@@ -158,7 +503,35 @@ _lib = _ctypes.CDLL(str(_this_dir / 'gcc/{Path(c_file).stem}.dll'))\n\n"""
         f.write(python_wrapper_code)
 
 
-def compile():
+def write_package_init(py_dir, profiling=True):
+    Path(py_dir / "__init__.py").write_text(
+        "\n".join(
+            [
+                "import ctypes as _ctypes",
+                # "_cygwin_dll = _ctypes.CDLL(__file__+'/../gcc/cygwin1.dll')",
+            ]
+            + [
+                rf"from . import {i.stem}"
+                for i in sorted((py_dir).glob("*.py"))
+                if not i.stem.startswith("_")
+            ]
+            + (
+                [
+                    "from ._profiling import stats, reset_stats, print_stats, set_profiling, is_profiling"
+                ]
+                if profiling
+                else []
+            )
+        )
+    )
+
+
+def compile(precisions=None, profiling=True, tiers=None):
+    if precisions is None:
+        precisions = get_precisions()
+    if tiers is None:
+        tiers = get_tiers()
+
     this_dir = Path(__file__).parent.absolute()
     py_dir = this_dir / "helioc"
     c_dir = this_dir / "helioc/c"
@@ -173,11 +546,9 @@ def compile():
     for file in other_files:
         file.unlink()
 
-    for c_file in c_files:
-        # hack to replace double with float to test precision
-        # c_file.write_text(c_file.read_text().replace("double", "float"))
-        c_file.write_text(c_file.read_text().replace("float", "double"))
-        generate_files(c_file)
+    sources = prepare_sources(c_files, gcc_dir, precisions, profiling, tiers)
+    if profiling:
+        Path(py_dir / "_profiling.py").write_text(profiling_module_code)
 
     # Tinycc
     # with dll_exported_source(c_dir) as exported_c_dir:
@@ -205,31 +576,19 @@ def compile():
 
     # W64devkit
     os.environ["PATH"] = f"{w64devkit_path.parent};{os.environ['PATH']}"
-    for c_file in c_files:
+    for c_file, flags in sources:
         subprocess.call(
             [
                 rf"{w64devkit_path}",
                 "-c",
-                rf'gcc "-I{gcc_dir}" -m64 -shared -o "{gcc_dir / (c_file.stem+".dll")}" "{c_file}"',
+                rf'gcc "-I{gcc_dir}" "-I{c_dir}" -m64 -O2 {flags} -shared -o "{gcc_dir / (c_file.stem+".dll")}" "{c_file}"',
             ]
         )
 
-    Path(py_dir / "__init__.py").write_text(
-        "\n".join(
-            [
-                "import ctypes as _ctypes",
-                # "_cygwin_dll = _ctypes.CDLL(__file__+'/../gcc/cygwin1.dll')",
-            ]
-            + [
-                rf"from . import {i.stem}"
-                for i in (py_dir).glob("*.py")
-                if i.stem != "__init__"
-            ]
-        )
-    )
+    write_package_init(py_dir, profiling)
 
     # if not all c files have dll files, delete gcc directory and all python files not named __init__.py
-    if len(list(gcc_dir.glob("*.dll"))) != len(c_files):
+    if len(list(gcc_dir.glob("*.dll"))) != len(sources):
         shutil.rmtree(gcc_dir)
         for file in py_dir.glob("*.py"):
             if file.stem != "__init__":
@@ -0,0 +1,194 @@
+import numpy as np
+
+import helioc  # noqa
+from helioc.math_functions import get_degrees_batch, rotation_matrix_3d_batch
+
+
+# Corners of a facet in its own frame, in the order they are drawn, as multiples of the
+# half width along x and the half height along z. Like the mirror of `plot_surface`, a
+# facet lies in the x-z plane and faces -y, the normal of `get_normal_vector` at zero degrees.
+_corners = np.array([[-1.0, 0.0, -1.0], [1.0, 0.0, -1.0], [1.0, 0.0, 1.0], [-1.0, 0.0, 1.0]])
+
+
+def rotation_matrices(degrees):
+    """
+    Returns the (n, 3, 3) rotations of mirrors turned to degrees_from_north and
+    degrees_elevation, which map [0, -1, 0] to `get_normal_vector`.
+    """
+    degrees = np.atleast_2d(np.asarray(degrees, dtype=np.float64))
+    return rotation_matrix_3d_batch(np.radians(-degrees))
+
+
+class FacetLayout:
+    """
+    Facets of one heliostat type, in the frame of the mirror.
+
+    The mirror frame has its origin at the pivot, the midpoint of `FieldState.position`,
+    x to the side, z up and the mirror facing -y when both actuator angles are zero.
+    A layout is defined once and shared by every heliostat of its type, see `FacetedField`.
+
+    Parameters:
+        centers (np.array): (k, 3) facet centres.
+        normals (np.array): (k, 3) facet normals, i.e. the canting.
+        half_sizes (np.array): (k, 2) half widths and half heights of the facets.
+    """
+
+    def __init__(self, centers, normals, half_sizes):
+        self.centers = np.ascontiguousarray(centers, dtype=np.float64)
+        normals = np.asarray(normals, dtype=np.float64)
+        self.normals = np.ascontiguousarray(normals / np.linalg.norm(normals, axis=1, keepdims=True))
+        self.half_sizes = np.ascontiguousarray(np.broadcast_to(half_sizes, (len(self.centers), 2)), dtype=np.float64)
+
+        # A facet is a flat rectangle turned to its normal like a mirror to its angles
+        self.rotations = rotation_matrices(get_degrees_batch(self.normals))
+        self.corners = np.ascontiguousarray(
+            self.centers[:, None, :]
+            + np.einsum("kij,kcj->kci", self.rotations, _corners[None] * self._extents[:, None, :])
+        )
+
+    def __len__(self):
+        return len(self.centers)
+
+    @property
+    def _extents(self):
+        return np.column_stack([self.half_sizes[:, 0], np.zeros(len(self)), self.half_sizes[:, 1]])
+
+    @property
+    def areas(self):
+        return 4 * self.half_sizes[:, 0] * self.half_sizes[:, 1]
+
+    @classmethod
+    def grid(cls, rows, columns, facet_width, facet_height, gap=0.0, focal_length=None):
+        """
+        A rectangular grid of equal facets, canted on axis.
+
+        Parameters:
+            rows (int): Number of facets along z.
+            columns (int): Number of facets along x.
+            facet_width (float): Width of a facet in meters.
+            facet_height (float): Height of a facet in meters.
+            gap (float): Gap between neighbouring facets in meters.
+            focal_length (float): Distance in meters at which the facets focus, i.e. the
+                facet centres and normals follow a paraboloid with its focus on the
+                mirror normal. Defaults to flat.
+
+        Returns:
+            FacetLayout: The layout.
+        """
+        x = (np.arange(columns) - (columns - 1) / 2) * (facet_width + gap)
+        z = (np.arange(rows) - (rows - 1) / 2) * (facet_height + gap)
+        x, z = (i.ravel() for i in np.meshgrid(x, z, indexing="xy"))
+
+        if focal_length is None:
+            y = np.zeros_like(x)
+            normals = np.tile([0.0, -1.0, 0.0], (len(x), 1))
+        else:
+            # The paraboloid y = -(x^2 + z^2) / (4 f) opens towards its focus at y = -f
+            y = -(x**2 + z**2) / (4 * focal_length)
+            normals = -np.column_stack([x / (2 * focal_length), np.ones_like(x), z / (2 * focal_length)])
+
+        return cls(np.column_stack([x, y, z]), normals, [facet_width / 2, facet_height / 2])
+
+
+class FacetedField:
+    """
+    Every facet of a field of heliostats that share a `FacetLayout`, in field coordinates.
+
+    The layout is instanced for every mirror with one batched rotation per mirror, and
+    the results are written into preallocated C-contiguous arrays that keep the
+    heliostat as the first and the facet as the second axis:
+
+        centers (n, k, 3), normals (n, k, 3) and corners (n, k, 4, 3).
+
+    `update` overwrites them in place, so ray tracing, blocking and rendering can hold
+    on to the same arrays, or flat views like `polygons`, from one timestamp to the next.
+
+    Parameters:
+        layout (FacetLayout): The facets of the heliostat type.
+        positions (np.array): (n, 3) pivot positions of the mirrors.
+    """
+
+    def __init__(self, layout, positions):
+        self.layout = layout
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64)
+        n, k = len(self.positions), len(layout)
+        self.rotations = np.zeros((n, 3, 3))
+        self.centers = np.empty((n, k, 3))
+        self.normals = np.empty((n, k, 3))
+        self.corners = np.empty((n, k, 4, 3))
+        self.update(np.zeros((n, 2)))
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def polygons(self):
+        """The corners as an (n * k, 4, 3) view, e.g. for a `Poly3DCollection`."""
+        return self.corners.reshape(-1, 4, 3)
+
+    def triangles(self):
+        """Returns the (n * k * 2, 3) corner indices of two triangles per facet into `polygons.reshape(-1, 3)`."""
+        first = np.arange(len(self.polygons))[:, None] * 4
+        return (first[:, None, :] + np.array([[0, 1, 2], [0, 2, 3]])).reshape(-1, 3)
+
+    def update(self, degrees, indices=None):
+        """
+        Turns the mirrors to actuator angles and recomputes their facets in place.
+
+        Parameters:
+            degrees (np.array): (n, 2) degrees_from_north and degrees_elevation of the
+                mirrors, or (len(indices), 2) if indices is given. These are the angles
+                of the normal, i.e. the degrees column of `FieldState` plus the mount offset.
+            indices (np.array): Heliostats to update, defaults to all.
+        """
+        rotations = rotation_matrices(degrees)
+        transposed = rotations.transpose(0, 2, 1)
+        corners = self.layout.corners.reshape(-1, 3)
+
+        if indices is None:
+            # Written straight into the arrays, without temporaries
+            self.rotations[:] = rotations
+            np.matmul(self.layout.centers, transposed, out=self.centers)
+            np.matmul(self.layout.normals, transposed, out=self.normals)
+            np.matmul(corners, transposed, out=self.corners.reshape(len(self), 4 * len(self.layout), 3))
+            self.centers += self.positions[:, None, :]
+            self.corners += self.positions[:, None, None, :]
+            return
+
+        indices = np.asarray(indices, dtype=np.intp)
+        positions = self.positions[indices]
+        self.rotations[indices] = rotations
+        self.centers[indices] = positions[:, None, :] + self.layout.centers @ transposed
+        self.normals[indices] = self.layout.normals @ transposed
+        self.corners[indices] = positions[:, None, None, :] + (corners @ transposed).reshape(
+            (len(indices),) + self.layout.corners.shape
+        )
+
+    def update_from_state(self, state, indices=None):
+        """Turns the mirrors to the current angles of a `FieldState`, see `update`."""
+        select = slice(None) if indices is None else np.asarray(indices, dtype=np.intp)
+        self.update(state.degrees[select] + state.mount_offset[select], indices)
+
+
+if __name__ == "__main__":
+    import time
+
+    from field_state import FieldState
+
+    layout = FacetLayout.grid(rows=4, columns=5, facet_width=1.2, facet_height=1.0, gap=0.02, focal_length=300.0)
+    print(f"{len(layout)} facets, {layout.areas.sum():.1f} m^2 per heliostat")
+
+    rng = np.random.default_rng(0)
+    state = FieldState.from_positions(rng.uniform(-400, 400, (10_000, 3)) * [1, 1, 0] + [0, 0, 3])
+    field = FacetedField(layout, state.position)
+    state.track(180.0, 45.0, [0, 0, 150])
+
+    start = time.perf_counter()
+    for _ in range(10):
+        field.update_from_state(state)
+    elapsed = (time.perf_counter() - start) / 10
+    print(f"{len(field)} heliostats, {field.polygons.shape[0]} facets updated in {elapsed * 1e3:.1f} ms")
+
+    # The instanced rotations turn the -y axis of the layout into the tracked normals
+    print(f"max deviation from the mirror normals: {np.abs(-field.rotations[:, :, 1] - state.normal).max():.2e}")
+    print(f"max deviation of the layout normals: {np.abs(-layout.rotations[:, :, 1] - layout.normals).max():.2e}")
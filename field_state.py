@@ -0,0 +1,153 @@
+from pathlib import Path
+
+import numpy as np
+
+import helioc  # noqa
+from helioc.math_functions import get_degrees_batch, get_normal_vector_batch
+from plot3d_surfaces import get_sunray
+
+
+# Name and per-heliostat shape of every column in the store
+columns = {
+    "position": (3,),  # x, y, z of the mirror midpoint
+    "mount_offset": (2,),  # degrees_from_north and degrees_elevation offsets of the mount
+    "normal": (3,),  # current mirror normal
+    "degrees": (2,),  # current actuator angles, i.e. the ideal angles minus the mount offset
+}
+
+
+class FieldState:
+    """
+    Structure-of-arrays store of the state of every heliostat in a field.
+
+    Every column is a separate C-contiguous array with the heliostat as the first
+    axis, so a column, or the (3,) vector of a single heliostat, can be passed to the
+    helioc kernels without a conversion copy. The kernels return newly allocated
+    arrays, which `set_normals` then copies into the columns. A saved store is a directory with one .npy file
+    per column and is opened memory-mapped, so loading is instant and worker
+    processes that open it read-only share the same pages.
+    """
+
+    def __init__(self, **arrays):
+        lengths = {len(arrays[name]) for name in columns}
+        if len(lengths) != 1:
+            raise ValueError(f"All columns must have the same length, got {lengths}")
+
+        for name, shape in columns.items():
+            array = arrays[name]
+            if array.shape[1:] != shape:
+                raise ValueError(
+                    f"Column {name} must have shape (n, {', '.join(map(str, shape))}), got {array.shape}"
+                )
+            if not array.flags.c_contiguous:
+                raise ValueError(f"Column {name} must be C-contiguous")
+            setattr(self, name, array)
+
+    def __len__(self):
+        return len(self.position)
+
+    @property
+    def dtype(self):
+        return self.position.dtype
+
+    @classmethod
+    def empty(cls, n, dtype=np.float64):
+        """Creates an in-memory store of `n` heliostats with all columns zeroed."""
+        return cls(
+            **{name: np.zeros((n,) + shape, dtype=dtype) for name, shape in columns.items()}
+        )
+
+    @classmethod
+    def from_positions(cls, positions, dtype=np.float64):
+        """Creates an in-memory store from an (n, 3) array of mirror positions."""
+        positions = np.asarray(positions, dtype=dtype)
+        state = cls.empty(len(positions), dtype=dtype)
+        state.position[:] = positions
+        return state
+
+    @classmethod
+    def create(cls, path, n, dtype=np.float64):
+        """Creates a zeroed, writable memory-mapped store of `n` heliostats at `path`."""
+        path = Path(path)
+        path.mkdir(exist_ok=True, parents=True)
+        return cls(
+            **{
+                name: np.lib.format.open_memmap(
+                    path / f"{name}.npy", mode="w+", dtype=dtype, shape=(n,) + shape
+                )
+                for name, shape in columns.items()
+            }
+        )
+
+    @classmethod
+    def load(cls, path, mode="r"):
+        """
+        Opens a saved store memory-mapped. Use mode "r" to share the store read-only
+        across processes, "r+" to modify it in place or "c" for copy-on-write.
+        """
+        path = Path(path)
+        return cls(
+            **{name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in columns}
+        )
+
+    def save(self, path):
+        """Writes every column to `path` as a separate .npy file."""
+        path = Path(path)
+        path.mkdir(exist_ok=True, parents=True)
+        for name in columns:
+            np.save(path / f"{name}.npy", getattr(self, name))
+
+    def flush(self):
+        """Flushes the columns of a writable memory-mapped store to disk."""
+        for name in columns:
+            array = getattr(self, name)
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def vector_dests(self, target, indices=None):
+        """Returns the (n, 3) directions from every mirror, or from the mirrors in `indices`, to `target`."""
+        positions = self.position if indices is None else self.position[indices]
+        return np.asarray(target, dtype=self.dtype) - positions
+
+    def surface_normals(self, sun_degrees_azimuth, sun_degrees_elevation, target, indices=None):
+        """
+        Returns the (n, 3) mirror normals that reflect the sun onto `target`, see `get_mirror_normal`,
+        or the (len(indices), 3) normals of the mirrors in `indices` only.
+        """
+        ray = get_sunray(sun_degrees_azimuth, sun_degrees_elevation)
+        vector_dests = self.vector_dests(target, indices)
+        vector_dests = vector_dests / np.linalg.norm(vector_dests, axis=1, keepdims=True)
+        return (-ray / np.linalg.norm(ray) + vector_dests) / 2
+
+    def set_normals(self, surface_normals, indices=None):
+        """
+        Converts mirror normals to actuator angles and stores both in the normal and degrees columns.
+
+        Parameters:
+            surface_normals (np.array): (n, 3) normals, or (len(indices), 3) if indices is given.
+            indices (iterable): Heliostats to update, defaults to all.
+        """
+        indices = slice(None) if indices is None else np.asarray(list(indices), dtype=np.intp)
+
+        degrees = get_degrees_batch(surface_normals)
+        self.normal[indices] = get_normal_vector_batch(degrees)
+        # The actuators compensate for the rotation of the mount
+        self.degrees[indices] = degrees - self.mount_offset[indices]
+
+    def track(self, sun_degrees_azimuth, sun_degrees_elevation, target, indices=None):
+        """
+        Updates the normal and degrees columns so that the heliostats reflect the sun onto `target`.
+
+        Parameters:
+            sun_degrees_azimuth (float): The azimuth angle of the sun in degrees.
+            sun_degrees_elevation (float): The elevation angle of the sun in degrees.
+            target (np.array): The position of the destination.
+            indices (iterable): Heliostats to update, defaults to all.
+        """
+        if indices is not None:
+            indices = np.asarray(list(indices), dtype=np.intp)
+
+        surface_normals = self.surface_normals(
+            sun_degrees_azimuth, sun_degrees_elevation, target, indices
+        )
+        self.set_normals(surface_normals, indices)
@@ -0,0 +1,262 @@
+import numpy as np
+from mpl_toolkits.mplot3d import proj3d
+from mpl_toolkits.mplot3d.art3d import Line3DCollection, Poly3DCollection
+
+from facets import FacetedField, FacetLayout
+from tracking import aim_field
+
+
+# Levels of detail, from culled to every facet
+levels = ("hidden", "points", "quads", "facets")
+
+
+def _clusters(positions, cluster_size):
+    """Returns the cluster of every mirror on a square grid of `cluster_size` meters and the cluster centres."""
+    cells = np.floor(positions[:, :2] / cluster_size).astype(np.int64)
+    _, labels = np.unique(cells, axis=0, return_inverse=True)
+    labels = labels.ravel()
+    counts = np.bincount(labels)
+    centers = np.stack([np.bincount(labels, positions[:, i]) / counts for i in range(3)], axis=1)
+    return labels, centers
+
+
+class FieldView:
+    """
+    Draws a field of heliostats on a 3D matplotlib axes with a level of detail per cluster.
+
+    The mirrors are grouped into square clusters of `cluster_size` meters. `refresh`
+    projects the cluster centres with the current view and picks a level for each
+    from the size of a mirror on screen: clusters outside the axes are hidden, far
+    ones are drawn as points, nearer ones as one quad per mirror and the nearest as
+    every facet of the layout, up to `max_facet_mirrors`. There is one artist per
+    level, whatever the number of mirrors.
+
+    The quads and facets are `FacetedField`s of the mirrors at their level, whose
+    corner arrays are handed to the artists without copying. `update` rewrites these
+    arrays in place from the angles of the field, so animation frames neither recreate
+    artists nor allocate vertex buffers. The levels only change on `refresh`, which is
+    called after the view is rotated or zoomed with the mouse.
+
+    Parameters:
+        ax (Axes3D): The axes to draw on.
+        state (FieldState): The field, drawn at its current angles.
+        layout (FacetLayout): The facets of the heliostats.
+        cluster_size (float): Edge length of the clusters in meters.
+        quad_pixels (float): Size of a mirror on screen in pixels from which it is drawn as a quad.
+        facet_pixels (float): Size of a mirror on screen in pixels from which it is drawn facet by facet.
+        max_facet_mirrors (int): Largest number of mirrors drawn facet by facet.
+        target (np.array): Draw the sun rays of `rays` mirrors towards this target.
+        rays (int): Number of mirrors, spread over the field, whose rays are drawn.
+        ray_length (float): Length of the drawn sun rays in meters.
+    """
+
+    def __init__(
+        self,
+        ax,
+        state,
+        layout,
+        cluster_size=50.0,
+        quad_pixels=3.0,
+        facet_pixels=30.0,
+        max_facet_mirrors=2000,
+        target=None,
+        rays=0,
+        ray_length=50.0,
+    ):
+        self.ax = ax
+        self.state = state
+        self.layout = layout
+        self.quad_pixels = quad_pixels
+        self.facet_pixels = facet_pixels
+        self.max_facet_mirrors = max_facet_mirrors
+        self.target = None if target is None else np.asarray(target, dtype=np.float64)
+        self.ray_length = ray_length
+
+        corners = layout.corners.reshape(-1, 3)
+        self.mirror_size = np.ptp(corners, axis=0).max()
+        width, height = np.ptp(corners[:, 0]), np.ptp(corners[:, 2])
+        self._quad_layout = FacetLayout([[0.0, 0.0, 0.0]], [[0.0, -1.0, 0.0]], [width / 2, height / 2])
+
+        self.labels, self.cluster_centers = _clusters(state.position, cluster_size)
+        self.cluster_levels = np.full(len(self.cluster_centers), levels.index("points"))
+        self.members = {}
+        self._fields = {}
+
+        (self.points,) = ax.plot([], [], [], linestyle="none", marker=".", markersize=2, color="tab:blue")
+        self.quads = Poly3DCollection([], facecolor="tab:blue", edgecolor="none", alpha=0.9)
+        self.facets = Poly3DCollection([], facecolor="tab:cyan", edgecolor="tab:gray", linewidth=0.2, alpha=0.9)
+        ax.add_collection3d(self.quads)
+        ax.add_collection3d(self.facets)
+
+        self.ray_mirrors = np.linspace(0, len(state) - 1, rays).astype(np.intp) if target is not None else np.zeros(0, np.intp)
+        self._ray_segments = np.zeros((2 * len(self.ray_mirrors), 2, 3))
+        self.rays = Line3DCollection(self._ray_segments, colors="gold", linewidths=0.5)
+        if len(self.ray_mirrors):
+            ax.add_collection3d(self.rays)
+
+        low, high = state.position.min(axis=0), state.position.max(axis=0)
+        if self.target is not None:
+            low, high = np.minimum(low, self.target), np.maximum(high, self.target)
+        ax.set_xlim(low[0], high[0])
+        ax.set_ylim(low[1], high[1])
+        ax.set_zlim(0, max(high[2], 1.0))
+        ax.set_box_aspect((high[0] - low[0], high[1] - low[1], max(high[2], 1.0)))
+
+        self._connection = ax.figure.canvas.mpl_connect("button_release_event", lambda event: self.refresh())
+        self.refresh(draw=False)
+
+    def _apparent_sizes(self):
+        """Returns the on-screen size in pixels of a mirror at every cluster centre and whether the centre is in view."""
+        projection = self.ax.get_proj()
+        half = self.mirror_size / 2
+        offsets = np.vstack([np.zeros(3), np.eye(3) * half])
+        points = (self.cluster_centers[:, None, :] + offsets[None]).reshape(-1, 3)
+        x, y, _ = proj3d.proj_transform(points[:, 0], points[:, 1], points[:, 2], projection)
+        pixels = self.ax.transData.transform(np.column_stack([x, y])).reshape(len(self.cluster_centers), 4, 2)
+
+        sizes = 2 * np.linalg.norm(pixels[:, 1:] - pixels[:, :1], axis=2).max(axis=1)
+        box = self.ax.bbox
+        margin = 0.05 * max(box.width, box.height)
+        in_view = (
+            (pixels[:, 0, 0] >= box.x0 - margin)
+            & (pixels[:, 0, 0] <= box.x1 + margin)
+            & (pixels[:, 0, 1] >= box.y0 - margin)
+            & (pixels[:, 0, 1] <= box.y1 + margin)
+        )
+        return sizes, in_view
+
+    def refresh(self, draw=True):
+        """Picks the level of every cluster for the current view and rebuilds the instanced geometry if it changed."""
+        sizes, in_view = self._apparent_sizes()
+        cluster_levels = np.where(
+            ~in_view,
+            levels.index("hidden"),
+            np.where(sizes >= self.quad_pixels, levels.index("quads"), levels.index("points")),
+        )
+
+        # The largest clusters on screen get facets first, within the budget
+        counts = np.bincount(self.labels, minlength=len(self.cluster_centers))
+        candidates = np.flatnonzero(in_view & (sizes >= self.facet_pixels))
+        candidates = candidates[np.argsort(-sizes[candidates])]
+        within_budget = np.cumsum(counts[candidates]) <= self.max_facet_mirrors
+        cluster_levels[candidates[within_budget]] = levels.index("facets")
+
+        if np.array_equal(cluster_levels, self.cluster_levels) and self.members:
+            return
+        self.cluster_levels = cluster_levels
+        mirror_levels = cluster_levels[self.labels]
+        self.members = {level: np.flatnonzero(mirror_levels == levels.index(level)) for level in levels[1:]}
+
+        points = self.state.position[self.members["points"]]
+        self.points.set_data_3d(points[:, 0], points[:, 1], points[:, 2])
+        self._fields = {
+            "quads": FacetedField(self._quad_layout, self.state.position[self.members["quads"]]),
+            "facets": FacetedField(self.layout, self.state.position[self.members["facets"]]),
+        }
+        self.update(draw=draw)
+
+    def update(self, draw=False):
+        """Rewrites the vertices of the quads, facets and rays in place from the current angles of the field."""
+        degrees = self.state.degrees + self.state.mount_offset
+        for level, artist in (("quads", self.quads), ("facets", self.facets)):
+            field = self._fields[level]
+            if len(field):
+                field.update(degrees[self.members[level]])
+            # The artist keeps a reference to the corner array of the field, nothing is copied
+            artist.set_verts(field.polygons)
+
+        if len(self.ray_mirrors):
+            mirrors = self.state.position[self.ray_mirrors]
+            normals = self.state.normal[self.ray_mirrors]
+            to_target = self.target - mirrors
+            to_target /= np.linalg.norm(to_target, axis=1, keepdims=True)
+            # The direction to the sun is the direction to the target mirrored at the normal
+            to_sun = 2 * np.sum(to_target * normals, axis=1, keepdims=True) * normals - to_target
+            self._ray_segments[0::2, 0] = mirrors + to_sun * self.ray_length
+            self._ray_segments[0::2, 1] = mirrors
+            self._ray_segments[1::2, 0] = mirrors
+            self._ray_segments[1::2, 1] = self.target
+            self.rays.set_segments(self._ray_segments)
+
+        if draw:
+            self.ax.figure.canvas.draw_idle()
+        return self.points, self.quads, self.facets, self.rays
+
+    def level_counts(self):
+        """Returns the number of mirrors drawn at every level."""
+        return {level: len(members) for level, members in self.members.items()}
+
+
+def animate_day(view, times, latitude, longitude, target, interval=50):
+    """
+    Animate the tracking of a field over a series of timestamps.
+
+    Every frame aims the field with `aim_field` and rewrites the artists of the view in place.
+
+    Parameters:
+        view (FieldView): The view of the field.
+        times (pd.DatetimeIndex): Timestamps of the frames. Naive times are taken as UTC.
+        latitude (float): Latitude of the field in decimal degrees.
+        longitude (float): Longitude of the field in decimal degrees.
+        target (np.array): The position of the destination.
+        interval (int): Delay between frames in milliseconds.
+
+    Returns:
+        FuncAnimation: The animation, keep a reference to it while it runs.
+    """
+    from matplotlib.animation import FuncAnimation
+
+    title = view.ax.set_title("")
+
+    def frame(time):
+        aim_field(view.state, time, latitude, longitude, target)
+        title.set_text(str(time))
+        return view.update() + (title,)
+
+    return FuncAnimation(view.ax.figure, frame, frames=times, interval=interval, blit=False)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import matplotlib
+    import pandas as pd
+
+    if "--show" not in sys.argv:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from field_state import FieldState
+
+    rng = np.random.default_rng(0)
+    n, target = 5000, np.array([0.0, 0.0, 150.0])
+    radius, angle = np.sqrt(rng.uniform(80**2, 700**2, n)), rng.uniform(-np.pi / 2, np.pi / 2, n)
+    state = FieldState.from_positions(np.column_stack([radius * np.sin(angle), radius * np.cos(angle), np.full(n, 3.0)]))
+    layout = FacetLayout.grid(rows=4, columns=5, facet_width=1.2, facet_height=1.0, gap=0.05, focal_length=300.0)
+
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection="3d")
+    view = FieldView(ax, state, layout, target=target, rays=20)
+    times = pd.date_range("2023-08-01 06:00", "2023-08-01 17:00", freq="10min")
+
+    if "--show" in sys.argv:
+        animation = animate_day(view, times, -33.8352, 18.6510, target)
+        plt.show()
+    else:
+        for zoom in (None, (-120, 120, 0, 200), (-30, 30, 80, 140)):
+            if zoom is not None:
+                ax.set_xlim(zoom[0], zoom[1])
+                ax.set_ylim(zoom[2], zoom[3])
+                ax.set_zlim(0, 30)
+                ax.set_box_aspect((1, 1, 0.2))
+            fig.canvas.draw()
+            view.refresh(draw=False)
+
+            start = time.perf_counter()
+            for t in times:
+                aim_field(state, t, -33.8352, 18.6510, target)
+                view.update()
+                fig.canvas.draw()
+            elapsed = (time.perf_counter() - start) / len(times)
+            print(f"{view.level_counts()}: {1 / elapsed:.1f} frames per second")
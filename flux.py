@@ -0,0 +1,272 @@
+from types import SimpleNamespace
+
+import numpy as np
+from scipy.special import erf
+
+import helioc  # noqa
+from helioc.math_functions import euclidean_distance_batch, get_normal_vector_batch
+
+
+class Receiver:
+    """
+    Flat rectangular receiver divided into a grid of pixels.
+
+    The pixel grid is spanned by the horizontal axis `u` and the axis `v`, which
+    points upwards for a vertical receiver. Both run through `center`, so a point of
+    the receiver is center + u * axis_u + v * axis_v.
+
+    Parameters:
+        center (np.array): Position of the centre of the receiver.
+        normal (np.array): Normal of the receiving side, pointing towards the field.
+        width (float): Extent along u in meters.
+        height (float): Extent along v in meters.
+        shape (tuple): Number of pixels along v and u.
+    """
+
+    def __init__(self, center, normal, width, height, shape=(100, 100)):
+        self.center = np.asarray(center, dtype=np.float64)
+        self.normal = np.asarray(normal, dtype=np.float64) / np.linalg.norm(normal)
+        self.width = width
+        self.height = height
+        self.shape = tuple(shape)
+
+        axis_u = np.cross([0.0, 0.0, 1.0], self.normal)
+        if np.linalg.norm(axis_u) < 1e-9:
+            # A horizontal receiver, e.g. a beam-down target
+            axis_u = np.array([1.0, 0.0, 0.0])
+        self.axis_u = axis_u / np.linalg.norm(axis_u)
+        self.axis_v = np.cross(self.normal, self.axis_u)
+
+        self.edges_v = np.linspace(-height / 2, height / 2, self.shape[0] + 1)
+        self.edges_u = np.linspace(-width / 2, width / 2, self.shape[1] + 1)
+
+    @property
+    def pixel_area(self):
+        return (self.width / self.shape[1]) * (self.height / self.shape[0])
+
+    def coordinates(self, points):
+        """Returns the (..., 2) u and v coordinates of points projected onto the receiver plane."""
+        offsets = np.asarray(points, dtype=np.float64) - self.center
+        return np.stack([offsets @ self.axis_u, offsets @ self.axis_v], axis=-1)
+
+    def points(self, u, v):
+        """Returns the (..., 3) positions of receiver coordinates."""
+        return self.center + np.multiply.outer(u, self.axis_u) + np.multiply.outer(v, self.axis_v)
+
+
+def atmospheric_attenuation(slant_range):
+    """
+    Fraction of the reflected power that reaches the receiver over a slant range in
+    meters, with the clear day (23 km visibility) fit of Vittitoe and Biggs.
+    """
+    slant_range = np.asarray(slant_range, dtype=np.float64)
+    return np.where(
+        slant_range <= 1000,
+        0.99321 - 0.0001176 * slant_range + 1.97e-8 * slant_range**2,
+        np.exp(-0.0001106 * slant_range),
+    )
+
+
+def mirror_images(
+    positions,
+    sun_degrees_azimuth,
+    sun_degrees_elevation,
+    receiver,
+    aim_points=None,
+    mirror_area=4.0,
+    mirror_size=None,
+    focal_lengths=None,
+    dni=1000.0,
+    reflectivity=0.9,
+    sun_shape=2.51e-3,
+    slope_error=2e-3,
+    tracking_error=0.6e-3,
+):
+    """
+    Approximate the image of every mirror on the receiver as a Gaussian, following HFLCAL.
+
+    Every mirror is assumed to track its aim point perfectly on average. The width of
+    its image perpendicular to the beam is the slant range times the combined angular
+    spread of the sun shape, the slope error and the tracking error, both doubled by
+    the reflection, and the astigmatism of an off-axis spherical mirror after Collado.
+    On the tilted receiver plane the image stretches by the obliquity of the beam. The
+    cross term of that stretch is dropped, so that the image stays separable in u and
+    v, see `image_profiles`, and the widths are exact when the beam lies in the u or v
+    plane through the receiver normal.
+
+    Parameters:
+        positions (np.array): (n, 3) positions of the mirrors.
+        sun_degrees_azimuth (float): The azimuth angle of the sun in degrees.
+        sun_degrees_elevation (float): The elevation angle of the sun in degrees.
+        receiver (Receiver): The receiver.
+        aim_points (np.array): (n, 3) or (3,) aim points on the receiver, defaults to its centre.
+        mirror_area (float or np.array): Reflective area of the mirrors in square meters.
+        mirror_size (float or np.array): Edge length of the mirrors in meters, defaults to
+            the square root of the area.
+        focal_lengths (float or np.array): Focal lengths of the mirrors in meters, defaults
+            to their slant ranges, i.e. every mirror focused on the receiver.
+        dni (float): Direct normal irradiance in W/m^2.
+        reflectivity (float or np.array): Reflectivity of the mirrors.
+        sun_shape (float): Standard deviation of the sun shape in radians.
+        slope_error (float or np.array): Standard deviation of the mirror slopes in radians.
+        tracking_error (float or np.array): Standard deviation of the mirror normals in radians.
+
+    Returns:
+        SimpleNamespace: Arrays of shape (n,): power (W arriving at the receiver plane),
+            u and v (aim point coordinates), sigma_u and sigma_v (image widths on the
+            receiver in meters), slant_range, cos_incidence (on the mirror),
+            cos_receiver (of the beam on the receiver) and attenuation.
+    """
+    positions = np.atleast_2d(np.asarray(positions, dtype=np.float64))
+    n = len(positions)
+    aim_points = np.broadcast_to(
+        receiver.center if aim_points is None else np.asarray(aim_points, dtype=np.float64), (n, 3)
+    )
+
+    slant_range = euclidean_distance_batch(positions, np.ascontiguousarray(aim_points))
+    beams = (aim_points - positions) / slant_range[:, None]
+    # The sun ray of get_sunray is the negative of get_normal_vector for the same angles
+    to_sun = get_normal_vector_batch([[sun_degrees_azimuth, sun_degrees_elevation]])[0]
+    # Half the length of the sum of two unit vectors is the cosine of half their angle
+    cos_incidence = np.linalg.norm(to_sun + beams, axis=1) / 2
+    cos_receiver = -beams @ receiver.normal
+    attenuation = atmospheric_attenuation(slant_range)
+
+    size = np.sqrt(mirror_area) if mirror_size is None else mirror_size
+    focal_lengths = slant_range if focal_lengths is None else focal_lengths
+    # Collado's image sizes H_t = d |D / f cos(e) - 1| and W_s = d |D / f - cos(e)|
+    tangential = size * np.abs(slant_range / focal_lengths * cos_incidence - 1)
+    sagittal = size * np.abs(slant_range / focal_lengths - cos_incidence)
+    astigmatism = np.sqrt(0.5 * (sagittal**2 + tangential**2)) / (4 * slant_range)
+    sigma = slant_range * np.sqrt(
+        sun_shape**2 + (2 * slope_error) ** 2 + (2 * tracking_error) ** 2 + astigmatism**2
+    )
+
+    # A Gaussian of width sigma across the beam, seen on the receiver plane
+    beam_u, beam_v = beams @ receiver.axis_u, beams @ receiver.axis_v
+    sigma_u = sigma / np.sqrt(np.maximum(1 - beam_u**2, 1e-12))
+    sigma_v = sigma / np.sqrt(np.maximum(1 - beam_v**2, 1e-12))
+
+    visible = (cos_receiver > 0) & (sun_degrees_elevation > 0)
+    power = np.where(
+        visible, dni * mirror_area * cos_incidence * reflectivity * attenuation, 0.0
+    )
+
+    coordinates = receiver.coordinates(aim_points)
+    return SimpleNamespace(
+        power=power,
+        u=coordinates[:, 0],
+        v=coordinates[:, 1],
+        sigma_u=sigma_u,
+        sigma_v=sigma_v,
+        slant_range=slant_range,
+        cos_incidence=cos_incidence,
+        cos_receiver=cos_receiver,
+        attenuation=attenuation,
+    )
+
+
+def profile(edges, centers, sigmas):
+    """
+    Calculate the densities of unit Gaussians at the pixel centres between `edges`.
+
+    Parameters:
+        edges (np.array): Pixel edges along one receiver axis, in m.
+        centers (np.array): Centres of the n Gaussians, in m.
+        sigmas (np.array): Standard deviations of the n Gaussians, in m.
+
+    Returns:
+        np.array: (n, pixels) densities in 1/m, in single precision.
+    """
+    sigmas = sigmas.astype(np.float32)[:, None]
+    pixel_centers = ((edges[1:] + edges[:-1]) / 2).astype(np.float32)
+    z = (pixel_centers[None, :] - centers.astype(np.float32)[:, None]) / sigmas
+    return np.exp(-0.5 * z * z) / (np.float32(np.sqrt(2 * np.pi)) * sigmas)
+
+
+def image_profiles(images, receiver, indices=None):
+    """
+    Calculate the separable factors of the mirror images on the receiver grid.
+
+    The flux of mirror i on pixel (j, k) is power[i] * profile_v[i, j] * profile_u[i, k],
+    so the flux of the whole field is a single matrix product. The profiles are
+    sampled at the pixel centres in single precision, which is accurate while the
+    images are wider than a pixel.
+
+    Parameters:
+        images (SimpleNamespace): Images from `mirror_images`.
+        receiver (Receiver): The receiver.
+        indices (np.array): Mirrors to compute, defaults to all.
+
+    Returns:
+        tuple: (n, rows) profiles along v and (n, columns) profiles along u, in 1/m.
+    """
+    select = slice(None) if indices is None else indices
+    return (
+        profile(receiver.edges_v, images.v[select], images.sigma_v[select]),
+        profile(receiver.edges_u, images.u[select], images.sigma_u[select]),
+    )
+
+
+def flux_map(images, receiver, profiles=None):
+    """
+    Sum the images of all mirrors on the receiver grid.
+
+    Parameters:
+        images (SimpleNamespace): Images from `mirror_images`.
+        receiver (Receiver): The receiver.
+        profiles (tuple): Profiles from `image_profiles`, computed if not given.
+
+    Returns:
+        np.array: Flux density in W/m^2 of shape receiver.shape at the pixel centres.
+    """
+    profile_v, profile_u = image_profiles(images, receiver) if profiles is None else profiles
+    weighted = profile_v * images.power.astype(np.float32)[:, None]
+    return (weighted.T @ profile_u).astype(np.float64)
+
+
+def intercepts(images, receiver):
+    """Returns the (n,) fraction of the power of every mirror that lands on the receiver."""
+
+    def inside(low, high, centers, sigmas):
+        return (erf((high - centers) / (np.sqrt(2) * sigmas)) - erf((low - centers) / (np.sqrt(2) * sigmas))) / 2
+
+    return inside(receiver.edges_u[0], receiver.edges_u[-1], images.u, images.sigma_u) * inside(
+        receiver.edges_v[0], receiver.edges_v[-1], images.v, images.sigma_v
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    from field_state import FieldState
+
+    rng = np.random.default_rng(0)
+    n = 10_000
+    radius, angle = np.sqrt(rng.uniform(100**2, 800**2, n)), rng.uniform(-np.pi / 3, np.pi / 3, n)
+    state = FieldState.from_positions(np.column_stack([radius * np.sin(angle), radius * np.cos(angle), np.zeros(n)]))
+    receiver = Receiver([0, 0, 150], [0, 1, -0.3], width=20, height=20, shape=(100, 100))
+
+    images = mirror_images(state.position, 0.0, 45.0, receiver, mirror_area=10.0)
+    flux = flux_map(images, receiver)
+    best = np.inf
+    for _ in range(10):
+        start = time.perf_counter()
+        images = mirror_images(state.position, 0.0, 45.0, receiver, mirror_area=10.0)
+        profiles = image_profiles(images, receiver)
+        flux = flux_map(images, receiver, profiles)
+        best = min(best, time.perf_counter() - start)
+
+    on_receiver = flux.sum() * receiver.pixel_area
+    print(f"{n} mirrors on a {receiver.shape} grid in {best * 1e3:.1f} ms")
+    print(f"power {images.power.sum() / 1e6:.1f} MW, on the receiver {on_receiver / 1e6:.1f} MW")
+    print(f"intercept {np.average(intercepts(images, receiver), weights=images.power):.3f}")
+    print(f"peak flux {flux.max() / 1e3:.0f} kW/m^2")
+
+    # Without optical errors a flat mirror casts an image of about its own size, four
+    # standard deviations wide, and a focused one a point at normal incidence
+    flat = mirror_images(
+        state.position, 0.0, 45.0, receiver, mirror_area=10.0, focal_lengths=1e9, sun_shape=0, slope_error=0, tracking_error=0
+    )
+    width = 4 * np.minimum(flat.sigma_u, flat.sigma_v) / np.sqrt(10.0)
+    print(f"flat mirrors: image width {width.min():.2f} to {width.max():.2f} mirror sizes")
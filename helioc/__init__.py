@@ -1,3 +1,6 @@
 import ctypes as _ctypes
 from . import math_functions
-from . import solar_position
\ No newline at end of file
+from . import solar_position
+from . import spa
+from . import trig
+from ._profiling import stats, reset_stats, print_stats, set_profiling, is_profiling
\ No newline at end of file
@@ -0,0 +1,69 @@
+import os as _os
+
+_enabled = False
+_functions = []
+_stats = {}
+
+
+def register(function, profiled_function):
+    _functions.append((function, function.__code__, profiled_function.__code__))
+    if _enabled:
+        function.__code__ = profiled_function.__code__
+
+
+def record(name, prepare_seconds, native_seconds):
+    entry = _stats.get(name)
+    if entry is None:
+        entry = _stats[name] = [0, 0.0, 0.0]
+    entry[0] += 1
+    entry[1] += prepare_seconds
+    entry[2] += native_seconds
+
+
+def set_profiling(enabled=True):
+    """
+    Switches the helioc wrappers between the plain and the instrumented code. The
+    code object of each wrapper is swapped in place, so functions that were
+    imported by name are switched too and the plain code has no overhead at all.
+    """
+    global _enabled
+    _enabled = bool(enabled)
+    for function, plain_code, profiled_code in _functions:
+        function.__code__ = profiled_code if _enabled else plain_code
+
+
+def is_profiling():
+    return _enabled
+
+
+def stats(reset=False):
+    """
+    Returns the counters of every profiled function as
+    {name: {"calls": int, "prepare_seconds": float, "native_seconds": float}},
+    where prepare_seconds is the time spent marshalling arguments in Python and
+    native_seconds the time spent in the ctypes call.
+    """
+    result = {
+        name: {"calls": calls, "prepare_seconds": prepare, "native_seconds": native}
+        for name, (calls, prepare, native) in sorted(_stats.items())
+    }
+    if reset:
+        reset_stats()
+    return result
+
+
+def reset_stats():
+    _stats.clear()
+
+
+def print_stats(reset=False):
+    print(f"{'function':<40}{'calls':>12}{'prepare [s]':>14}{'native [s]':>14}{'us/call':>10}")
+    for name, entry in stats(reset).items():
+        total = entry["prepare_seconds"] + entry["native_seconds"]
+        print(
+            f"{name:<40}{entry['calls']:>12}{entry['prepare_seconds']:>14.6f}"
+            f"{entry['native_seconds']:>14.6f}{1e6 * total / entry['calls']:>10.2f}"
+        )
+
+
+set_profiling(_os.environ.get("HELIOC_PROFILE", "0") not in ("", "0"))
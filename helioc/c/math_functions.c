@@ -1,4 +1,5 @@
 #include "math_functions.h"
+#include "math_tier.h"
 #include <math.h>
 #include <stdio.h>
 
@@ -74,8 +75,8 @@ void get_degrees(double normal_vector[3], double *return_theta_deg, double *retu
 
     double normalized_normal_vector[3];
     normalize_vector(normal_vector, normalized_normal_vector);
-    double theta_rad = -asin(normalized_normal_vector[0]);
-    double phi_rad = -atan2(normalized_normal_vector[2], normalized_normal_vector[1]) - PI;
+    double theta_rad = -HELIOC_ASIN(normalized_normal_vector[0]);
+    double phi_rad = -HELIOC_ATAN2(normalized_normal_vector[2], normalized_normal_vector[1]) - PI;
     *return_theta_deg = to_180_form(to_degrees(theta_rad));
     *return_phi_deg = to_180_form(to_degrees(phi_rad));
 }
@@ -133,11 +134,16 @@ void rotation_matrix_3d(double theta_rad, double phi_rad, double return_matrix[3
 
     */
 
-    return_matrix[0][0] = cos(theta_rad);
-    return_matrix[0][1] = -sin(theta_rad);
+    double sin_theta = HELIOC_SIN(theta_rad);
+    double cos_theta = HELIOC_COS(theta_rad);
+    double sin_phi = HELIOC_SIN(phi_rad);
+    double cos_phi = HELIOC_COS(phi_rad);
+
+    return_matrix[0][0] = cos_theta;
+    return_matrix[0][1] = -sin_theta;
     return_matrix[0][2] = 0;
-    return_matrix[1][0] = sin(theta_rad);
-    return_matrix[1][1] = cos(theta_rad);
+    return_matrix[1][0] = sin_theta;
+    return_matrix[1][1] = cos_theta;
     return_matrix[1][2] = 0;
     return_matrix[2][0] = 0;
     return_matrix[2][1] = 0;
@@ -145,8 +151,8 @@ void rotation_matrix_3d(double theta_rad, double phi_rad, double return_matrix[3
 
     double R_phi[3][3] = {
         {1, 0, 0},
-        {0, cos(phi_rad), -sin(phi_rad)},
-        {0, sin(phi_rad), cos(phi_rad)}
+        {0, cos_phi, -sin_phi},
+        {0, sin_phi, cos_phi}
     };
 
     // Matrix multiplication
@@ -271,3 +277,104 @@ double euclidean_vector_distance(double vector1[3], double vector2[3]) {
     normalize_vector(vector2, normalize_vector2);
     return euclidean_distance(normalize_vector1, normalize_vector2);
 }
+
+void get_degrees_batch(const double (*normal_vectors)[3], double (*return_degrees)[2], int n) {
+    /*
+    Gets the theta and phi angles in degrees for every normal vector, see get_degrees.
+
+    Args:
+        normal_vectors: (n, 3) normal vectors.
+        n: Number of normal vectors, inferred from normal_vectors by the Python wrapper.
+
+    Returns:
+        return_degrees: (n, 2) theta and phi angles in degrees.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        double normal_vector[3] = {normal_vectors[i][0], normal_vectors[i][1], normal_vectors[i][2]};
+        get_degrees(normal_vector, &return_degrees[i][0], &return_degrees[i][1]);
+    }
+}
+
+void get_normal_vector_batch(const double (*degrees)[2], double (*return_normals)[3], int n) {
+    /*
+    Computes the normal vector for every pair of degrees from north and degrees elevation,
+    see get_normal_vector.
+
+    Args:
+        degrees: (n, 2) degrees from north and degrees elevation.
+        n: Number of rows, inferred from degrees by the Python wrapper.
+
+    Returns:
+        return_normals: (n, 3) normal vectors.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        get_normal_vector(degrees[i][0], degrees[i][1], return_normals[i]);
+    }
+}
+
+void euclidean_distance_batch(const double (*vectors1)[3], const double (*vectors2)[3], double *return_distances, int n) {
+    /*
+    Calculates the Euclidean distance between every pair of points, see euclidean_distance.
+
+    Args:
+        vectors1: (n, 3) coordinates of the first points.
+        vectors2: (n, 3) coordinates of the second points.
+        n: Number of pairs, inferred from vectors1 by the Python wrapper.
+
+    Returns:
+        return_distances: (n,) distances between the points.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        double vector1[3] = {vectors1[i][0], vectors1[i][1], vectors1[i][2]};
+        double vector2[3] = {vectors2[i][0], vectors2[i][1], vectors2[i][2]};
+        return_distances[i] = euclidean_distance(vector1, vector2);
+    }
+}
+
+void rotation_matrix_3d_batch(const double (*angles_rad)[2], double (*return_matrices)[3][3], int n) {
+    /*
+    Calculates the 3D rotation matrix for every pair of theta and phi angles in radians,
+    see rotation_matrix_3d.
+
+    Args:
+        angles_rad: (n, 2) theta and phi angles in radians.
+        n: Number of rows, inferred from angles_rad by the Python wrapper.
+
+    Returns:
+        return_matrices: (n, 3, 3) rotation matrices.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        rotation_matrix_3d(angles_rad[i][0], angles_rad[i][1], return_matrices[i]);
+    }
+}
+
+void closest_point_distance_batch(const double (*points)[3], const double (*midpoints)[3], const double (*directions)[3], double *return_distances, int n) {
+    /*
+    Computes the distance between every point and its line, see closest_point_distance.
+
+    Args:
+        points: (n, 3) points in 3D space.
+        midpoints: (n, 3) points on the lines.
+        directions: (n, 3) direction vectors of the lines.
+        n: Number of points, inferred from points by the Python wrapper.
+
+    Returns:
+        return_distances: (n,) distances between the points and the lines.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        double point[3] = {points[i][0], points[i][1], points[i][2]};
+        double midpoint[3] = {midpoints[i][0], midpoints[i][1], midpoints[i][2]};
+        double direction[3] = {directions[i][0], directions[i][1], directions[i][2]};
+        return_distances[i] = closest_point_distance(point, midpoint, direction);
+    }
+}
@@ -0,0 +1,136 @@
+#ifndef MATH_TIER_H
+#define MATH_TIER_H
+
+// Accuracy tiers of the trigonometric functions used by the helioc kernels, chosen at
+// build time with -DHELIOC_MATH_TIER=<tier>, see compile.py:
+//
+//   0 (exact):  libm.
+//   1 (fast):   polynomials, absolute error below 5e-8 for sin, cos, asin, atan and atan2.
+//   2 (coarse): polynomials, absolute error below 5e-5 for sin, cos, asin, atan and atan2.
+//
+// The bounds hold over the whole domain, up to |x| < 1e6 radians for sin and cos, and are
+// checked by math_tiers.py. tan is sin / cos, its error is bounded as an angle instead.
+// The SPA sums hundreds of periodic terms, so the coarse tier costs it up to about a degree.
+
+#include <math.h>
+
+#ifndef HELIOC_MATH_TIER
+#define HELIOC_MATH_TIER 0
+#endif
+
+#if HELIOC_MATH_TIER == 0
+
+#define HELIOC_SIN(x) sin(x)
+#define HELIOC_COS(x) cos(x)
+#define HELIOC_TAN(x) tan(x)
+#define HELIOC_ASIN(x) asin(x)
+#define HELIOC_ATAN(x) atan(x)
+#define HELIOC_ATAN2(y, x) atan2(y, x)
+
+#else
+
+#define TIER_PI 3.14159265358979323846
+#define TIER_TWO_OVER_PI 0.63661977236758134308
+// pi / 2 split into a part with 33 significant bits and the rest (Cody-Waite reduction)
+#define TIER_PIO2_HI 1.57079632673412561417e+00
+#define TIER_PIO2_LO 6.07710050650619224932e-11
+// Adding and subtracting 1.5 * 2^52 rounds a double below 2^51 to the nearest integer
+#define TIER_ROUND 6755399441055744.0
+
+// Near-minimax polynomials, sin(r) = r * P(r^2) and cos(r) = Q(r^2) on |r| <= pi / 4 and
+// atan(t) = t * R(t^2) on |t| <= 1, fitted with NumPy and verified by math_tiers.py
+static inline double tier_sin_poly(double r) {
+    double r2 = r * r;
+#if HELIOC_MATH_TIER == 1
+    return r * (0.9999999736495255 + r2 * (-0.16666622302264197 + r2 * (0.008331140605416865 +
+                r2 * -0.00019422169095830122)));
+#else
+    return r * (0.9999896975152384 + r2 * (-0.16656451427977895 + r2 * 0.00807352342597784));
+#endif
+}
+
+static inline double tier_cos_poly(double r) {
+    double r2 = r * r;
+#if HELIOC_MATH_TIER == 1
+    return 0.9999999998580101 + r2 * (-0.49999999292948966 + r2 * (0.0416665938758329 +
+           r2 * (-0.0013886064832565337 + r2 * 2.43367482128471e-05)));
+#else
+    return 0.9999722233632145 + r2 * (-0.4995524507569654 + r2 * 0.040168731387298255);
+#endif
+}
+
+static inline double tier_atan_poly(double t) {
+    double t2 = t * t;
+#if HELIOC_MATH_TIER == 1
+    return t * (0.9999997281461521 + t2 * (-0.33331960400513794 + t2 * (0.19977829407800662 +
+           t2 * (-0.14113577527213775 + t2 * (0.10346968208152818 + t2 * (-0.06956614011128907 +
+           t2 * (0.036857165245752 + t2 * (-0.012761945796242995 + t2 * 0.002076759207035052))))))));
+#else
+    return t * (0.999736257690344 + t2 * (-0.3287975791667437 + t2 * (0.1750877136764497 +
+           t2 * (-0.07864885634564979 + t2 * 0.018021127106098423))));
+#endif
+}
+
+// Both polynomials are evaluated and selected by quadrant without branches
+static inline void tier_sincos(double x, double *s, double *c) {
+    double k = (x * TIER_TWO_OVER_PI + TIER_ROUND) - TIER_ROUND;
+    double r = (x - k * TIER_PIO2_HI) - k * TIER_PIO2_LO;
+    double sr = tier_sin_poly(r);
+    double cr = tier_cos_poly(r);
+    int quadrant = (int)((long long)k & 3);
+
+    double sin_x = (quadrant & 1) ? cr : sr;
+    double cos_x = (quadrant & 1) ? sr : cr;
+    *s = (quadrant & 2) ? -sin_x : sin_x;
+    *c = ((quadrant + 1) & 2) ? -cos_x : cos_x;
+}
+
+static inline double tier_sin(double x) {
+    double s, c;
+    tier_sincos(x, &s, &c);
+    return s;
+}
+
+static inline double tier_cos(double x) {
+    double s, c;
+    tier_sincos(x, &s, &c);
+    return c;
+}
+
+static inline double tier_tan(double x) {
+    double s, c;
+    tier_sincos(x, &s, &c);
+    return s / c;
+}
+
+// Reduced to the first octant with a single division, then mirrored back
+static inline double tier_atan2(double y, double x) {
+    double ax = fabs(x);
+    double ay = fabs(y);
+    double high = ax > ay ? ax : ay;
+    double low = ax > ay ? ay : ax;
+
+    double r = tier_atan_poly(high > 0 ? low / high : 0.0);
+    r = ay > ax ? TIER_PI / 2.0 - r : r;
+    r = x < 0 ? TIER_PI - r : r;
+    return y < 0 ? -r : r;
+}
+
+static inline double tier_atan(double x) {
+    return tier_atan2(x, 1.0);
+}
+
+static inline double tier_asin(double x) {
+    return tier_atan2(x, sqrt((1.0 - x) * (1.0 + x)));
+}
+
+#define HELIOC_SIN(x) tier_sin(x)
+#define HELIOC_COS(x) tier_cos(x)
+#define HELIOC_TAN(x) tier_tan(x)
+#define HELIOC_ASIN(x) tier_asin(x)
+#define HELIOC_ATAN(x) tier_atan(x)
+#define HELIOC_ATAN2(y, x) tier_atan2(y, x)
+
+#endif
+
+#endif // MATH_TIER_H
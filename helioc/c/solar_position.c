@@ -1,5 +1,10 @@
 #include "solar_position.h"
+#include "math_tier.h"
 #include <math.h>
+
+#define PI 3.14159265358979323846
+#define DEG_TO_RAD (PI / 180.0)
+#define RAD_TO_DEG (180.0 / PI)
 #include <stdio.h>
 
 double julian_day(int year, int month, int day, int hour, int min, int sec) {
@@ -55,7 +60,6 @@ void solar_az_el(int year, int month, int day, int hour, int min, int sec, doubl
         
     */
 
-    double pi = 3.14159265358979323846;
     double jd = julian_day(year, month, day, hour, min, sec);
     double d = jd - 2451543.5;
 
@@ -65,40 +69,47 @@ void solar_az_el(int year, int month, int day, int hour, int min, int sec, doubl
 
     double l = w + m;
     double oblecl = 23.4393 - 3.563e-7 * d;
-    double e_angle = m + (180 / pi) * e * sin(m * (pi / 180)) * (1 + e * cos(m * (pi / 180)));
+    double m_rad = m * DEG_TO_RAD;
+    double e_angle = m + RAD_TO_DEG * e * HELIOC_SIN(m_rad) * (1 + e * HELIOC_COS(m_rad));
 
-    double x = cos(e_angle * (pi / 180)) - e;
-    double y = sin(e_angle * (pi / 180)) * sqrt(1 - pow(e, 2));
-    double r = sqrt(pow(x, 2) + pow(y, 2));
-    double v = atan2(y, x) * (180 / pi);
-    double lon_angle = v + w;
+    double e_angle_rad = e_angle * DEG_TO_RAD;
+    double x = HELIOC_COS(e_angle_rad) - e;
+    double y = HELIOC_SIN(e_angle_rad) * sqrt(1 - e * e);
+    double r = sqrt(x * x + y * y);
+    double v = HELIOC_ATAN2(y, x) * RAD_TO_DEG;
+    double lon_angle_rad = (v + w) * DEG_TO_RAD;
 
-    double xeclip = r * cos(lon_angle * (pi / 180));
-    double yeclip = r * sin(lon_angle * (pi / 180));
-    double zeclip = 0.0;
+    double xeclip = r * HELIOC_COS(lon_angle_rad);
+    double yeclip = r * HELIOC_SIN(lon_angle_rad);
 
+    // The ecliptic z is zero. The z of the equatorial coordinates uses the obliquity at J2000.
     double xequat = xeclip;
-    double yequat = yeclip * cos(oblecl * (pi / 180)) + zeclip * sin(oblecl * (pi / 180));
-    double zequat = yeclip * sin(23.4406 * (pi / 180)) + zeclip * cos(oblecl * (pi / 180));
+    double yequat = yeclip * HELIOC_COS(oblecl * DEG_TO_RAD);
+    double zequat = yeclip * HELIOC_SIN(23.4406 * DEG_TO_RAD);
 
-    r = sqrt(pow(xequat, 2) + pow(yequat, 2) + pow(zequat, 2)) - (alt / 149598000);
-    double ra = atan2(yequat, xequat) * (180 / pi);
-    double delta = asin(zequat / r) * (180 / pi);
+    r = sqrt(xequat * xequat + yequat * yequat + zequat * zequat) - (alt / 149598000);
+    double ra = HELIOC_ATAN2(yequat, xequat) * RAD_TO_DEG;
+    double delta_rad = HELIOC_ASIN(zequat / r);
 
     double uth = (double)hour + (double)min / 60.0 + (double)sec / 3600.0;
     double gmst0 = fmod(l + 180, 360.0) / 15;
     double sidtime = gmst0 + uth + lon / 15;
 
-    double ha = (sidtime * 15 - ra);
+    double ha_rad = (sidtime * 15 - ra) * DEG_TO_RAD;
+    double cos_delta = HELIOC_COS(delta_rad);
+
+    x = HELIOC_COS(ha_rad) * cos_delta;
+    y = HELIOC_SIN(ha_rad) * cos_delta;
+    double z = HELIOC_SIN(delta_rad);
 
-    x = cos(ha * (pi / 180)) * cos(delta * (pi / 180));
-    y = sin(ha * (pi / 180)) * cos(delta * (pi / 180));
-    double z = sin(delta * (pi / 180));
+    double colat_rad = (90 - lat) * DEG_TO_RAD;
+    double sin_colat = HELIOC_SIN(colat_rad);
+    double cos_colat = HELIOC_COS(colat_rad);
 
-    double xhor = x * cos((90 - lat) * (pi / 180)) - z * sin((90 - lat) * (pi / 180));
+    double xhor = x * cos_colat - z * sin_colat;
     double yhor = y;
-    double zhor = x * sin((90 - lat) * (pi / 180)) + z * cos((90 - lat) * (pi / 180));
+    double zhor = x * sin_colat + z * cos_colat;
 
-    *return_az = atan2(yhor, xhor) * (180 / pi) + 180;
-    *return_el = asin(zhor) * (180 / pi);
+    *return_az = HELIOC_ATAN2(yhor, xhor) * RAD_TO_DEG + 180;
+    *return_el = HELIOC_ASIN(zhor) * RAD_TO_DEG;
 }
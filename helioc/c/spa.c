@@ -0,0 +1,748 @@
+#include "spa.h"
+#include "math_tier.h"
+#include <math.h>
+#include <stdio.h>
+
+#define PI 3.14159265358979323846
+#define DEG_TO_RAD (PI / 180.0)
+#define RAD_TO_DEG (180.0 / PI)
+
+// NREL Solar Position Algorithm, I. Reda and A. Andreas, "Solar Position Algorithm for Solar
+// Radiation Applications", NREL/TP-560-34302, 2008. Valid from the year -2000 to 6000 with
+// an uncertainty of +/- 0.0003 degrees.
+
+// Earth periodic terms (A, B, C) of L0..L5, B0..B1 and R0..R4, see table A4.2 of the SPA report
+static const double SPA_EARTH_TERMS[195][3] = {
+    // L0
+    {175347046.0, 0.0, 0.0},
+    {3341656.0, 4.6692568, 6283.07585},
+    {34894.0, 4.6261, 12566.1517},
+    {3497.0, 2.7441, 5753.3849},
+    {3418.0, 2.8289, 3.5231},
+    {3136.0, 3.6277, 77713.7715},
+    {2676.0, 4.4181, 7860.4194},
+    {2343.0, 6.1352, 3930.2097},
+    {1324.0, 0.7425, 11506.7698},
+    {1273.0, 2.0371, 529.691},
+    {1199.0, 1.1096, 1577.3435},
+    {990.0, 5.233, 5884.927},
+    {902.0, 2.045, 26.298},
+    {857.0, 3.508, 398.149},
+    {780.0, 1.179, 5223.694},
+    {753.0, 2.533, 5507.553},
+    {505.0, 4.583, 18849.228},
+    {492.0, 4.205, 775.523},
+    {357.0, 2.92, 0.067},
+    {317.0, 5.849, 11790.629},
+    {284.0, 1.899, 796.298},
+    {271.0, 0.315, 10977.079},
+    {243.0, 0.345, 5486.778},
+    {206.0, 4.806, 2544.314},
+    {205.0, 1.869, 5573.143},
+    {202.0, 2.458, 6069.777},
+    {156.0, 0.833, 213.299},
+    {132.0, 3.411, 2942.463},
+    {126.0, 1.083, 20.775},
+    {115.0, 0.645, 0.98},
+    {103.0, 0.636, 4694.003},
+    {102.0, 0.976, 15720.839},
+    {102.0, 4.267, 7.114},
+    {99.0, 6.21, 2146.17},
+    {98.0, 0.68, 155.42},
+    {86.0, 5.98, 161000.69},
+    {85.0, 1.3, 6275.96},
+    {85.0, 3.67, 71430.7},
+    {80.0, 1.81, 17260.15},
+    {79.0, 3.04, 12036.46},
+    {75.0, 1.76, 5088.63},
+    {74.0, 3.5, 3154.69},
+    {74.0, 4.68, 801.82},
+    {70.0, 0.83, 9437.76},
+    {62.0, 3.98, 8827.39},
+    {61.0, 1.82, 7084.9},
+    {57.0, 2.78, 6286.6},
+    {56.0, 4.39, 14143.5},
+    {56.0, 3.47, 6279.55},
+    {52.0, 0.19, 12139.55},
+    {52.0, 1.33, 1748.02},
+    {51.0, 0.28, 5856.48},
+    {49.0, 0.49, 1194.45},
+    {41.0, 5.37, 8429.24},
+    {41.0, 2.4, 19651.05},
+    {39.0, 6.17, 10447.39},
+    {37.0, 6.04, 10213.29},
+    {37.0, 2.57, 1059.38},
+    {36.0, 1.71, 2352.87},
+    {36.0, 1.78, 6812.77},
+    {33.0, 0.59, 17789.85},
+    {30.0, 0.44, 83996.85},
+    {30.0, 2.74, 1349.87},
+    {25.0, 3.16, 4690.48},
+    // L1
+    {628331966747.0, 0.0, 0.0},
+    {206059.0, 2.678235, 6283.07585},
+    {4303.0, 2.6351, 12566.1517},
+    {425.0, 1.59, 3.523},
+    {119.0, 5.796, 26.298},
+    {109.0, 2.966, 1577.344},
+    {93.0, 2.59, 18849.23},
+    {72.0, 1.14, 529.69},
+    {68.0, 1.87, 398.15},
+    {67.0, 4.41, 5507.55},
+    {59.0, 2.89, 5223.69},
+    {56.0, 2.17, 155.42},
+    {45.0, 0.4, 796.3},
+    {36.0, 0.47, 775.52},
+    {29.0, 2.65, 7.11},
+    {21.0, 5.34, 0.98},
+    {19.0, 1.85, 5486.78},
+    {19.0, 4.97, 213.3},
+    {17.0, 2.99, 6275.96},
+    {16.0, 0.03, 2544.31},
+    {16.0, 1.43, 2146.17},
+    {15.0, 1.21, 10977.08},
+    {12.0, 2.83, 1748.02},
+    {12.0, 3.26, 5088.63},
+    {12.0, 5.27, 1194.45},
+    {12.0, 2.08, 4694.0},
+    {11.0, 0.77, 553.57},
+    {10.0, 1.3, 6286.6},
+    {10.0, 4.24, 1349.87},
+    {9.0, 2.7, 242.73},
+    {9.0, 5.64, 951.72},
+    {8.0, 5.3, 2352.87},
+    {6.0, 2.65, 9437.76},
+    {6.0, 4.67, 4690.48},
+    // L2
+    {52919.0, 0.0, 0.0},
+    {8720.0, 1.0721, 6283.0758},
+    {309.0, 0.867, 12566.152},
+    {27.0, 0.05, 3.52},
+    {16.0, 5.19, 26.3},
+    {16.0, 3.68, 155.42},
+    {10.0, 0.76, 18849.23},
+    {9.0, 2.06, 77713.77},
+    {7.0, 0.83, 775.52},
+    {5.0, 4.66, 1577.34},
+    {4.0, 1.03, 7.11},
+    {4.0, 3.44, 5573.14},
+    {3.0, 5.14, 796.3},
+    {3.0, 6.05, 5507.55},
+    {3.0, 1.19, 242.73},
+    {3.0, 6.12, 529.69},
+    {3.0, 0.31, 398.15},
+    {3.0, 2.28, 553.57},
+    {2.0, 4.38, 5223.69},
+    {2.0, 3.75, 0.98},
+    // L3
+    {289.0, 5.844, 6283.076},
+    {35.0, 0.0, 0.0},
+    {17.0, 5.49, 12566.15},
+    {3.0, 5.2, 155.42},
+    {1.0, 4.72, 3.52},
+    {1.0, 5.3, 18849.23},
+    {1.0, 5.97, 242.73},
+    // L4
+    {114.0, 3.142, 0.0},
+    {8.0, 4.13, 6283.08},
+    {1.0, 3.84, 12566.15},
+    // L5
+    {1.0, 3.14, 0.0},
+    // B0
+    {280.0, 3.199, 84334.662},
+    {102.0, 5.422, 5507.553},
+    {80.0, 3.88, 5223.69},
+    {44.0, 3.7, 2352.87},
+    {32.0, 4.0, 1577.34},
+    // B1
+    {9.0, 3.9, 5507.55},
+    {6.0, 1.73, 5223.69},
+    // R0
+    {100013989.0, 0.0, 0.0},
+    {1670700.0, 3.0984635, 6283.07585},
+    {13956.0, 3.05525, 12566.1517},
+    {3084.0, 5.1985, 77713.7715},
+    {1628.0, 1.1739, 5753.3849},
+    {1576.0, 2.8469, 7860.4194},
+    {925.0, 5.453, 11506.77},
+    {542.0, 4.564, 3930.21},
+    {472.0, 3.661, 5884.927},
+    {346.0, 0.964, 5507.553},
+    {329.0, 5.9, 5223.694},
+    {307.0, 0.299, 5573.143},
+    {243.0, 4.273, 11790.629},
+    {212.0, 5.847, 1577.344},
+    {186.0, 5.022, 10977.079},
+    {175.0, 3.012, 18849.228},
+    {110.0, 5.055, 5486.778},
+    {98.0, 0.89, 6069.78},
+    {86.0, 5.69, 15720.84},
+    {86.0, 1.27, 161000.69},
+    {65.0, 0.27, 17260.15},
+    {63.0, 0.92, 529.69},
+    {57.0, 2.01, 83996.85},
+    {56.0, 5.24, 71430.7},
+    {49.0, 3.25, 2544.31},
+    {47.0, 2.58, 775.52},
+    {45.0, 5.54, 9437.76},
+    {43.0, 6.01, 6275.96},
+    {39.0, 5.36, 4694.0},
+    {38.0, 2.39, 8827.39},
+    {37.0, 0.83, 19651.05},
+    {37.0, 4.9, 12139.55},
+    {36.0, 1.67, 12036.46},
+    {35.0, 1.84, 2942.46},
+    {33.0, 0.24, 7084.9},
+    {32.0, 0.18, 5088.63},
+    {32.0, 1.78, 398.15},
+    {28.0, 1.21, 6286.6},
+    {28.0, 1.9, 6279.55},
+    {26.0, 4.59, 10447.39},
+    // R1
+    {103019.0, 1.10749, 6283.07585},
+    {1721.0, 1.0644, 12566.1517},
+    {702.0, 3.142, 0.0},
+    {32.0, 1.02, 18849.23},
+    {31.0, 2.84, 5507.55},
+    {25.0, 1.32, 5223.69},
+    {18.0, 1.42, 1577.34},
+    {10.0, 5.91, 10977.08},
+    {9.0, 1.42, 6275.96},
+    {9.0, 0.27, 5486.78},
+    // R2
+    {4359.0, 5.7846, 6283.0758},
+    {124.0, 5.579, 12566.152},
+    {12.0, 3.14, 0.0},
+    {9.0, 3.63, 77713.77},
+    {6.0, 1.87, 5573.14},
+    {3.0, 5.47, 18849.23},
+    // R3
+    {145.0, 4.273, 6283.076},
+    {7.0, 3.92, 12566.15},
+    // R4
+    {4.0, 2.56, 6283.08},
+};
+
+// First row in SPA_EARTH_TERMS and number of rows of every series, grouped as L, B and R
+static const int SPA_EARTH_OFFSETS[13] = {0, 64, 98, 118, 125, 128, 129, 134, 136, 176, 186, 192, 194};
+static const int SPA_EARTH_COUNTS[13] = {64, 34, 20, 7, 3, 1, 5, 2, 40, 10, 6, 2, 1};
+
+// Multipliers of X0..X4 of the nutation terms, see table A4.3 of the SPA report
+static const int SPA_NUTATION_Y[63][5] = {
+    {0, 0, 0, 0, 1},
+    {-2, 0, 0, 2, 2},
+    {0, 0, 0, 2, 2},
+    {0, 0, 0, 0, 2},
+    {0, 1, 0, 0, 0},
+    {0, 0, 1, 0, 0},
+    {-2, 1, 0, 2, 2},
+    {0, 0, 0, 2, 1},
+    {0, 0, 1, 2, 2},
+    {-2, -1, 0, 2, 2},
+    {-2, 0, 1, 0, 0},
+    {-2, 0, 0, 2, 1},
+    {0, 0, -1, 2, 2},
+    {2, 0, 0, 0, 0},
+    {0, 0, 1, 0, 1},
+    {2, 0, -1, 2, 2},
+    {0, 0, -1, 0, 1},
+    {0, 0, 1, 2, 1},
+    {-2, 0, 2, 0, 0},
+    {0, 0, -2, 2, 1},
+    {2, 0, 0, 2, 2},
+    {0, 0, 2, 2, 2},
+    {0, 0, 2, 0, 0},
+    {-2, 0, 1, 2, 2},
+    {0, 0, 0, 2, 0},
+    {-2, 0, 0, 2, 0},
+    {0, 0, -1, 2, 1},
+    {0, 2, 0, 0, 0},
+    {2, 0, -1, 0, 1},
+    {-2, 2, 0, 2, 2},
+    {0, 1, 0, 0, 1},
+    {-2, 0, 1, 0, 1},
+    {0, -1, 0, 0, 1},
+    {0, 0, 2, -2, 0},
+    {2, 0, -1, 2, 1},
+    {2, 0, 1, 2, 2},
+    {0, 1, 0, 2, 2},
+    {-2, 1, 1, 0, 0},
+    {0, -1, 0, 2, 2},
+    {2, 0, 0, 2, 1},
+    {2, 0, 1, 0, 0},
+    {-2, 0, 2, 2, 2},
+    {-2, 0, 1, 2, 1},
+    {2, 0, -2, 0, 1},
+    {2, 0, 0, 0, 1},
+    {0, -1, 1, 0, 0},
+    {-2, -1, 0, 2, 1},
+    {-2, 0, 0, 0, 1},
+    {0, 0, 2, 2, 1},
+    {-2, 0, 2, 0, 1},
+    {-2, 1, 0, 2, 1},
+    {0, 0, 1, -2, 0},
+    {-1, 0, 1, 0, 0},
+    {-2, 1, 0, 0, 0},
+    {1, 0, 0, 0, 0},
+    {0, 0, 1, 2, 0},
+    {0, 0, -2, 2, 2},
+    {-1, -1, 1, 0, 0},
+    {0, 1, 1, 0, 0},
+    {0, -1, 1, 2, 2},
+    {2, -1, -1, 2, 2},
+    {0, 0, 3, 2, 2},
+    {2, -1, 0, 2, 2},
+};
+
+// Coefficients (a, b, c, d) of the nutation terms, see table A4.3 of the SPA report
+static const double SPA_NUTATION_ABCD[63][4] = {
+    {-171996.0, -174.2, 92025.0, 8.9},
+    {-13187.0, -1.6, 5736.0, -3.1},
+    {-2274.0, -0.2, 977.0, -0.5},
+    {2062.0, 0.2, -895.0, 0.5},
+    {1426.0, -3.4, 54.0, -0.1},
+    {712.0, 0.1, -7.0, 0.0},
+    {-517.0, 1.2, 224.0, -0.6},
+    {-386.0, -0.4, 200.0, 0.0},
+    {-301.0, 0.0, 129.0, -0.1},
+    {217.0, -0.5, -95.0, 0.3},
+    {-158.0, 0.0, 0.0, 0.0},
+    {129.0, 0.1, -70.0, 0.0},
+    {123.0, 0.0, -53.0, 0.0},
+    {63.0, 0.0, 0.0, 0.0},
+    {63.0, 0.1, -33.0, 0.0},
+    {-59.0, 0.0, 26.0, 0.0},
+    {-58.0, -0.1, 32.0, 0.0},
+    {-51.0, 0.0, 27.0, 0.0},
+    {48.0, 0.0, 0.0, 0.0},
+    {46.0, 0.0, -24.0, 0.0},
+    {-38.0, 0.0, 16.0, 0.0},
+    {-31.0, 0.0, 13.0, 0.0},
+    {29.0, 0.0, 0.0, 0.0},
+    {29.0, 0.0, -12.0, 0.0},
+    {26.0, 0.0, 0.0, 0.0},
+    {-22.0, 0.0, 0.0, 0.0},
+    {21.0, 0.0, -10.0, 0.0},
+    {17.0, -0.1, 0.0, 0.0},
+    {16.0, 0.0, -8.0, 0.0},
+    {-16.0, 0.1, 7.0, 0.0},
+    {-15.0, 0.0, 9.0, 0.0},
+    {-13.0, 0.0, 7.0, 0.0},
+    {-12.0, 0.0, 6.0, 0.0},
+    {11.0, 0.0, 0.0, 0.0},
+    {-10.0, 0.0, 5.0, 0.0},
+    {-8.0, 0.0, 3.0, 0.0},
+    {7.0, 0.0, -3.0, 0.0},
+    {-7.0, 0.0, 0.0, 0.0},
+    {-7.0, 0.0, 3.0, 0.0},
+    {-7.0, 0.0, 3.0, 0.0},
+    {6.0, 0.0, 0.0, 0.0},
+    {6.0, 0.0, -3.0, 0.0},
+    {6.0, 0.0, -3.0, 0.0},
+    {-6.0, 0.0, 3.0, 0.0},
+    {-6.0, 0.0, 3.0, 0.0},
+    {5.0, 0.0, 0.0, 0.0},
+    {-5.0, 0.0, 3.0, 0.0},
+    {-5.0, 0.0, 3.0, 0.0},
+    {-5.0, 0.0, 3.0, 0.0},
+    {4.0, 0.0, 0.0, 0.0},
+    {4.0, 0.0, 0.0, 0.0},
+    {4.0, 0.0, 0.0, 0.0},
+    {-4.0, 0.0, 0.0, 0.0},
+    {-4.0, 0.0, 0.0, 0.0},
+    {-4.0, 0.0, 0.0, 0.0},
+    {3.0, 0.0, 0.0, 0.0},
+    {-3.0, 0.0, 0.0, 0.0},
+    {-3.0, 0.0, 0.0, 0.0},
+    {-3.0, 0.0, 0.0, 0.0},
+    {-3.0, 0.0, 0.0, 0.0},
+    {-3.0, 0.0, 0.0, 0.0},
+    {-3.0, 0.0, 0.0, 0.0},
+    {-3.0, 0.0, 0.0, 0.0},
+};
+
+// First series in SPA_EARTH_OFFSETS and number of series of L, B and R
+static const int SPA_COORDINATE_FIRST[3] = {0, 6, 8};
+static const int SPA_COORDINATE_SERIES[3] = {6, 2, 5};
+
+// Number of values in the terms of spa_time_terms
+#define SPA_TIME_TERMS 4
+
+
+double spa_limit_degrees(double degrees) {
+    /*
+    Limits an angle to the 0 to 360 degree range.
+
+    Args:
+        degrees: The input angle in degrees.
+
+    Returns:
+        The angle in the 0 to 360 degree range.
+
+    */
+
+    degrees = fmod(degrees, 360.0);
+    if (degrees < 0) {
+        degrees += 360.0;
+    }
+    return degrees;
+}
+
+double spa_julian_day(int year, int month, int day, int hour, int min, double sec) {
+    /*
+    Calculates the Julian Day for a given UTC date and time as defined by the SPA.
+
+    Args:
+        year: UTC year
+        month: UTC month
+        day: UTC day
+        hour: UTC hour
+        min: UTC minute
+        sec: UTC second, may include fractions of a second
+
+    Returns:
+        The Julian Day.
+
+    */
+
+    double day_decimal = day + (hour + min / 60.0 + sec / 3600.0) / 24.0;
+    if (month < 3) {
+        year -= 1;
+        month += 12;
+    }
+
+    double jd = floor(365.25 * (year + 4716.0)) + floor(30.6001 * (month + 1)) + day_decimal - 1524.5;
+    if (jd > 2299160.0) {
+        double a = floor(year / 100.0);
+        jd += 2 - a + floor(a / 4);
+    }
+    return jd;
+}
+
+double spa_earth_heliocentric(int coordinate, double jme) {
+    /*
+    Sums the periodic terms of one of the earth heliocentric coordinates.
+
+    Args:
+        coordinate: 0 for the longitude, 1 for the latitude and 2 for the radius vector.
+        jme: Julian ephemeris millennium.
+
+    Returns:
+        The longitude or latitude in degrees, or the radius vector in astronomical units.
+
+    */
+
+    double result = 0;
+    double jme_power = 1;
+    int first = SPA_COORDINATE_FIRST[coordinate];
+
+    for (int series = first; series < first + SPA_COORDINATE_SERIES[coordinate]; ++series) {
+        double sum = 0;
+        int offset = SPA_EARTH_OFFSETS[series];
+        for (int i = offset; i < offset + SPA_EARTH_COUNTS[series]; ++i) {
+            sum += SPA_EARTH_TERMS[i][0] * HELIOC_COS(SPA_EARTH_TERMS[i][1] + SPA_EARTH_TERMS[i][2] * jme);
+        }
+        result += sum * jme_power;
+        jme_power *= jme;
+    }
+    result /= 1e8;
+
+    if (coordinate == 2) {
+        return result;
+    }
+    return result * RAD_TO_DEG;
+}
+
+void spa_nutation(double jce, double *return_delta_psi, double *return_delta_epsilon) {
+    /*
+    Calculates the nutation in longitude and obliquity.
+
+    Args:
+        jce: Julian ephemeris century.
+
+    Returns:
+        return_delta_psi: The nutation in longitude in degrees.
+        return_delta_epsilon: The nutation in obliquity in degrees.
+
+    */
+
+    double jce2 = jce * jce;
+    double jce3 = jce2 * jce;
+    double x[5] = {
+        297.85036 + 445267.111480 * jce - 0.0019142 * jce2 + jce3 / 189474.0,
+        357.52772 + 35999.050340 * jce - 0.0001603 * jce2 - jce3 / 300000.0,
+        134.96298 + 477198.867398 * jce + 0.0086972 * jce2 + jce3 / 56250.0,
+        93.27191 + 483202.017538 * jce - 0.0036825 * jce2 + jce3 / 327270.0,
+        125.04452 - 1934.136261 * jce + 0.0020708 * jce2 + jce3 / 450000.0
+    };
+
+    double delta_psi = 0;
+    double delta_epsilon = 0;
+    for (int i = 0; i < 63; ++i) {
+        double argument = 0;
+        for (int j = 0; j < 5; ++j) {
+            argument += SPA_NUTATION_Y[i][j] * x[j];
+        }
+        argument *= DEG_TO_RAD;
+        delta_psi += (SPA_NUTATION_ABCD[i][0] + SPA_NUTATION_ABCD[i][1] * jce) * HELIOC_SIN(argument);
+        delta_epsilon += (SPA_NUTATION_ABCD[i][2] + SPA_NUTATION_ABCD[i][3] * jce) * HELIOC_COS(argument);
+    }
+
+    *return_delta_psi = delta_psi / 36000000.0;
+    *return_delta_epsilon = delta_epsilon / 36000000.0;
+}
+
+void spa_time_terms(double jd, double delta_t, double return_terms[4]) {
+    /*
+    Calculates the part of the SPA that only depends on time, to be computed once per timestamp
+    and reused for every site with spa_az_el_from_terms.
+
+    Args:
+        jd: Julian Day in UTC, see spa_julian_day.
+        delta_t: Difference between terrestrial time and UT1 in seconds, e.g. 69.
+
+    Returns:
+        return_terms: The apparent sidereal time at Greenwich, the geocentric sun right ascension,
+            the geocentric sun declination and the equatorial horizontal parallax, all in degrees.
+
+    */
+
+    double jc = (jd - 2451545.0) / 36525.0;
+    double jde = jd + delta_t / 86400.0;
+    double jce = (jde - 2451545.0) / 36525.0;
+    double jme = jce / 10.0;
+
+    double l = spa_limit_degrees(spa_earth_heliocentric(0, jme));
+    double b = spa_earth_heliocentric(1, jme);
+    double r = spa_earth_heliocentric(2, jme);
+
+    double theta = spa_limit_degrees(l + 180.0);
+    double beta = -b;
+
+    double delta_psi, delta_epsilon;
+    spa_nutation(jce, &delta_psi, &delta_epsilon);
+
+    double u = jme / 10.0;
+    double epsilon0 = 84381.448 + u * (-4680.93 + u * (-1.55 + u * (1999.25 + u * (-51.38 + u * (-249.67 +
+                      u * (-39.05 + u * (7.12 + u * (27.87 + u * (5.79 + u * 2.45)))))))));
+    double epsilon = epsilon0 / 3600.0 + delta_epsilon;
+
+    double delta_tau = -20.4898 / (3600.0 * r);
+    double lambda = theta + delta_psi + delta_tau;
+
+    double nu0 = spa_limit_degrees(280.46061837 + 360.98564736629 * (jd - 2451545.0) +
+                                   jc * jc * (0.000387933 - jc / 38710000.0));
+    double lambda_rad = lambda * DEG_TO_RAD;
+    double epsilon_rad = epsilon * DEG_TO_RAD;
+    double beta_rad = beta * DEG_TO_RAD;
+
+    double sin_lambda = HELIOC_SIN(lambda_rad);
+    double sin_epsilon = HELIOC_SIN(epsilon_rad);
+    double cos_epsilon = HELIOC_COS(epsilon_rad);
+    double sin_beta = HELIOC_SIN(beta_rad);
+    double cos_beta = HELIOC_COS(beta_rad);
+
+    double nu = nu0 + delta_psi * cos_epsilon;
+    double alpha = spa_limit_degrees(HELIOC_ATAN2(sin_lambda * cos_epsilon - sin_beta / cos_beta * sin_epsilon,
+                                                  HELIOC_COS(lambda_rad)) * RAD_TO_DEG);
+    double delta = HELIOC_ASIN(sin_beta * cos_epsilon + cos_beta * sin_epsilon * sin_lambda) * RAD_TO_DEG;
+
+    return_terms[0] = nu;
+    return_terms[1] = alpha;
+    return_terms[2] = delta;
+    return_terms[3] = 8.794 / (3600.0 * r);
+}
+
+void spa_az_el_from_terms(double terms[4], double lat, double lon, double elevation, double pressure, double temperature, double *return_az, double *return_el) {
+    /*
+    Calculates the topocentric solar azimuth and elevation of a site from the terms of spa_time_terms.
+
+    Args:
+        terms: The output of spa_time_terms for the timestamp.
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        elevation: Elevation of the site in meters
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+
+    Returns:
+        return_az: Azimuth in degrees, eastward from north
+        return_el: Elevation in degrees, corrected for atmospheric refraction
+
+    */
+
+    double nu = terms[0];
+    double alpha = terms[1];
+    double delta = terms[2];
+    double xi = terms[3];
+
+    double h = spa_limit_degrees(nu + lon - alpha);
+
+    double lat_rad = lat * DEG_TO_RAD;
+    double xi_rad = xi * DEG_TO_RAD;
+    double h_rad = h * DEG_TO_RAD;
+    double delta_rad = delta * DEG_TO_RAD;
+
+    double sin_lat = HELIOC_SIN(lat_rad);
+    double cos_lat = HELIOC_COS(lat_rad);
+    double sin_xi = HELIOC_SIN(xi_rad);
+    double sin_h = HELIOC_SIN(h_rad);
+    double cos_h = HELIOC_COS(h_rad);
+    double sin_delta = HELIOC_SIN(delta_rad);
+    double cos_delta = HELIOC_COS(delta_rad);
+
+    double u = HELIOC_ATAN(0.99664719 * sin_lat / cos_lat);
+    double x = HELIOC_COS(u) + elevation / 6378140.0 * cos_lat;
+    double y = 0.99664719 * HELIOC_SIN(u) + elevation / 6378140.0 * sin_lat;
+
+    double denominator = cos_delta - x * sin_xi * cos_h;
+    double delta_alpha_rad = HELIOC_ATAN2(-x * sin_xi * sin_h, denominator);
+    double delta_prime_rad = HELIOC_ATAN2((sin_delta - y * sin_xi) * HELIOC_COS(delta_alpha_rad), denominator);
+    double h_prime_rad = h_rad - delta_alpha_rad;
+
+    double sin_delta_prime = HELIOC_SIN(delta_prime_rad);
+    double cos_delta_prime = HELIOC_COS(delta_prime_rad);
+    double sin_h_prime = HELIOC_SIN(h_prime_rad);
+    double cos_h_prime = HELIOC_COS(h_prime_rad);
+
+    double e0 = HELIOC_ASIN(sin_lat * sin_delta_prime + cos_lat * cos_delta_prime * cos_h_prime) * RAD_TO_DEG;
+
+    // Refraction is only applied while the sun is above the horizon, including its radius
+    double delta_e = 0;
+    if (e0 >= -(0.26667 + 0.5667)) {
+        delta_e = (pressure / 1010.0) * (283.0 / (273.0 + temperature)) *
+                  1.02 / (60.0 * HELIOC_TAN((e0 + 10.3 / (e0 + 5.11)) * DEG_TO_RAD));
+    }
+
+    double gamma = HELIOC_ATAN2(sin_h_prime,
+                                cos_h_prime * sin_lat - sin_delta_prime / cos_delta_prime * cos_lat) * RAD_TO_DEG;
+
+    *return_az = spa_limit_degrees(gamma + 180.0);
+    *return_el = e0 + delta_e;
+}
+
+void spa_az_el(int year, int month, int day, int hour, int min, double sec, double delta_t, double lat, double lon, double elevation, double pressure, double temperature, double *return_az, double *return_el) {
+    /*
+    Calculates the topocentric solar azimuth and elevation with the NREL SPA for a UTC time.
+
+    Args:
+        year: UTC year
+        month: UTC month
+        day: UTC day
+        hour: UTC hour
+        min: UTC minute
+        sec: UTC second, may include fractions of a second
+        delta_t: Difference between terrestrial time and UT1 in seconds, e.g. 69
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        elevation: Elevation of the site in meters
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+
+    Returns:
+        return_az: Azimuth in degrees, eastward from north
+        return_el: Elevation in degrees, corrected for atmospheric refraction
+
+    */
+
+    double terms[SPA_TIME_TERMS];
+    spa_time_terms(spa_julian_day(year, month, day, hour, min, sec), delta_t, terms);
+    spa_az_el_from_terms(terms, lat, lon, elevation, pressure, temperature, return_az, return_el);
+}
+
+void spa_time_terms_batch(const double *jd, double (*return_terms)[4], int n, double delta_t) {
+    /*
+    Calculates spa_time_terms for every Julian Day in jd.
+
+    Args:
+        jd: Julian Days in UTC, see spa_julian_day.
+        n: Number of Julian Days, inferred from jd by the Python wrapper.
+        delta_t: Difference between terrestrial time and UT1 in seconds, e.g. 69.
+
+    Returns:
+        return_terms: (n, 4) terms of every Julian Day, see spa_time_terms.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        spa_time_terms(jd[i], delta_t, return_terms[i]);
+    }
+}
+
+int spa_az_el_grid(const double (*terms)[4], int n_times, const double *lat, const double *lon, const double *elevation, int n_sites, double pressure, double temperature, int site_major, double *az, double *el, int n) {
+    /*
+    Calculates the topocentric solar azimuth and elevation of every site at every timestamp,
+    reusing the terms of each timestamp for all sites.
+
+    Args:
+        terms: (n_times, 4) output of spa_time_terms_batch.
+        lat: Latitudes of the sites in degrees
+        lon: Longitudes of the sites in degrees
+        elevation: Elevations of the sites in meters
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+        site_major: 0 to store the results in row-major (time, site) order, 1 for (site, time).
+        az: n_times * n_sites array that receives the azimuths in degrees.
+        el: n_times * n_sites array that receives the refraction corrected elevations in degrees.
+
+    Returns:
+        0 on success, -1 if n is not n_times * n_sites.
+
+    */
+
+    if (n != n_times * n_sites) {
+        return -1;
+    }
+
+    for (int i = 0; i < n_times; ++i) {
+        double time_terms[SPA_TIME_TERMS];
+        for (int k = 0; k < SPA_TIME_TERMS; ++k) {
+            time_terms[k] = terms[i][k];
+        }
+        for (int j = 0; j < n_sites; ++j) {
+            int k = site_major ? j * n_times + i : i * n_sites + j;
+            spa_az_el_from_terms(time_terms, lat[j], lon[j], elevation[j], pressure, temperature,
+                                 &az[k], &el[k]);
+        }
+    }
+    return 0;
+}
+
+void spa_accumulate_sites(const double (*terms)[4], int n_times, const double *lat, const double *lon, const double *elevation, double *daylight_hours, double *cosine_hours, double *max_elevation, int n_sites, double pressure, double temperature, double interval_hours) {
+    /*
+    Adds the sun statistics of every site over the timestamps of terms to running totals,
+    without storing the positions, so that a year can be summarised in chunks.
+
+    Args:
+        terms: (n_times, 4) output of spa_time_terms_batch.
+        lat: Latitudes of the sites in degrees
+        lon: Longitudes of the sites in degrees
+        elevation: Elevations of the sites in meters
+        daylight_hours: Running total of the hours with the centre of the sun above the horizon.
+        cosine_hours: Running total of the sine of the sun elevation times the hours, i.e. the
+            insolation on a horizontal surface in kWh/m^2 per kW/m^2 of direct normal irradiance.
+        max_elevation: Running maximum of the sun elevation in degrees.
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+        interval_hours: Hours represented by each timestamp.
+
+    */
+
+    for (int i = 0; i < n_times; ++i) {
+        double time_terms[SPA_TIME_TERMS];
+        for (int k = 0; k < SPA_TIME_TERMS; ++k) {
+            time_terms[k] = terms[i][k];
+        }
+        for (int j = 0; j < n_sites; ++j) {
+            double az, el;
+            spa_az_el_from_terms(time_terms, lat[j], lon[j], elevation[j], pressure, temperature, &az, &el);
+            if (el > 0) {
+                daylight_hours[j] += interval_hours;
+                cosine_hours[j] += HELIOC_SIN(el * DEG_TO_RAD) * interval_hours;
+            }
+            if (el > max_elevation[j]) {
+                max_elevation[j] = el;
+            }
+        }
+    }
+}
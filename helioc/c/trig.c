@@ -0,0 +1,109 @@
+#include "trig.h"
+#include "math_tier.h"
+#include <math.h>
+
+// Batch versions of the trigonometric functions of the math tier this file is built with,
+// used by math_tiers.py to validate the error bounds of every tier.
+
+void trig_sin(const double *x, double *return_y, int n) {
+    /*
+    Calculates the sine of every element of x.
+
+    Args:
+        x: Angles in radians.
+
+    Returns:
+        return_y: The sines.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        return_y[i] = HELIOC_SIN(x[i]);
+    }
+}
+
+void trig_cos(const double *x, double *return_y, int n) {
+    /*
+    Calculates the cosine of every element of x.
+
+    Args:
+        x: Angles in radians.
+
+    Returns:
+        return_y: The cosines.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        return_y[i] = HELIOC_COS(x[i]);
+    }
+}
+
+void trig_tan(const double *x, double *return_y, int n) {
+    /*
+    Calculates the tangent of every element of x.
+
+    Args:
+        x: Angles in radians.
+
+    Returns:
+        return_y: The tangents.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        return_y[i] = HELIOC_TAN(x[i]);
+    }
+}
+
+void trig_asin(const double *x, double *return_y, int n) {
+    /*
+    Calculates the arcsine of every element of x.
+
+    Args:
+        x: Values in [-1, 1].
+
+    Returns:
+        return_y: The arcsines in radians.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        return_y[i] = HELIOC_ASIN(x[i]);
+    }
+}
+
+void trig_atan(const double *x, double *return_y, int n) {
+    /*
+    Calculates the arctangent of every element of x.
+
+    Args:
+        x: The values.
+
+    Returns:
+        return_y: The arctangents in radians.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        return_y[i] = HELIOC_ATAN(x[i]);
+    }
+}
+
+void trig_atan2(const double *y, const double *x, double *return_z, int n) {
+    /*
+    Calculates the four quadrant arctangent of every pair of y and x.
+
+    Args:
+        y: The y coordinates.
+        x: The x coordinates.
+
+    Returns:
+        return_z: The angles in radians.
+
+    */
+
+    for (int i = 0; i < n; ++i) {
+        return_z[i] = HELIOC_ATAN2(y[i], x[i]);
+    }
+}
@@ -12,5 +12,10 @@ void get_normal_vector(double degrees_from_north, double degrees_elevation, doub
 double closest_point_distance(double point[3], double midpoint[3], double direction[3]);
 double euclidean_distance(double vector1[3], double vector2[3]);
 double euclidean_vector_distance(double vector1[3], double vector2[3]);
+void get_degrees_batch(const double (*normal_vectors)[3], double (*return_degrees)[2], int n);
+void get_normal_vector_batch(const double (*degrees)[2], double (*return_normals)[3], int n);
+void euclidean_distance_batch(const double (*vectors1)[3], const double (*vectors2)[3], double *return_distances, int n);
+void rotation_matrix_3d_batch(const double (*angles_rad)[2], double (*return_matrices)[3][3], int n);
+void closest_point_distance_batch(const double (*points)[3], const double (*midpoints)[3], const double (*directions)[3], double *return_distances, int n);
 
 #endif // MATH_FUNCTIONS_H
\ No newline at end of file
@@ -0,0 +1,7 @@
+#ifndef SOLAR_POSITION_H
+#define SOLAR_POSITION_H
+
+double julian_day(int year, int month, int day, int hour, int min, int sec);
+void solar_az_el(int year, int month, int day, int hour, int min, int sec, double lat, double lon, double alt, double *return_az, double *return_el);
+
+#endif // SOLAR_POSITION_H
\ No newline at end of file
@@ -0,0 +1,15 @@
+#ifndef SPA_H
+#define SPA_H
+
+double spa_limit_degrees(double degrees);
+double spa_julian_day(int year, int month, int day, int hour, int min, double sec);
+double spa_earth_heliocentric(int coordinate, double jme);
+void spa_nutation(double jce, double *return_delta_psi, double *return_delta_epsilon);
+void spa_time_terms(double jd, double delta_t, double return_terms[4]);
+void spa_az_el_from_terms(double terms[4], double lat, double lon, double elevation, double pressure, double temperature, double *return_az, double *return_el);
+void spa_az_el(int year, int month, int day, int hour, int min, double sec, double delta_t, double lat, double lon, double elevation, double pressure, double temperature, double *return_az, double *return_el);
+void spa_time_terms_batch(const double *jd, double (*return_terms)[4], int n, double delta_t);
+int spa_az_el_grid(const double (*terms)[4], int n_times, const double *lat, const double *lon, const double *elevation, int n_sites, double pressure, double temperature, int site_major, double *az, double *el, int n);
+void spa_accumulate_sites(const double (*terms)[4], int n_times, const double *lat, const double *lon, const double *elevation, double *daylight_hours, double *cosine_hours, double *max_elevation, int n_sites, double pressure, double temperature, double interval_hours);
+
+#endif // SPA_H
\ No newline at end of file
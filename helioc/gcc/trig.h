@@ -0,0 +1,11 @@
+#ifndef TRIG_H
+#define TRIG_H
+
+void trig_sin(const double *x, double *return_y, int n);
+void trig_cos(const double *x, double *return_y, int n);
+void trig_tan(const double *x, double *return_y, int n);
+void trig_asin(const double *x, double *return_y, int n);
+void trig_atan(const double *x, double *return_y, int n);
+void trig_atan2(const double *y, const double *x, double *return_z, int n);
+
+#endif // TRIG_H
\ No newline at end of file
@@ -1,6 +1,8 @@
 import ctypes as _ctypes
 from pathlib import Path as _Path
 import numpy as _np
+from time import perf_counter as _perf_counter
+from . import _profiling
 _this_dir = _Path(__file__).parent.absolute()
 _lib = _ctypes.CDLL(str(_this_dir / 'gcc/math_functions.dll'))
 
@@ -19,6 +21,15 @@ def to_radians(degrees):
     '''
     return _lib.to_radians(degrees)
 
+def _profiled_to_radians(degrees):
+    _t0 = _perf_counter()
+    _t1 = _perf_counter()
+    _result = _lib.to_radians(degrees)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.to_radians', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(to_radians, _profiled_to_radians)
+
 
 _lib.to_degrees.argtypes = [_ctypes.c_double]
 _lib.to_degrees.restype = _ctypes.c_double
@@ -34,6 +45,15 @@ def to_degrees(radians):
     '''
     return _lib.to_degrees(radians)
 
+def _profiled_to_degrees(radians):
+    _t0 = _perf_counter()
+    _t1 = _perf_counter()
+    _result = _lib.to_degrees(radians)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.to_degrees', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(to_degrees, _profiled_to_degrees)
+
 
 _lib.normalize_vector.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
 def normalize_vector(vector):
@@ -57,6 +77,22 @@ def normalize_vector(vector):
     _lib.normalize_vector(vector_p, return_vector_p)
     return (return_vector)
 
+def _profiled_normalize_vector(vector):
+    _t0 = _perf_counter()
+    return_vector = _np.zeros((3,), dtype=_np.float64)
+    assert vector.shape == (3,)
+    vector = _np.ascontiguousarray(vector).astype(_np.float64)
+    vector_p = vector.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_vector.shape == (3,)
+    return_vector = _np.ascontiguousarray(return_vector).astype(_np.float64)
+    return_vector_p = return_vector.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.normalize_vector(vector_p, return_vector_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.normalize_vector', _t1 - _t0, _t2 - _t1)
+    return (return_vector)
+_profiling.register(normalize_vector, _profiled_normalize_vector)
+
 
 _lib.get_degrees.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
 def get_degrees(normal_vector):
@@ -85,6 +121,26 @@ def get_degrees(normal_vector):
     _lib.get_degrees(normal_vector_p, return_theta_deg_p, return_phi_deg_p)
     return (return_theta_deg[0], return_phi_deg[0])
 
+def _profiled_get_degrees(normal_vector):
+    _t0 = _perf_counter()
+    return_theta_deg = _np.zeros((1,), dtype=_np.float64)
+    return_phi_deg = _np.zeros((1,), dtype=_np.float64)
+    assert normal_vector.shape == (3,)
+    normal_vector = _np.ascontiguousarray(normal_vector).astype(_np.float64)
+    normal_vector_p = normal_vector.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_theta_deg.shape == (1,)
+    return_theta_deg = _np.ascontiguousarray(return_theta_deg).astype(_np.float64)
+    return_theta_deg_p = return_theta_deg.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_phi_deg.shape == (1,)
+    return_phi_deg = _np.ascontiguousarray(return_phi_deg).astype(_np.float64)
+    return_phi_deg_p = return_phi_deg.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.get_degrees(normal_vector_p, return_theta_deg_p, return_phi_deg_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.get_degrees', _t1 - _t0, _t2 - _t1)
+    return (return_theta_deg[0], return_phi_deg[0])
+_profiling.register(get_degrees, _profiled_get_degrees)
+
 
 _lib.dot_product.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
 _lib.dot_product.restype = _ctypes.c_double
@@ -108,6 +164,21 @@ def dot_product(vector1, vector2):
     vector2_p = vector2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
     return _lib.dot_product(vector1_p, vector2_p)
 
+def _profiled_dot_product(vector1, vector2):
+    _t0 = _perf_counter()
+    assert vector1.shape == (3,)
+    vector1 = _np.ascontiguousarray(vector1).astype(_np.float64)
+    vector1_p = vector1.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert vector2.shape == (3,)
+    vector2 = _np.ascontiguousarray(vector2).astype(_np.float64)
+    vector2_p = vector2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _result = _lib.dot_product(vector1_p, vector2_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.dot_product', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(dot_product, _profiled_dot_product)
+
 
 _lib.to_180_form.argtypes = [_ctypes.c_double]
 _lib.to_180_form.restype = _ctypes.c_double
@@ -124,6 +195,15 @@ def to_180_form(degrees):
     '''
     return _lib.to_180_form(degrees)
 
+def _profiled_to_180_form(degrees):
+    _t0 = _perf_counter()
+    _t1 = _perf_counter()
+    _result = _lib.to_180_form(degrees)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.to_180_form', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(to_180_form, _profiled_to_180_form)
+
 
 _lib.rotation_matrix_3d.argtypes = [_ctypes.c_double, _ctypes.c_double, _ctypes.POINTER(_ctypes.c_double)]
 def rotation_matrix_3d(theta_rad, phi_rad):
@@ -145,6 +225,19 @@ def rotation_matrix_3d(theta_rad, phi_rad):
     _lib.rotation_matrix_3d(theta_rad, phi_rad, return_matrix_p)
     return (return_matrix)
 
+def _profiled_rotation_matrix_3d(theta_rad, phi_rad):
+    _t0 = _perf_counter()
+    return_matrix = _np.zeros((3, 3), dtype=_np.float64)
+    assert return_matrix.shape == (3, 3)
+    return_matrix = _np.ascontiguousarray(return_matrix).astype(_np.float64)
+    return_matrix_p = return_matrix.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.rotation_matrix_3d(theta_rad, phi_rad, return_matrix_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.rotation_matrix_3d', _t1 - _t0, _t2 - _t1)
+    return (return_matrix)
+_profiling.register(rotation_matrix_3d, _profiled_rotation_matrix_3d)
+
 
 _lib.get_normal_vector.argtypes = [_ctypes.c_double, _ctypes.c_double, _ctypes.POINTER(_ctypes.c_double)]
 def get_normal_vector(degrees_from_north, degrees_elevation):
@@ -166,6 +259,19 @@ def get_normal_vector(degrees_from_north, degrees_elevation):
     _lib.get_normal_vector(degrees_from_north, degrees_elevation, return_normal_p)
     return (return_normal)
 
+def _profiled_get_normal_vector(degrees_from_north, degrees_elevation):
+    _t0 = _perf_counter()
+    return_normal = _np.zeros((3,), dtype=_np.float64)
+    assert return_normal.shape == (3,)
+    return_normal = _np.ascontiguousarray(return_normal).astype(_np.float64)
+    return_normal_p = return_normal.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.get_normal_vector(degrees_from_north, degrees_elevation, return_normal_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.get_normal_vector', _t1 - _t0, _t2 - _t1)
+    return (return_normal)
+_profiling.register(get_normal_vector, _profiled_get_normal_vector)
+
 
 _lib.closest_point_distance.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
 _lib.closest_point_distance.restype = _ctypes.c_double
@@ -193,6 +299,24 @@ def closest_point_distance(point, midpoint, direction):
     direction_p = direction.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
     return _lib.closest_point_distance(point_p, midpoint_p, direction_p)
 
+def _profiled_closest_point_distance(point, midpoint, direction):
+    _t0 = _perf_counter()
+    assert point.shape == (3,)
+    point = _np.ascontiguousarray(point).astype(_np.float64)
+    point_p = point.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert midpoint.shape == (3,)
+    midpoint = _np.ascontiguousarray(midpoint).astype(_np.float64)
+    midpoint_p = midpoint.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert direction.shape == (3,)
+    direction = _np.ascontiguousarray(direction).astype(_np.float64)
+    direction_p = direction.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _result = _lib.closest_point_distance(point_p, midpoint_p, direction_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.closest_point_distance', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(closest_point_distance, _profiled_closest_point_distance)
+
 
 _lib.euclidean_distance.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
 _lib.euclidean_distance.restype = _ctypes.c_double
@@ -216,6 +340,21 @@ def euclidean_distance(vector1, vector2):
     vector2_p = vector2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
     return _lib.euclidean_distance(vector1_p, vector2_p)
 
+def _profiled_euclidean_distance(vector1, vector2):
+    _t0 = _perf_counter()
+    assert vector1.shape == (3,)
+    vector1 = _np.ascontiguousarray(vector1).astype(_np.float64)
+    vector1_p = vector1.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert vector2.shape == (3,)
+    vector2 = _np.ascontiguousarray(vector2).astype(_np.float64)
+    vector2_p = vector2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _result = _lib.euclidean_distance(vector1_p, vector2_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.euclidean_distance', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(euclidean_distance, _profiled_euclidean_distance)
+
 
 _lib.euclidean_vector_distance.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
 _lib.euclidean_vector_distance.restype = _ctypes.c_double
@@ -239,3 +378,247 @@ def euclidean_vector_distance(vector1, vector2):
     vector2_p = vector2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
     return _lib.euclidean_vector_distance(vector1_p, vector2_p)
 
+def _profiled_euclidean_vector_distance(vector1, vector2):
+    _t0 = _perf_counter()
+    assert vector1.shape == (3,)
+    vector1 = _np.ascontiguousarray(vector1).astype(_np.float64)
+    vector1_p = vector1.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert vector2.shape == (3,)
+    vector2 = _np.ascontiguousarray(vector2).astype(_np.float64)
+    vector2_p = vector2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _result = _lib.euclidean_vector_distance(vector1_p, vector2_p)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.euclidean_vector_distance', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(euclidean_vector_distance, _profiled_euclidean_vector_distance)
+
+
+_lib.get_degrees_batch.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def get_degrees_batch(normal_vectors):
+    r'''
+    Gets the theta and phi angles in degrees for every normal vector, see get_degrees.
+
+    Args:
+        normal_vectors: (n, 3) normal vectors.
+        n: Number of normal vectors, inferred from normal_vectors by the Python wrapper.
+
+    Returns:
+        return_degrees: (n, 2) theta and phi angles in degrees.
+
+    '''
+    normal_vectors = _np.ascontiguousarray(normal_vectors, dtype=_np.float64)
+    n = normal_vectors.shape[0]
+    if normal_vectors.shape != (n, 3):
+        raise ValueError(f'normal_vectors must have shape {(n, 3)}, got {normal_vectors.shape}')
+    normal_vectors_p = normal_vectors.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_degrees = _np.empty((n, 2), dtype=_np.float64)
+    return_degrees_p = return_degrees.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.get_degrees_batch(normal_vectors_p, return_degrees_p, n)
+    return (return_degrees)
+
+def _profiled_get_degrees_batch(normal_vectors):
+    _t0 = _perf_counter()
+    normal_vectors = _np.ascontiguousarray(normal_vectors, dtype=_np.float64)
+    n = normal_vectors.shape[0]
+    if normal_vectors.shape != (n, 3):
+        raise ValueError(f'normal_vectors must have shape {(n, 3)}, got {normal_vectors.shape}')
+    normal_vectors_p = normal_vectors.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_degrees = _np.empty((n, 2), dtype=_np.float64)
+    return_degrees_p = return_degrees.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.get_degrees_batch(normal_vectors_p, return_degrees_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.get_degrees_batch', _t1 - _t0, _t2 - _t1)
+    return (return_degrees)
+_profiling.register(get_degrees_batch, _profiled_get_degrees_batch)
+
+
+_lib.get_normal_vector_batch.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def get_normal_vector_batch(degrees):
+    r'''
+    Computes the normal vector for every pair of degrees from north and degrees elevation,
+    see get_normal_vector.
+
+    Args:
+        degrees: (n, 2) degrees from north and degrees elevation.
+        n: Number of rows, inferred from degrees by the Python wrapper.
+
+    Returns:
+        return_normals: (n, 3) normal vectors.
+
+    '''
+    degrees = _np.ascontiguousarray(degrees, dtype=_np.float64)
+    n = degrees.shape[0]
+    if degrees.shape != (n, 2):
+        raise ValueError(f'degrees must have shape {(n, 2)}, got {degrees.shape}')
+    degrees_p = degrees.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_normals = _np.empty((n, 3), dtype=_np.float64)
+    return_normals_p = return_normals.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.get_normal_vector_batch(degrees_p, return_normals_p, n)
+    return (return_normals)
+
+def _profiled_get_normal_vector_batch(degrees):
+    _t0 = _perf_counter()
+    degrees = _np.ascontiguousarray(degrees, dtype=_np.float64)
+    n = degrees.shape[0]
+    if degrees.shape != (n, 2):
+        raise ValueError(f'degrees must have shape {(n, 2)}, got {degrees.shape}')
+    degrees_p = degrees.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_normals = _np.empty((n, 3), dtype=_np.float64)
+    return_normals_p = return_normals.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.get_normal_vector_batch(degrees_p, return_normals_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.get_normal_vector_batch', _t1 - _t0, _t2 - _t1)
+    return (return_normals)
+_profiling.register(get_normal_vector_batch, _profiled_get_normal_vector_batch)
+
+
+_lib.euclidean_distance_batch.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def euclidean_distance_batch(vectors1, vectors2):
+    r'''
+    Calculates the Euclidean distance between every pair of points, see euclidean_distance.
+
+    Args:
+        vectors1: (n, 3) coordinates of the first points.
+        vectors2: (n, 3) coordinates of the second points.
+        n: Number of pairs, inferred from vectors1 by the Python wrapper.
+
+    Returns:
+        return_distances: (n,) distances between the points.
+
+    '''
+    vectors1 = _np.ascontiguousarray(vectors1, dtype=_np.float64)
+    vectors2 = _np.ascontiguousarray(vectors2, dtype=_np.float64)
+    n = vectors1.shape[0]
+    if vectors1.shape != (n, 3):
+        raise ValueError(f'vectors1 must have shape {(n, 3)}, got {vectors1.shape}')
+    vectors1_p = vectors1.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if vectors2.shape != (n, 3):
+        raise ValueError(f'vectors2 must have shape {(n, 3)}, got {vectors2.shape}')
+    vectors2_p = vectors2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_distances = _np.empty((n,), dtype=_np.float64)
+    return_distances_p = return_distances.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.euclidean_distance_batch(vectors1_p, vectors2_p, return_distances_p, n)
+    return (return_distances)
+
+def _profiled_euclidean_distance_batch(vectors1, vectors2):
+    _t0 = _perf_counter()
+    vectors1 = _np.ascontiguousarray(vectors1, dtype=_np.float64)
+    vectors2 = _np.ascontiguousarray(vectors2, dtype=_np.float64)
+    n = vectors1.shape[0]
+    if vectors1.shape != (n, 3):
+        raise ValueError(f'vectors1 must have shape {(n, 3)}, got {vectors1.shape}')
+    vectors1_p = vectors1.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if vectors2.shape != (n, 3):
+        raise ValueError(f'vectors2 must have shape {(n, 3)}, got {vectors2.shape}')
+    vectors2_p = vectors2.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_distances = _np.empty((n,), dtype=_np.float64)
+    return_distances_p = return_distances.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.euclidean_distance_batch(vectors1_p, vectors2_p, return_distances_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.euclidean_distance_batch', _t1 - _t0, _t2 - _t1)
+    return (return_distances)
+_profiling.register(euclidean_distance_batch, _profiled_euclidean_distance_batch)
+
+
+_lib.rotation_matrix_3d_batch.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def rotation_matrix_3d_batch(angles_rad):
+    r'''
+    Calculates the 3D rotation matrix for every pair of theta and phi angles in radians,
+    see rotation_matrix_3d.
+
+    Args:
+        angles_rad: (n, 2) theta and phi angles in radians.
+        n: Number of rows, inferred from angles_rad by the Python wrapper.
+
+    Returns:
+        return_matrices: (n, 3, 3) rotation matrices.
+
+    '''
+    angles_rad = _np.ascontiguousarray(angles_rad, dtype=_np.float64)
+    n = angles_rad.shape[0]
+    if angles_rad.shape != (n, 2):
+        raise ValueError(f'angles_rad must have shape {(n, 2)}, got {angles_rad.shape}')
+    angles_rad_p = angles_rad.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_matrices = _np.empty((n, 3, 3), dtype=_np.float64)
+    return_matrices_p = return_matrices.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.rotation_matrix_3d_batch(angles_rad_p, return_matrices_p, n)
+    return (return_matrices)
+
+def _profiled_rotation_matrix_3d_batch(angles_rad):
+    _t0 = _perf_counter()
+    angles_rad = _np.ascontiguousarray(angles_rad, dtype=_np.float64)
+    n = angles_rad.shape[0]
+    if angles_rad.shape != (n, 2):
+        raise ValueError(f'angles_rad must have shape {(n, 2)}, got {angles_rad.shape}')
+    angles_rad_p = angles_rad.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_matrices = _np.empty((n, 3, 3), dtype=_np.float64)
+    return_matrices_p = return_matrices.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.rotation_matrix_3d_batch(angles_rad_p, return_matrices_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.rotation_matrix_3d_batch', _t1 - _t0, _t2 - _t1)
+    return (return_matrices)
+_profiling.register(rotation_matrix_3d_batch, _profiled_rotation_matrix_3d_batch)
+
+
+_lib.closest_point_distance_batch.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def closest_point_distance_batch(points, midpoints, directions):
+    r'''
+    Computes the distance between every point and its line, see closest_point_distance.
+
+    Args:
+        points: (n, 3) points in 3D space.
+        midpoints: (n, 3) points on the lines.
+        directions: (n, 3) direction vectors of the lines.
+        n: Number of points, inferred from points by the Python wrapper.
+
+    Returns:
+        return_distances: (n,) distances between the points and the lines.
+
+    '''
+    points = _np.ascontiguousarray(points, dtype=_np.float64)
+    midpoints = _np.ascontiguousarray(midpoints, dtype=_np.float64)
+    directions = _np.ascontiguousarray(directions, dtype=_np.float64)
+    n = points.shape[0]
+    if points.shape != (n, 3):
+        raise ValueError(f'points must have shape {(n, 3)}, got {points.shape}')
+    points_p = points.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if midpoints.shape != (n, 3):
+        raise ValueError(f'midpoints must have shape {(n, 3)}, got {midpoints.shape}')
+    midpoints_p = midpoints.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if directions.shape != (n, 3):
+        raise ValueError(f'directions must have shape {(n, 3)}, got {directions.shape}')
+    directions_p = directions.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_distances = _np.empty((n,), dtype=_np.float64)
+    return_distances_p = return_distances.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.closest_point_distance_batch(points_p, midpoints_p, directions_p, return_distances_p, n)
+    return (return_distances)
+
+def _profiled_closest_point_distance_batch(points, midpoints, directions):
+    _t0 = _perf_counter()
+    points = _np.ascontiguousarray(points, dtype=_np.float64)
+    midpoints = _np.ascontiguousarray(midpoints, dtype=_np.float64)
+    directions = _np.ascontiguousarray(directions, dtype=_np.float64)
+    n = points.shape[0]
+    if points.shape != (n, 3):
+        raise ValueError(f'points must have shape {(n, 3)}, got {points.shape}')
+    points_p = points.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if midpoints.shape != (n, 3):
+        raise ValueError(f'midpoints must have shape {(n, 3)}, got {midpoints.shape}')
+    midpoints_p = midpoints.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if directions.shape != (n, 3):
+        raise ValueError(f'directions must have shape {(n, 3)}, got {directions.shape}')
+    directions_p = directions.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_distances = _np.empty((n,), dtype=_np.float64)
+    return_distances_p = return_distances.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.closest_point_distance_batch(points_p, midpoints_p, directions_p, return_distances_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('math_functions.closest_point_distance_batch', _t1 - _t0, _t2 - _t1)
+    return (return_distances)
+_profiling.register(closest_point_distance_batch, _profiled_closest_point_distance_batch)
+
@@ -1,6 +1,8 @@
 import ctypes as _ctypes
 from pathlib import Path as _Path
 import numpy as _np
+from time import perf_counter as _perf_counter
+from . import _profiling
 _this_dir = _Path(__file__).parent.absolute()
 _lib = _ctypes.CDLL(str(_this_dir / 'gcc/solar_position.dll'))
 
@@ -26,6 +28,15 @@ def julian_day(year, month, day, hour, min, sec):
     '''
     return _lib.julian_day(year, month, day, hour, min, sec)
 
+def _profiled_julian_day(year, month, day, hour, min, sec):
+    _t0 = _perf_counter()
+    _t1 = _perf_counter()
+    _result = _lib.julian_day(year, month, day, hour, min, sec)
+    _t2 = _perf_counter()
+    _profiling.record('solar_position.julian_day', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(julian_day, _profiled_julian_day)
+
 
 _lib.solar_az_el.argtypes = [_ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
 def solar_az_el(year, month, day, hour, min, sec, lat, lon, alt):
@@ -64,3 +75,20 @@ def solar_az_el(year, month, day, hour, min, sec, lat, lon, alt):
     _lib.solar_az_el(year, month, day, hour, min, sec, lat, lon, alt, return_az_p, return_el_p)
     return (return_az[0], return_el[0])
 
+def _profiled_solar_az_el(year, month, day, hour, min, sec, lat, lon, alt):
+    _t0 = _perf_counter()
+    return_az = _np.zeros((1,), dtype=_np.float64)
+    return_el = _np.zeros((1,), dtype=_np.float64)
+    assert return_az.shape == (1,)
+    return_az = _np.ascontiguousarray(return_az).astype(_np.float64)
+    return_az_p = return_az.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_el.shape == (1,)
+    return_el = _np.ascontiguousarray(return_el).astype(_np.float64)
+    return_el_p = return_el.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.solar_az_el(year, month, day, hour, min, sec, lat, lon, alt, return_az_p, return_el_p)
+    _t2 = _perf_counter()
+    _profiling.record('solar_position.solar_az_el', _t1 - _t0, _t2 - _t1)
+    return (return_az[0], return_el[0])
+_profiling.register(solar_az_el, _profiled_solar_az_el)
+
@@ -0,0 +1,505 @@
+import ctypes as _ctypes
+from pathlib import Path as _Path
+import numpy as _np
+from time import perf_counter as _perf_counter
+from . import _profiling
+_this_dir = _Path(__file__).parent.absolute()
+_lib = _ctypes.CDLL(str(_this_dir / 'gcc/spa.dll'))
+
+
+_lib.spa_limit_degrees.argtypes = [_ctypes.c_double]
+_lib.spa_limit_degrees.restype = _ctypes.c_double
+def spa_limit_degrees(degrees):
+    r'''
+    Limits an angle to the 0 to 360 degree range.
+
+    Args:
+        degrees: The input angle in degrees.
+
+    Returns:
+        The angle in the 0 to 360 degree range.
+
+    '''
+    return _lib.spa_limit_degrees(degrees)
+
+def _profiled_spa_limit_degrees(degrees):
+    _t0 = _perf_counter()
+    _t1 = _perf_counter()
+    _result = _lib.spa_limit_degrees(degrees)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_limit_degrees', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(spa_limit_degrees, _profiled_spa_limit_degrees)
+
+
+_lib.spa_julian_day.argtypes = [_ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_double]
+_lib.spa_julian_day.restype = _ctypes.c_double
+def spa_julian_day(year, month, day, hour, min, sec):
+    r'''
+    Calculates the Julian Day for a given UTC date and time as defined by the SPA.
+
+    Args:
+        year: UTC year
+        month: UTC month
+        day: UTC day
+        hour: UTC hour
+        min: UTC minute
+        sec: UTC second, may include fractions of a second
+
+    Returns:
+        The Julian Day.
+
+    '''
+    return _lib.spa_julian_day(year, month, day, hour, min, sec)
+
+def _profiled_spa_julian_day(year, month, day, hour, min, sec):
+    _t0 = _perf_counter()
+    _t1 = _perf_counter()
+    _result = _lib.spa_julian_day(year, month, day, hour, min, sec)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_julian_day', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(spa_julian_day, _profiled_spa_julian_day)
+
+
+_lib.spa_earth_heliocentric.argtypes = [_ctypes.c_int, _ctypes.c_double]
+_lib.spa_earth_heliocentric.restype = _ctypes.c_double
+def spa_earth_heliocentric(coordinate, jme):
+    r'''
+    Sums the periodic terms of one of the earth heliocentric coordinates.
+
+    Args:
+        coordinate: 0 for the longitude, 1 for the latitude and 2 for the radius vector.
+        jme: Julian ephemeris millennium.
+
+    Returns:
+        The longitude or latitude in degrees, or the radius vector in astronomical units.
+
+    '''
+    return _lib.spa_earth_heliocentric(coordinate, jme)
+
+def _profiled_spa_earth_heliocentric(coordinate, jme):
+    _t0 = _perf_counter()
+    _t1 = _perf_counter()
+    _result = _lib.spa_earth_heliocentric(coordinate, jme)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_earth_heliocentric', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(spa_earth_heliocentric, _profiled_spa_earth_heliocentric)
+
+
+_lib.spa_nutation.argtypes = [_ctypes.c_double, _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
+def spa_nutation(jce):
+    r'''
+    Calculates the nutation in longitude and obliquity.
+
+    Args:
+        jce: Julian ephemeris century.
+
+    Returns:
+        return_delta_psi: The nutation in longitude in degrees.
+        return_delta_epsilon: The nutation in obliquity in degrees.
+
+    '''
+    return_delta_psi = _np.zeros((1,), dtype=_np.float64)
+    return_delta_epsilon = _np.zeros((1,), dtype=_np.float64)
+    assert return_delta_psi.shape == (1,)
+    return_delta_psi = _np.ascontiguousarray(return_delta_psi).astype(_np.float64)
+    return_delta_psi_p = return_delta_psi.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_delta_epsilon.shape == (1,)
+    return_delta_epsilon = _np.ascontiguousarray(return_delta_epsilon).astype(_np.float64)
+    return_delta_epsilon_p = return_delta_epsilon.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.spa_nutation(jce, return_delta_psi_p, return_delta_epsilon_p)
+    return (return_delta_psi[0], return_delta_epsilon[0])
+
+def _profiled_spa_nutation(jce):
+    _t0 = _perf_counter()
+    return_delta_psi = _np.zeros((1,), dtype=_np.float64)
+    return_delta_epsilon = _np.zeros((1,), dtype=_np.float64)
+    assert return_delta_psi.shape == (1,)
+    return_delta_psi = _np.ascontiguousarray(return_delta_psi).astype(_np.float64)
+    return_delta_psi_p = return_delta_psi.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_delta_epsilon.shape == (1,)
+    return_delta_epsilon = _np.ascontiguousarray(return_delta_epsilon).astype(_np.float64)
+    return_delta_epsilon_p = return_delta_epsilon.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.spa_nutation(jce, return_delta_psi_p, return_delta_epsilon_p)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_nutation', _t1 - _t0, _t2 - _t1)
+    return (return_delta_psi[0], return_delta_epsilon[0])
+_profiling.register(spa_nutation, _profiled_spa_nutation)
+
+
+_lib.spa_time_terms.argtypes = [_ctypes.c_double, _ctypes.c_double, _ctypes.POINTER(_ctypes.c_double)]
+def spa_time_terms(jd, delta_t):
+    r'''
+    Calculates the part of the SPA that only depends on time, to be computed once per timestamp
+    and reused for every site with spa_az_el_from_terms.
+
+    Args:
+        jd: Julian Day in UTC, see spa_julian_day.
+        delta_t: Difference between terrestrial time and UT1 in seconds, e.g. 69.
+
+    Returns:
+        return_terms: The apparent sidereal time at Greenwich, the geocentric sun right ascension,
+            the geocentric sun declination and the equatorial horizontal parallax, all in degrees.
+
+    '''
+    return_terms = _np.zeros((4,), dtype=_np.float64)
+    assert return_terms.shape == (4,)
+    return_terms = _np.ascontiguousarray(return_terms).astype(_np.float64)
+    return_terms_p = return_terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.spa_time_terms(jd, delta_t, return_terms_p)
+    return (return_terms)
+
+def _profiled_spa_time_terms(jd, delta_t):
+    _t0 = _perf_counter()
+    return_terms = _np.zeros((4,), dtype=_np.float64)
+    assert return_terms.shape == (4,)
+    return_terms = _np.ascontiguousarray(return_terms).astype(_np.float64)
+    return_terms_p = return_terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.spa_time_terms(jd, delta_t, return_terms_p)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_time_terms', _t1 - _t0, _t2 - _t1)
+    return (return_terms)
+_profiling.register(spa_time_terms, _profiled_spa_time_terms)
+
+
+_lib.spa_az_el_from_terms.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
+def spa_az_el_from_terms(terms, lat, lon, elevation, pressure, temperature):
+    r'''
+    Calculates the topocentric solar azimuth and elevation of a site from the terms of spa_time_terms.
+
+    Args:
+        terms: The output of spa_time_terms for the timestamp.
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        elevation: Elevation of the site in meters
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+
+    Returns:
+        return_az: Azimuth in degrees, eastward from north
+        return_el: Elevation in degrees, corrected for atmospheric refraction
+
+    '''
+    return_az = _np.zeros((1,), dtype=_np.float64)
+    return_el = _np.zeros((1,), dtype=_np.float64)
+    assert terms.shape == (4,)
+    terms = _np.ascontiguousarray(terms).astype(_np.float64)
+    terms_p = terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_az.shape == (1,)
+    return_az = _np.ascontiguousarray(return_az).astype(_np.float64)
+    return_az_p = return_az.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_el.shape == (1,)
+    return_el = _np.ascontiguousarray(return_el).astype(_np.float64)
+    return_el_p = return_el.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.spa_az_el_from_terms(terms_p, lat, lon, elevation, pressure, temperature, return_az_p, return_el_p)
+    return (return_az[0], return_el[0])
+
+def _profiled_spa_az_el_from_terms(terms, lat, lon, elevation, pressure, temperature):
+    _t0 = _perf_counter()
+    return_az = _np.zeros((1,), dtype=_np.float64)
+    return_el = _np.zeros((1,), dtype=_np.float64)
+    assert terms.shape == (4,)
+    terms = _np.ascontiguousarray(terms).astype(_np.float64)
+    terms_p = terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_az.shape == (1,)
+    return_az = _np.ascontiguousarray(return_az).astype(_np.float64)
+    return_az_p = return_az.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_el.shape == (1,)
+    return_el = _np.ascontiguousarray(return_el).astype(_np.float64)
+    return_el_p = return_el.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.spa_az_el_from_terms(terms_p, lat, lon, elevation, pressure, temperature, return_az_p, return_el_p)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_az_el_from_terms', _t1 - _t0, _t2 - _t1)
+    return (return_az[0], return_el[0])
+_profiling.register(spa_az_el_from_terms, _profiled_spa_az_el_from_terms)
+
+
+_lib.spa_az_el.argtypes = [_ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_int, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double, _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double)]
+def spa_az_el(year, month, day, hour, min, sec, delta_t, lat, lon, elevation, pressure, temperature):
+    r'''
+    Calculates the topocentric solar azimuth and elevation with the NREL SPA for a UTC time.
+
+    Args:
+        year: UTC year
+        month: UTC month
+        day: UTC day
+        hour: UTC hour
+        min: UTC minute
+        sec: UTC second, may include fractions of a second
+        delta_t: Difference between terrestrial time and UT1 in seconds, e.g. 69
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        elevation: Elevation of the site in meters
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+
+    Returns:
+        return_az: Azimuth in degrees, eastward from north
+        return_el: Elevation in degrees, corrected for atmospheric refraction
+
+    '''
+    return_az = _np.zeros((1,), dtype=_np.float64)
+    return_el = _np.zeros((1,), dtype=_np.float64)
+    assert return_az.shape == (1,)
+    return_az = _np.ascontiguousarray(return_az).astype(_np.float64)
+    return_az_p = return_az.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_el.shape == (1,)
+    return_el = _np.ascontiguousarray(return_el).astype(_np.float64)
+    return_el_p = return_el.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.spa_az_el(year, month, day, hour, min, sec, delta_t, lat, lon, elevation, pressure, temperature, return_az_p, return_el_p)
+    return (return_az[0], return_el[0])
+
+def _profiled_spa_az_el(year, month, day, hour, min, sec, delta_t, lat, lon, elevation, pressure, temperature):
+    _t0 = _perf_counter()
+    return_az = _np.zeros((1,), dtype=_np.float64)
+    return_el = _np.zeros((1,), dtype=_np.float64)
+    assert return_az.shape == (1,)
+    return_az = _np.ascontiguousarray(return_az).astype(_np.float64)
+    return_az_p = return_az.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    assert return_el.shape == (1,)
+    return_el = _np.ascontiguousarray(return_el).astype(_np.float64)
+    return_el_p = return_el.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.spa_az_el(year, month, day, hour, min, sec, delta_t, lat, lon, elevation, pressure, temperature, return_az_p, return_el_p)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_az_el', _t1 - _t0, _t2 - _t1)
+    return (return_az[0], return_el[0])
+_profiling.register(spa_az_el, _profiled_spa_az_el)
+
+
+_lib.spa_time_terms_batch.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int, _ctypes.c_double]
+def spa_time_terms_batch(jd, delta_t):
+    r'''
+    Calculates spa_time_terms for every Julian Day in jd.
+
+    Args:
+        jd: Julian Days in UTC, see spa_julian_day.
+        n: Number of Julian Days, inferred from jd by the Python wrapper.
+        delta_t: Difference between terrestrial time and UT1 in seconds, e.g. 69.
+
+    Returns:
+        return_terms: (n, 4) terms of every Julian Day, see spa_time_terms.
+
+    '''
+    jd = _np.ascontiguousarray(jd, dtype=_np.float64)
+    n = jd.shape[0]
+    if jd.shape != (n,):
+        raise ValueError(f'jd must have shape {(n,)}, got {jd.shape}')
+    jd_p = jd.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_terms = _np.empty((n, 4), dtype=_np.float64)
+    return_terms_p = return_terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.spa_time_terms_batch(jd_p, return_terms_p, n, delta_t)
+    return (return_terms)
+
+def _profiled_spa_time_terms_batch(jd, delta_t):
+    _t0 = _perf_counter()
+    jd = _np.ascontiguousarray(jd, dtype=_np.float64)
+    n = jd.shape[0]
+    if jd.shape != (n,):
+        raise ValueError(f'jd must have shape {(n,)}, got {jd.shape}')
+    jd_p = jd.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_terms = _np.empty((n, 4), dtype=_np.float64)
+    return_terms_p = return_terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.spa_time_terms_batch(jd_p, return_terms_p, n, delta_t)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_time_terms_batch', _t1 - _t0, _t2 - _t1)
+    return (return_terms)
+_profiling.register(spa_time_terms_batch, _profiled_spa_time_terms_batch)
+
+
+_lib.spa_az_el_grid.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.c_int, _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int, _ctypes.c_double, _ctypes.c_double, _ctypes.c_int, _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+_lib.spa_az_el_grid.restype = _ctypes.c_int
+def spa_az_el_grid(terms, lat, lon, elevation, pressure, temperature, site_major, az, el):
+    r'''
+    Calculates the topocentric solar azimuth and elevation of every site at every timestamp,
+    reusing the terms of each timestamp for all sites.
+
+    Args:
+        terms: (n_times, 4) output of spa_time_terms_batch.
+        lat: Latitudes of the sites in degrees
+        lon: Longitudes of the sites in degrees
+        elevation: Elevations of the sites in meters
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+        site_major: 0 to store the results in row-major (time, site) order, 1 for (site, time).
+        az: n_times * n_sites array that receives the azimuths in degrees.
+        el: n_times * n_sites array that receives the refraction corrected elevations in degrees.
+
+    Returns:
+        0 on success, -1 if n is not n_times * n_sites.
+
+    '''
+    terms = _np.ascontiguousarray(terms, dtype=_np.float64)
+    n_times = terms.shape[0]
+    if terms.shape != (n_times, 4):
+        raise ValueError(f'terms must have shape {(n_times, 4)}, got {terms.shape}')
+    terms_p = terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    lat = _np.ascontiguousarray(lat, dtype=_np.float64)
+    lon = _np.ascontiguousarray(lon, dtype=_np.float64)
+    elevation = _np.ascontiguousarray(elevation, dtype=_np.float64)
+    n_sites = lat.shape[0]
+    if lat.shape != (n_sites,):
+        raise ValueError(f'lat must have shape {(n_sites,)}, got {lat.shape}')
+    lat_p = lat.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if lon.shape != (n_sites,):
+        raise ValueError(f'lon must have shape {(n_sites,)}, got {lon.shape}')
+    lon_p = lon.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if elevation.shape != (n_sites,):
+        raise ValueError(f'elevation must have shape {(n_sites,)}, got {elevation.shape}')
+    elevation_p = elevation.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if not (isinstance(az, _np.ndarray) and az.dtype == _np.float64 and az.flags.c_contiguous):
+        raise TypeError('az is written in place and must be a C-contiguous double array')
+    if not (isinstance(el, _np.ndarray) and el.dtype == _np.float64 and el.flags.c_contiguous):
+        raise TypeError('el is written in place and must be a C-contiguous double array')
+    n = az.shape[0]
+    if az.shape != (n,):
+        raise ValueError(f'az must have shape {(n,)}, got {az.shape}')
+    az_p = az.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if el.shape != (n,):
+        raise ValueError(f'el must have shape {(n,)}, got {el.shape}')
+    el_p = el.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return _lib.spa_az_el_grid(terms_p, n_times, lat_p, lon_p, elevation_p, n_sites, pressure, temperature, site_major, az_p, el_p, n)
+
+def _profiled_spa_az_el_grid(terms, lat, lon, elevation, pressure, temperature, site_major, az, el):
+    _t0 = _perf_counter()
+    terms = _np.ascontiguousarray(terms, dtype=_np.float64)
+    n_times = terms.shape[0]
+    if terms.shape != (n_times, 4):
+        raise ValueError(f'terms must have shape {(n_times, 4)}, got {terms.shape}')
+    terms_p = terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    lat = _np.ascontiguousarray(lat, dtype=_np.float64)
+    lon = _np.ascontiguousarray(lon, dtype=_np.float64)
+    elevation = _np.ascontiguousarray(elevation, dtype=_np.float64)
+    n_sites = lat.shape[0]
+    if lat.shape != (n_sites,):
+        raise ValueError(f'lat must have shape {(n_sites,)}, got {lat.shape}')
+    lat_p = lat.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if lon.shape != (n_sites,):
+        raise ValueError(f'lon must have shape {(n_sites,)}, got {lon.shape}')
+    lon_p = lon.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if elevation.shape != (n_sites,):
+        raise ValueError(f'elevation must have shape {(n_sites,)}, got {elevation.shape}')
+    elevation_p = elevation.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if not (isinstance(az, _np.ndarray) and az.dtype == _np.float64 and az.flags.c_contiguous):
+        raise TypeError('az is written in place and must be a C-contiguous double array')
+    if not (isinstance(el, _np.ndarray) and el.dtype == _np.float64 and el.flags.c_contiguous):
+        raise TypeError('el is written in place and must be a C-contiguous double array')
+    n = az.shape[0]
+    if az.shape != (n,):
+        raise ValueError(f'az must have shape {(n,)}, got {az.shape}')
+    az_p = az.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if el.shape != (n,):
+        raise ValueError(f'el must have shape {(n,)}, got {el.shape}')
+    el_p = el.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _result = _lib.spa_az_el_grid(terms_p, n_times, lat_p, lon_p, elevation_p, n_sites, pressure, temperature, site_major, az_p, el_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_az_el_grid', _t1 - _t0, _t2 - _t1)
+    return _result
+_profiling.register(spa_az_el_grid, _profiled_spa_az_el_grid)
+
+
+_lib.spa_accumulate_sites.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.c_int, _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int, _ctypes.c_double, _ctypes.c_double, _ctypes.c_double]
+def spa_accumulate_sites(terms, lat, lon, elevation, daylight_hours, cosine_hours, max_elevation, pressure, temperature, interval_hours):
+    r'''
+    Adds the sun statistics of every site over the timestamps of terms to running totals,
+    without storing the positions, so that a year can be summarised in chunks.
+
+    Args:
+        terms: (n_times, 4) output of spa_time_terms_batch.
+        lat: Latitudes of the sites in degrees
+        lon: Longitudes of the sites in degrees
+        elevation: Elevations of the sites in meters
+        daylight_hours: Running total of the hours with the centre of the sun above the horizon.
+        cosine_hours: Running total of the sine of the sun elevation times the hours, i.e. the
+            insolation on a horizontal surface in kWh/m^2 per kW/m^2 of direct normal irradiance.
+        max_elevation: Running maximum of the sun elevation in degrees.
+        pressure: Annual average local pressure in millibars, e.g. 1013.25
+        temperature: Annual average local temperature in degrees Celsius, e.g. 12
+        interval_hours: Hours represented by each timestamp.
+
+    '''
+    terms = _np.ascontiguousarray(terms, dtype=_np.float64)
+    n_times = terms.shape[0]
+    if terms.shape != (n_times, 4):
+        raise ValueError(f'terms must have shape {(n_times, 4)}, got {terms.shape}')
+    terms_p = terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    lat = _np.ascontiguousarray(lat, dtype=_np.float64)
+    lon = _np.ascontiguousarray(lon, dtype=_np.float64)
+    elevation = _np.ascontiguousarray(elevation, dtype=_np.float64)
+    if not (isinstance(daylight_hours, _np.ndarray) and daylight_hours.dtype == _np.float64 and daylight_hours.flags.c_contiguous):
+        raise TypeError('daylight_hours is written in place and must be a C-contiguous double array')
+    if not (isinstance(cosine_hours, _np.ndarray) and cosine_hours.dtype == _np.float64 and cosine_hours.flags.c_contiguous):
+        raise TypeError('cosine_hours is written in place and must be a C-contiguous double array')
+    if not (isinstance(max_elevation, _np.ndarray) and max_elevation.dtype == _np.float64 and max_elevation.flags.c_contiguous):
+        raise TypeError('max_elevation is written in place and must be a C-contiguous double array')
+    n_sites = lat.shape[0]
+    if lat.shape != (n_sites,):
+        raise ValueError(f'lat must have shape {(n_sites,)}, got {lat.shape}')
+    lat_p = lat.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if lon.shape != (n_sites,):
+        raise ValueError(f'lon must have shape {(n_sites,)}, got {lon.shape}')
+    lon_p = lon.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if elevation.shape != (n_sites,):
+        raise ValueError(f'elevation must have shape {(n_sites,)}, got {elevation.shape}')
+    elevation_p = elevation.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if daylight_hours.shape != (n_sites,):
+        raise ValueError(f'daylight_hours must have shape {(n_sites,)}, got {daylight_hours.shape}')
+    daylight_hours_p = daylight_hours.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if cosine_hours.shape != (n_sites,):
+        raise ValueError(f'cosine_hours must have shape {(n_sites,)}, got {cosine_hours.shape}')
+    cosine_hours_p = cosine_hours.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if max_elevation.shape != (n_sites,):
+        raise ValueError(f'max_elevation must have shape {(n_sites,)}, got {max_elevation.shape}')
+    max_elevation_p = max_elevation.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.spa_accumulate_sites(terms_p, n_times, lat_p, lon_p, elevation_p, daylight_hours_p, cosine_hours_p, max_elevation_p, n_sites, pressure, temperature, interval_hours)
+    return ()
+
+def _profiled_spa_accumulate_sites(terms, lat, lon, elevation, daylight_hours, cosine_hours, max_elevation, pressure, temperature, interval_hours):
+    _t0 = _perf_counter()
+    terms = _np.ascontiguousarray(terms, dtype=_np.float64)
+    n_times = terms.shape[0]
+    if terms.shape != (n_times, 4):
+        raise ValueError(f'terms must have shape {(n_times, 4)}, got {terms.shape}')
+    terms_p = terms.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    lat = _np.ascontiguousarray(lat, dtype=_np.float64)
+    lon = _np.ascontiguousarray(lon, dtype=_np.float64)
+    elevation = _np.ascontiguousarray(elevation, dtype=_np.float64)
+    if not (isinstance(daylight_hours, _np.ndarray) and daylight_hours.dtype == _np.float64 and daylight_hours.flags.c_contiguous):
+        raise TypeError('daylight_hours is written in place and must be a C-contiguous double array')
+    if not (isinstance(cosine_hours, _np.ndarray) and cosine_hours.dtype == _np.float64 and cosine_hours.flags.c_contiguous):
+        raise TypeError('cosine_hours is written in place and must be a C-contiguous double array')
+    if not (isinstance(max_elevation, _np.ndarray) and max_elevation.dtype == _np.float64 and max_elevation.flags.c_contiguous):
+        raise TypeError('max_elevation is written in place and must be a C-contiguous double array')
+    n_sites = lat.shape[0]
+    if lat.shape != (n_sites,):
+        raise ValueError(f'lat must have shape {(n_sites,)}, got {lat.shape}')
+    lat_p = lat.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if lon.shape != (n_sites,):
+        raise ValueError(f'lon must have shape {(n_sites,)}, got {lon.shape}')
+    lon_p = lon.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if elevation.shape != (n_sites,):
+        raise ValueError(f'elevation must have shape {(n_sites,)}, got {elevation.shape}')
+    elevation_p = elevation.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if daylight_hours.shape != (n_sites,):
+        raise ValueError(f'daylight_hours must have shape {(n_sites,)}, got {daylight_hours.shape}')
+    daylight_hours_p = daylight_hours.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if cosine_hours.shape != (n_sites,):
+        raise ValueError(f'cosine_hours must have shape {(n_sites,)}, got {cosine_hours.shape}')
+    cosine_hours_p = cosine_hours.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if max_elevation.shape != (n_sites,):
+        raise ValueError(f'max_elevation must have shape {(n_sites,)}, got {max_elevation.shape}')
+    max_elevation_p = max_elevation.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.spa_accumulate_sites(terms_p, n_times, lat_p, lon_p, elevation_p, daylight_hours_p, cosine_hours_p, max_elevation_p, n_sites, pressure, temperature, interval_hours)
+    _t2 = _perf_counter()
+    _profiling.record('spa.spa_accumulate_sites', _t1 - _t0, _t2 - _t1)
+    return ()
+_profiling.register(spa_accumulate_sites, _profiled_spa_accumulate_sites)
+
@@ -0,0 +1,251 @@
+import ctypes as _ctypes
+from pathlib import Path as _Path
+import numpy as _np
+from time import perf_counter as _perf_counter
+from . import _profiling
+_this_dir = _Path(__file__).parent.absolute()
+_lib = _ctypes.CDLL(str(_this_dir / 'gcc/trig.dll'))
+
+
+_lib.trig_sin.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def trig_sin(x):
+    r'''
+    Calculates the sine of every element of x.
+
+    Args:
+        x: Angles in radians.
+
+    Returns:
+        return_y: The sines.
+
+    '''
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.trig_sin(x_p, return_y_p, n)
+    return (return_y)
+
+def _profiled_trig_sin(x):
+    _t0 = _perf_counter()
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.trig_sin(x_p, return_y_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('trig.trig_sin', _t1 - _t0, _t2 - _t1)
+    return (return_y)
+_profiling.register(trig_sin, _profiled_trig_sin)
+
+
+_lib.trig_cos.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def trig_cos(x):
+    r'''
+    Calculates the cosine of every element of x.
+
+    Args:
+        x: Angles in radians.
+
+    Returns:
+        return_y: The cosines.
+
+    '''
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.trig_cos(x_p, return_y_p, n)
+    return (return_y)
+
+def _profiled_trig_cos(x):
+    _t0 = _perf_counter()
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.trig_cos(x_p, return_y_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('trig.trig_cos', _t1 - _t0, _t2 - _t1)
+    return (return_y)
+_profiling.register(trig_cos, _profiled_trig_cos)
+
+
+_lib.trig_tan.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def trig_tan(x):
+    r'''
+    Calculates the tangent of every element of x.
+
+    Args:
+        x: Angles in radians.
+
+    Returns:
+        return_y: The tangents.
+
+    '''
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.trig_tan(x_p, return_y_p, n)
+    return (return_y)
+
+def _profiled_trig_tan(x):
+    _t0 = _perf_counter()
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.trig_tan(x_p, return_y_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('trig.trig_tan', _t1 - _t0, _t2 - _t1)
+    return (return_y)
+_profiling.register(trig_tan, _profiled_trig_tan)
+
+
+_lib.trig_asin.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def trig_asin(x):
+    r'''
+    Calculates the arcsine of every element of x.
+
+    Args:
+        x: Values in [-1, 1].
+
+    Returns:
+        return_y: The arcsines in radians.
+
+    '''
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.trig_asin(x_p, return_y_p, n)
+    return (return_y)
+
+def _profiled_trig_asin(x):
+    _t0 = _perf_counter()
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.trig_asin(x_p, return_y_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('trig.trig_asin', _t1 - _t0, _t2 - _t1)
+    return (return_y)
+_profiling.register(trig_asin, _profiled_trig_asin)
+
+
+_lib.trig_atan.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def trig_atan(x):
+    r'''
+    Calculates the arctangent of every element of x.
+
+    Args:
+        x: The values.
+
+    Returns:
+        return_y: The arctangents in radians.
+
+    '''
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.trig_atan(x_p, return_y_p, n)
+    return (return_y)
+
+def _profiled_trig_atan(x):
+    _t0 = _perf_counter()
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = x.shape[0]
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_y = _np.empty((n,), dtype=_np.float64)
+    return_y_p = return_y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.trig_atan(x_p, return_y_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('trig.trig_atan', _t1 - _t0, _t2 - _t1)
+    return (return_y)
+_profiling.register(trig_atan, _profiled_trig_atan)
+
+
+_lib.trig_atan2.argtypes = [_ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.POINTER(_ctypes.c_double), _ctypes.c_int]
+def trig_atan2(y, x):
+    r'''
+    Calculates the four quadrant arctangent of every pair of y and x.
+
+    Args:
+        y: The y coordinates.
+        x: The x coordinates.
+
+    Returns:
+        return_z: The angles in radians.
+
+    '''
+    y = _np.ascontiguousarray(y, dtype=_np.float64)
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = y.shape[0]
+    if y.shape != (n,):
+        raise ValueError(f'y must have shape {(n,)}, got {y.shape}')
+    y_p = y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_z = _np.empty((n,), dtype=_np.float64)
+    return_z_p = return_z.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _lib.trig_atan2(y_p, x_p, return_z_p, n)
+    return (return_z)
+
+def _profiled_trig_atan2(y, x):
+    _t0 = _perf_counter()
+    y = _np.ascontiguousarray(y, dtype=_np.float64)
+    x = _np.ascontiguousarray(x, dtype=_np.float64)
+    n = y.shape[0]
+    if y.shape != (n,):
+        raise ValueError(f'y must have shape {(n,)}, got {y.shape}')
+    y_p = y.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    if x.shape != (n,):
+        raise ValueError(f'x must have shape {(n,)}, got {x.shape}')
+    x_p = x.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    return_z = _np.empty((n,), dtype=_np.float64)
+    return_z_p = return_z.ctypes.data_as(_ctypes.POINTER(_ctypes.c_double))
+    _t1 = _perf_counter()
+    _lib.trig_atan2(y_p, x_p, return_z_p, n)
+    _t2 = _perf_counter()
+    _profiling.record('trig.trig_atan2', _t1 - _t0, _t2 - _t1)
+    return (return_z)
+_profiling.register(trig_atan2, _profiled_trig_atan2)
+
@@ -1,12 +1,9 @@
-import pvlib
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import pandas as pd
 import numpy as np
 
-
-def flatten(lst):
-    return [item for sublist in lst for item in sublist]
+from sun_path import get_sun_path, bin_sun_path
 
 
 def to_180_form(degrees):
@@ -21,31 +18,23 @@ def plot_solar_path(latitude, longitude, degree_offset, date):
     # Normalize colors
     norm = plt.Normalize(vmin=0, vmax=23)
 
-    for date in flatten(
-        [
-            [f"2023-{i:02d}-{int(j)}" for j in np.linspace(1, 31, 10)]
-            for i in range(1, 13)
-        ]
-    ):
-        try:
-            times = pd.date_range(
-                date, periods=24 * 60, freq="1T"
-            )  # Generating timestamps for every minute of the day
-        except pd._libs.tslibs.parsing.DateParseError:
-            continue
-
-        solar_position = pvlib.solarposition.get_solarposition(
-            times, latitude, longitude
-        )
-        solar_position = solar_position[solar_position["elevation"] >= 0]
-        sc = ax1.scatter(
-            to_180_form(solar_position.azimuth + degree_offset),
-            solar_position.elevation,
-            c=solar_position.index.hour,
-            cmap="bwr",
-            norm=norm,
-            s=10,
-        )
+    sun_path = get_sun_path(latitude, longitude, year=pd.Timestamp(date).year)
+
+    # Aggregate the dense point cloud into bins before handing it to matplotlib
+    azimuth, elevation, hour = bin_sun_path(
+        to_180_form(sun_path.azimuth.to_numpy() + degree_offset),
+        sun_path.elevation.to_numpy(),
+        sun_path.hour.to_numpy(),
+        statistic="nearest",
+    )
+    sc = ax1.scatter(
+        azimuth,
+        elevation,
+        c=hour,
+        cmap="bwr",
+        norm=norm,
+        s=10,
+    )
 
     ax1.set_title("North-facing 2D Curve")
     ax1.set_xlabel("Degrees from North (0=North, 180=South)")
@@ -0,0 +1,178 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from helioc.math_functions import get_degrees_batch
+
+
+class AxisLimits:
+    """
+    Limits of one actuator axis.
+
+    Parameters:
+        minimum (float): Lowest reachable position in degrees.
+        maximum (float): Highest reachable position in degrees.
+        max_rate (float): Maximum slew rate in degrees per second.
+        max_acceleration (float): Maximum acceleration in degrees per second squared.
+        wraps (bool): Whether positions 360 degrees apart are equivalent, see `to_180_form`.
+    """
+
+    def __init__(self, minimum, maximum, max_rate, max_acceleration, wraps=True):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.max_rate = max_rate
+        self.max_acceleration = max_acceleration
+        self.wraps = wraps
+
+    def __repr__(self):
+        return (
+            f"AxisLimits({self.minimum}, {self.maximum}, {self.max_rate}, "
+            f"{self.max_acceleration}, wraps={self.wraps})"
+        )
+
+
+# degrees_from_north and degrees_elevation axes as returned by get_degrees
+default_axes = (
+    AxisLimits(-90, 90, 0.5, 0.1, wraps=False),
+    AxisLimits(-270, 270, 0.5, 0.1, wraps=True),
+)
+
+
+def normals_to_degrees(normals):
+    """
+    helioc `get_degrees` for arrays of normals of any shape, see `get_degrees_batch`.
+
+    Parameters:
+        normals (np.array): Normals of shape (..., 3).
+
+    Returns:
+        np.array: degrees_from_north and degrees_elevation of shape (..., 2).
+    """
+    normals = np.asarray(normals, dtype=np.float64)
+    return get_degrees_batch(normals.reshape(-1, 3)).reshape(normals.shape[:-1] + (2,))
+
+
+def _seconds(times):
+    if isinstance(times, (pd.DatetimeIndex, pd.Series)) or np.issubdtype(
+        np.asarray(times).dtype, np.datetime64
+    ):
+        times = pd.DatetimeIndex(times)
+        return np.asarray((times - times[0]) / pd.Timedelta(seconds=1), dtype=np.float64)
+    return np.asarray(times, dtype=np.float64)
+
+
+def _closest_equivalent(target, position, axis):
+    """Picks the equivalent of `target` within the limits of `axis` closest to `position`."""
+    if not axis.wraps:
+        return target
+    target = target + 360.0 * np.round((position - target) / 360.0)
+    target = np.where(target > axis.maximum, target - 360.0, target)
+    target = np.where(target < axis.minimum, target + 360.0, target)
+    return target
+
+
+def plan_trajectories(degrees, times, axes=default_axes, start_degrees=None, tolerance=0.1):
+    """
+    Plan rate- and acceleration-limited actuator trajectories for a whole field.
+
+    The targets are followed one timestep at a time, vectorized over all mirrors.
+    On wrapping axes every target is replaced by its 360 degree equivalent within
+    the axis limits that is closest to the current position, so the drives take
+    the shortest motion. The velocity towards the target is limited so that the
+    drive can still brake in time, and to the rate and acceleration limits.
+
+    Parameters:
+        degrees (np.array): Target actuator angles of shape (mirrors, times, 2), e.g.
+            from `normals_to_degrees` or `get_degrees`.
+        times (np.array or pd.DatetimeIndex): Times of the targets, in seconds if numeric.
+        axes (tuple): `AxisLimits` of both axes.
+        start_degrees (np.array): (mirrors, 2) starting positions, defaults to the first targets.
+        tolerance (float): Largest error in degrees that still counts as on target.
+
+    Returns:
+        SimpleNamespace: positions and velocities of shape (mirrors, times, 2), targets
+        (the wrap-resolved targets) and reachable, a (mirrors, times) boolean array that
+        is False where a target lies outside the limits or the drive lags by more than
+        `tolerance`.
+    """
+
+    degrees = np.asarray(degrees, dtype=np.float64)
+    seconds = _seconds(times)
+    n_mirrors, n_times = degrees.shape[:2]
+
+    minimum = np.array([axis.minimum for axis in axes])
+    maximum = np.array([axis.maximum for axis in axes])
+    max_rate = np.array([axis.max_rate for axis in axes])
+    max_acceleration = np.array([axis.max_acceleration for axis in axes])
+
+    positions = np.empty_like(degrees)
+    velocities = np.zeros_like(degrees)
+    targets = np.empty_like(degrees)
+    reachable = np.ones((n_mirrors, n_times), dtype=bool)
+
+    if start_degrees is None:
+        position = degrees[:, 0].copy()
+        for i, axis in enumerate(axes):
+            position[:, i] = _closest_equivalent(position[:, i], position[:, i], axis)
+        position = np.clip(position, minimum, maximum)
+    else:
+        position = np.array(start_degrees, dtype=np.float64)
+    velocity = np.zeros((n_mirrors, 2))
+
+    for k in range(n_times):
+        target = np.empty((n_mirrors, 2))
+        for i, axis in enumerate(axes):
+            target[:, i] = _closest_equivalent(degrees[:, k, i], position[:, i], axis)
+        within_limits = np.all((target >= minimum) & (target <= maximum), axis=1)
+        target = np.clip(target, minimum, maximum)
+
+        if k > 0:
+            dt = seconds[k] - seconds[k - 1]
+            error = target - position
+
+            # Fastest speed from which the drive can still brake before the target
+            speed = np.minimum(np.abs(error) / dt, np.sqrt(2 * max_acceleration * np.abs(error)))
+            desired = np.sign(error) * np.minimum(speed, max_rate)
+            velocity = np.clip(
+                desired,
+                velocity - max_acceleration * dt,
+                velocity + max_acceleration * dt,
+            )
+            position = np.clip(position + velocity * dt, minimum, maximum)
+
+        positions[:, k] = position
+        velocities[:, k] = velocity
+        targets[:, k] = target
+        reachable[:, k] = within_limits & np.all(
+            np.abs(target - position) <= tolerance, axis=1
+        )
+
+    return SimpleNamespace(
+        positions=positions, velocities=velocities, targets=targets, reachable=reachable
+    )
+
+
+def unreachable_intervals(reachable, times):
+    """
+    List the intervals in which each mirror is off target.
+
+    Parameters:
+        reachable (np.array): (mirrors, times) boolean array from `plan_trajectories`.
+        times (np.array or pd.DatetimeIndex): The times of the trajectory.
+
+    Returns:
+        pd.DataFrame: One row per interval with columns mirror, start and end.
+    """
+
+    padded = np.zeros((reachable.shape[0], reachable.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = ~reachable
+    changes = np.diff(padded, axis=1)
+    mirrors, starts = np.nonzero(changes == 1)
+    _, ends = np.nonzero(changes == -1)
+
+    times = np.asarray(times)
+    return pd.DataFrame(
+        {"mirror": mirrors, "start": times[starts], "end": times[ends - 1]}
+    )
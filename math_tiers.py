@@ -0,0 +1,263 @@
+r"""
+Validates the accuracy tiers of the helioc trigonometric functions, see helioc/c/math_tier.h.
+
+Build the tiers first, e.g. with `set HELIOC_TIERS=exact,fast,coarse` before running
+`compile.py`, then run this script to check every documented error bound and to print
+the kernel level errors and speedups.
+"""
+
+import importlib
+import time
+
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from compile import precision_suffix, tier_suffix
+
+
+# Largest absolute error of sin, cos, asin, atan and atan2 per tier, as documented in math_tier.h
+documented_bounds = {
+    "exact": 1e-15,
+    "fast": 5e-8,
+    "coarse": 5e-5,
+}
+
+
+def tier_module(name, tier="exact", precision="double"):
+    """
+    Returns the helioc module `name` built with an accuracy tier and precision, e.g.
+    `tier_module("spa", "fast").spa_az_el`, so the tier can be chosen at call time.
+    """
+    module = f"helioc.{name}{precision_suffix[precision]}{tier_suffix[tier]}"
+    try:
+        return importlib.import_module(module)
+    except (ImportError, OSError) as error:
+        raise ImportError(
+            f"{module} is not built, compile with HELIOC_TIERS={tier} and HELIOC_PRECISIONS={precision}"
+        ) from error
+
+
+def _magnitudes(rng, samples, low, high):
+    """Random values with log-uniform magnitudes in [10**low, 10**high] and random signs."""
+    return rng.choice([-1.0, 1.0], samples) * 10 ** rng.uniform(low, high, samples)
+
+
+def primitive_inputs(samples=1_000_000, seed=0):
+    """
+    Inputs that cover the whole domain of every function: a dense sweep of the interval
+    the polynomials are evaluated on, random magnitudes over the full range, and the
+    edges of the range reduction.
+    """
+    rng = np.random.default_rng(seed)
+    quarter_turns = np.arange(-64, 65) * np.pi / 4
+    edges = np.concatenate([quarter_turns, np.nextafter(quarter_turns, np.inf), np.nextafter(quarter_turns, -np.inf)])
+    angles = np.concatenate(
+        [
+            np.linspace(-2 * np.pi, 2 * np.pi, samples),
+            _magnitudes(rng, samples, -300, 6),
+            edges,
+            [0.0, -0.0, 1e6 - 1],
+        ]
+    )
+
+    ratios = np.concatenate(
+        [
+            np.linspace(-1, 1, samples),
+            1 - 10 ** rng.uniform(-16, 0, samples),
+            -1 + 10 ** rng.uniform(-16, 0, samples),
+        ]
+    )
+
+    tangents = np.concatenate(
+        [
+            np.linspace(-4, 4, samples),
+            _magnitudes(rng, samples, -300, 300),
+            np.tan(np.array([-np.pi / 12, np.pi / 12])),
+            [-1.0, 1.0, 0.0, np.inf, -np.inf],
+        ]
+    )
+
+    directions = rng.uniform(-np.pi, np.pi, samples)
+    radii = 10 ** rng.uniform(-150, 150, samples)
+    y = np.concatenate([np.sin(directions) * radii, [0.0, 1.0, -1.0, 0.0, 1.0, -1.0, 1.0, -1.0]])
+    x = np.concatenate([np.cos(directions) * radii, [1.0, 0.0, 0.0, -1.0, 1.0, 1.0, -1.0, -1.0]])
+
+    return {"angles": angles, "ratios": ratios, "tangents": tangents, "y": y, "x": x}
+
+
+def validate_primitives(tier, precision="double", samples=1_000_000, seed=0):
+    """
+    Calculate the largest absolute error of every trigonometric function of a tier
+    against NumPy over `primitive_inputs`.
+
+    Parameters:
+    - tier (str): One of the tiers in compile.tier_suffix.
+    - precision (str): One of the precisions in compile.precision_suffix.
+    - samples (int): Number of inputs per sweep.
+    - seed (int): Seed of the random inputs.
+
+    Returns:
+    - pd.DataFrame: One row per function with the samples, the max error, the
+                    documented bound and whether the bound holds.
+    """
+    trig = tier_module("trig", tier, precision)
+    inputs = primitive_inputs(samples, seed)
+    angles, ratios, tangents = inputs["angles"], inputs["ratios"], inputs["tangents"]
+
+    # tan is unbounded, so its error is measured as the error of the angle it encodes
+    tan_angles = np.arctan(np.tan(angles))
+    errors = {
+        "sin": np.abs(trig.trig_sin(angles) - np.sin(angles)),
+        "cos": np.abs(trig.trig_cos(angles) - np.cos(angles)),
+        "tan (as angle)": np.abs(np.arctan(trig.trig_tan(angles)) - tan_angles),
+        "asin": np.abs(trig.trig_asin(ratios) - np.arcsin(ratios)),
+        "atan": np.abs(trig.trig_atan(tangents) - np.arctan(tangents)),
+        "atan2": np.abs(trig.trig_atan2(inputs["y"], inputs["x"]) - np.arctan2(inputs["y"], inputs["x"])),
+    }
+
+    bound = documented_bounds[tier] if precision == "double" else max(documented_bounds[tier], 1e-6)
+    return pd.DataFrame(
+        [
+            {
+                "function": name,
+                "samples": len(error),
+                "max_error": error.max(),
+                "bound": 2 * bound if name.startswith("tan") else bound,
+                "ok": error.max() <= (2 * bound if name.startswith("tan") else bound),
+            }
+            for name, error in errors.items()
+        ]
+    ).set_index("function")
+
+
+def _angle_between(a, b):
+    chord = np.linalg.norm(a / np.linalg.norm(a, axis=-1, keepdims=True) - b / np.linalg.norm(b, axis=-1, keepdims=True), axis=-1)
+    return np.degrees(2 * np.arcsin(np.clip(chord / 2, 0, 1)))
+
+
+def _wrapped_difference(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180.0) % 360.0 - 180.0)
+
+
+def validate_kernels(tier, precision="double", samples=2000, seed=0):
+    """
+    Calculate the error of the helioc kernels of a tier against the exact double build,
+    in degrees, over random inputs from their whole domain.
+
+    Returns:
+    - pd.DataFrame: One row per kernel output with the mean and max error in degrees.
+    """
+    rng = np.random.default_rng(seed)
+    exact_mf, tier_mf = tier_module("math_functions"), tier_module("math_functions", tier, precision)
+    exact_sp, tier_sp = tier_module("solar_position"), tier_module("solar_position", tier, precision)
+    exact_spa, tier_spa = tier_module("spa"), tier_module("spa", tier, precision)
+
+    degrees = np.column_stack([rng.uniform(-180, 180, samples), rng.uniform(-90, 90, samples)])
+    normals = rng.normal(size=(samples, 3))
+    exact_degrees = exact_mf.get_degrees_batch(normals)
+    tier_degrees = tier_mf.get_degrees_batch(normals)
+
+    errors = {
+        "get_normal_vector": _angle_between(
+            exact_mf.get_normal_vector_batch(degrees), tier_mf.get_normal_vector_batch(degrees)
+        ),
+        # The angles are compared through the normals they encode, which is what the mirror sees
+        "get_degrees": _angle_between(
+            exact_mf.get_normal_vector_batch(exact_degrees),
+            exact_mf.get_normal_vector_batch(tier_degrees.astype(np.float64)),
+        ),
+    }
+
+    times = pd.Timestamp("2000-01-01", tz="UTC") + pd.to_timedelta(
+        rng.uniform(0, 50 * 365.25 * 86400, samples), unit="s"
+    )
+    latitudes = rng.uniform(-90, 90, samples)
+    longitudes = rng.uniform(-180, 180, samples)
+    solar_az_el_errors = [[], []]
+    spa_errors = [[], []]
+    for t, latitude, longitude in zip(times, latitudes, longitudes):
+        args = (t.year, t.month, t.day, t.hour, t.minute, t.second)
+        exact = exact_sp.solar_az_el(*args, latitude, longitude, 0)
+        approximate = tier_sp.solar_az_el(*args, latitude, longitude, 0)
+        solar_az_el_errors[0].append(_wrapped_difference(exact[0], approximate[0]) * np.cos(np.radians(exact[1])))
+        solar_az_el_errors[1].append(abs(exact[1] - approximate[1]))
+
+        exact = exact_spa.spa_az_el(*args, 67.0, latitude, longitude, 0, 1013.25, 12)
+        approximate = tier_spa.spa_az_el(*args, 67.0, latitude, longitude, 0, 1013.25, 12)
+        spa_errors[0].append(_wrapped_difference(exact[0], approximate[0]) * np.cos(np.radians(exact[1])))
+        spa_errors[1].append(abs(exact[1] - approximate[1]))
+
+    # Azimuth errors are scaled by the cosine of the elevation, i.e. measured on the sky
+    errors["solar_az_el azimuth"] = solar_az_el_errors[0]
+    errors["solar_az_el elevation"] = solar_az_el_errors[1]
+    errors["spa_az_el azimuth"] = spa_errors[0]
+    errors["spa_az_el elevation"] = spa_errors[1]
+
+    return pd.DataFrame(
+        [
+            {"kernel": name, "mean_deg": np.mean(error), "max_deg": np.max(error), "max_arcsec": np.max(error) * 3600}
+            for name, error in errors.items()
+        ]
+    ).set_index("kernel")
+
+
+def _best_of(function, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(tiers=("exact", "fast", "coarse"), precision="double", samples=1_000_000, seed=0):
+    """
+    Time the batch kernels of every tier.
+
+    Returns:
+    - pd.DataFrame: Nanoseconds per element of every kernel (rows) and tier (columns).
+    """
+    rng = np.random.default_rng(seed)
+    angles = rng.uniform(-np.pi, np.pi, samples)
+    degrees = np.column_stack([rng.uniform(-180, 180, samples), rng.uniform(-90, 90, samples)])
+    normals = rng.normal(size=(samples, 3))
+    julian_days = rng.uniform(2451545.0, 2469807.5, samples // 100)
+
+    result = {}
+    for tier in tiers:
+        trig = tier_module("trig", tier, precision)
+        mf = tier_module("math_functions", tier, precision)
+        spa = tier_module("spa", tier, precision)
+        result[tier] = {
+            "sin": _best_of(lambda: trig.trig_sin(angles)) / samples * 1e9,
+            "atan2": _best_of(lambda: trig.trig_atan2(angles, angles[::-1])) / samples * 1e9,
+            "get_normal_vector_batch": _best_of(lambda: mf.get_normal_vector_batch(degrees)) / samples * 1e9,
+            "get_degrees_batch": _best_of(lambda: mf.get_degrees_batch(normals)) / samples * 1e9,
+            "spa_time_terms_batch": _best_of(lambda: spa.spa_time_terms_batch(julian_days, 67.0))
+            / len(julian_days)
+            * 1e9,
+        }
+    return pd.DataFrame(result)
+
+
+def validation_report(tiers=("fast", "coarse"), precision="double"):
+    """Checks the documented bounds of every tier and raises an AssertionError if one does not hold."""
+    reports = []
+    for tier in tiers:
+        report = validate_primitives(tier, precision)
+        reports.append(report.assign(tier=tier).set_index("tier", append=True))
+        failed = report[~report["ok"]]
+        if len(failed):
+            raise AssertionError(f"Error bounds of the {tier} tier do not hold:\n{failed}")
+    return pd.concat(reports)
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    print(validation_report())
+    for tier in ("fast", "coarse"):
+        print(f"\n{tier} kernels against exact:")
+        print(validate_kernels(tier))
+    print("\nns per element:")
+    print(benchmark())
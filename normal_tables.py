@@ -0,0 +1,330 @@
+from pathlib import Path
+
+import numpy as np
+
+import helioc  # noqa
+from helioc.math_functions import get_degrees_batch, get_normal_vector_batch
+
+
+# Unit normals are stored as int16, i.e. with a resolution of about 0.002 degrees
+_NORMAL_SCALE = 32767
+
+# Offsets of the four corners of a grid cell
+_corners = ((0, 0), (1, 0), (0, 1), (1, 1))
+
+_arrays = ("grid", "normals", "degrees", "usable", "mount_offset", "normal_error", "degrees_error")
+
+
+def _wrap(degrees):
+    return (degrees + 180.0) % 360.0 - 180.0
+
+
+def _angle_between(a, b):
+    chord = np.linalg.norm(a - b, axis=-1)
+    return np.degrees(2 * np.arcsin(np.clip(chord / 2, 0, 1)))
+
+
+def _grid(azimuth_step, elevation_step, elevation_range):
+    n_azimuth = int(round(360.0 / azimuth_step))
+    n_elevation = int(round((elevation_range[1] - elevation_range[0]) / elevation_step))
+    if not (np.isclose(n_azimuth * azimuth_step, 360.0) and n_elevation > 0):
+        raise ValueError("The steps must divide 360 degrees and the elevation range evenly")
+    # The azimuth 360 is kept as a separate column, so that every cell has four corners
+    return np.array([azimuth_step, elevation_step, elevation_range[0], n_azimuth + 1, n_elevation + 1])
+
+
+def _exact(vector_dests, azimuths, elevations):
+    """
+    Returns the (azimuths, elevations, heliostats, 3) unit normals, the (..., 2) degrees
+    and the (...) cosines of the angle of incidence.
+    """
+    azimuth_grid, elevation_grid = np.meshgrid(azimuths, elevations, indexing="ij")
+    # The sun ray of get_sunray is the negative of get_normal_vector for the same angles
+    rays = -get_normal_vector_batch(
+        np.stack([azimuth_grid.ravel(), elevation_grid.ravel()], axis=1)
+    )
+
+    normals = -rays[:, None, :] + vector_dests[None, :, :]
+    # Half the length of the sum of two unit vectors is the cosine of half their angle
+    cos_incidence = np.linalg.norm(normals, axis=2) / 2
+    normals /= np.maximum(2 * cos_incidence, 1e-300)[..., None]
+    degrees = get_degrees_batch(normals.reshape(-1, 3))
+
+    shape = azimuth_grid.shape + (len(vector_dests),)
+    return normals.reshape(shape + (3,)), degrees.reshape(shape + (2,)), cos_incidence.reshape(shape)
+
+
+class NormalTable:
+    """
+    Precomputed mirror normals and actuator angles of every heliostat over a grid
+    of sun azimuths and elevations, for a fixed target.
+
+    For a fixed mirror and target the normal only depends on the sun direction, so
+    in steady state `lookup` replaces the vector math by a bilinear interpolation
+    between the four surrounding grid points, in constant time per heliostat. The
+    tables are laid out as (azimuth, elevation, heliostat, component), so one sun
+    position reads four contiguous blocks of the whole field. Normals are stored as
+    int16, angles as float32 and the usable flags of the cells as bool, about 15
+    bytes per grid point and heliostat.
+
+    Near grazing incidence, where the sun is almost behind the target as seen from
+    the mirror, the normal turns quickly and cannot be interpolated, and neither can
+    degrees_elevation close to the gimbal singularity of the actuators. The error of
+    `lookup` is measured at the centre and the edge midpoints of every cell, where
+    the interpolation error of a smooth function peaks. A cell is flagged as usable,
+    see `is_usable`, if none of its corners has an angle of incidence above
+    `max_incidence` or a normal within `gimbal_margin` of the singularity, and the
+    measured errors of the normal and the angles are within `max_error`.
+    `normal_error` and `degrees_error` hold the largest measured error in degrees of
+    every heliostat over its usable cells.
+    """
+
+    def __init__(self, grid, normals, degrees, usable, mount_offset, normal_error, degrees_error):
+        self.grid = grid
+        self.normals = normals
+        self.degrees = degrees
+        self.usable = usable
+        self.mount_offset = mount_offset
+        self.normal_error = normal_error
+        self.degrees_error = degrees_error
+
+        self.azimuth_step, self.elevation_step, self.elevation_min = (float(i) for i in grid[:3])
+        self.n_azimuth, self.n_elevation = int(grid[3]), int(grid[4])
+        self.elevation_max = self.elevation_min + (self.n_elevation - 1) * self.elevation_step
+
+    def __len__(self):
+        return self.normals.shape[2]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in _arrays)
+
+    @classmethod
+    def build(
+        cls,
+        vector_dests,
+        mount_offset=None,
+        azimuth_step=1.0,
+        elevation_step=1.0,
+        elevation_range=(0.0, 90.0),
+        max_incidence=85.0,
+        gimbal_margin=5.0,
+        max_error=0.05,
+        path=None,
+        chunk_size=16,
+    ):
+        """
+        Tabulates the normals and angles of every heliostat.
+
+        Parameters:
+            vector_dests (np.array): (n, 3) directions from every mirror to the target,
+                see `FieldState.vector_dests`.
+            mount_offset (np.array): (n, 2) mount offsets subtracted from the angles like
+                in `FieldState.set_normals`, defaults to zeros.
+            azimuth_step (float): Grid spacing of the sun azimuth in degrees.
+            elevation_step (float): Grid spacing of the sun elevation in degrees.
+            elevation_range (tuple): Lowest and highest tabulated sun elevation in degrees.
+            max_incidence (float): Largest angle of incidence in degrees of a usable grid point.
+            gimbal_margin (float): Smallest angle in degrees between the normal of a usable
+                grid point and the x axis, where degrees_elevation is undefined.
+            max_error (float): Largest error in degrees of the interpolated normal and
+                angles within a usable cell.
+            path (str or Path): Write the tables memory-mapped to this directory instead
+                of keeping them in memory.
+            chunk_size (int): Number of heliostats computed at a time.
+
+        Returns:
+            NormalTable: The tables.
+        """
+        vector_dests = np.atleast_2d(np.asarray(vector_dests, dtype=np.float64))
+        vector_dests = vector_dests / np.linalg.norm(vector_dests, axis=1, keepdims=True)
+        n = len(vector_dests)
+        mount_offset = (
+            np.zeros((n, 2)) if mount_offset is None else np.asarray(mount_offset, dtype=np.float64)
+        )
+
+        grid = _grid(azimuth_step, elevation_step, elevation_range)
+        n_azimuth, n_elevation = int(grid[3]), int(grid[4])
+        shapes = {
+            "grid": (grid.shape, np.float64),
+            "normals": ((n_azimuth, n_elevation, n, 3), np.int16),
+            "degrees": ((n_azimuth, n_elevation, n, 2), np.float32),
+            "usable": ((n_azimuth - 1, n_elevation - 1, n), np.bool_),
+            "mount_offset": ((n, 2), np.float64),
+            "normal_error": ((n,), np.float64),
+            "degrees_error": ((n,), np.float64),
+        }
+        if path is not None:
+            Path(path).mkdir(exist_ok=True, parents=True)
+            arrays = {
+                name: np.lib.format.open_memmap(
+                    Path(path) / f"{name}.npy", mode="w+", dtype=dtype, shape=shape
+                )
+                for name, (shape, dtype) in shapes.items()
+            }
+        else:
+            arrays = {name: np.empty(shape, dtype=dtype) for name, (shape, dtype) in shapes.items()}
+        arrays["grid"][:] = grid
+        arrays["mount_offset"][:] = mount_offset
+        table = cls(**arrays)
+
+        # Half-step grid, whose odd points are the cell centres and edge midpoints
+        azimuths = np.arange(2 * n_azimuth - 1) * azimuth_step / 2
+        elevations = elevation_range[0] + np.arange(2 * n_elevation - 1) * elevation_step / 2
+        probe_azimuth, probe_elevation = np.meshgrid(azimuths, elevations, indexing="ij")
+        probes = (np.arange(len(azimuths))[:, None] % 2) | (np.arange(len(elevations))[None, :] % 2)
+        probes = probes.astype(bool)
+
+        for start in range(0, n, chunk_size):
+            chunk = slice(start, min(start + chunk_size, n))
+            normals, degrees, cos_incidence = _exact(vector_dests[chunk], azimuths, elevations)
+
+            table.normals[:, :, chunk] = np.round(normals[::2, ::2] * _NORMAL_SCALE)
+            table.degrees[:, :, chunk] = degrees[::2, ::2]
+            corners = (cos_incidence[::2, ::2] >= np.cos(np.radians(max_incidence))) & (
+                np.abs(normals[::2, ::2, :, 0]) <= np.cos(np.radians(gimbal_margin))
+            )
+
+            lookup_normals, lookup_degrees = table.lookup(
+                probe_azimuth[probes], probe_elevation[probes], np.arange(start, chunk.stop), mount_offset=False
+            )
+            errors = np.zeros(probes.shape + (2, chunk.stop - start))
+            errors[probes, 0] = _angle_between(lookup_normals, normals[probes])
+            errors[probes, 1] = np.abs(_wrap(lookup_degrees - degrees[probes])).max(axis=2)
+
+            # The largest error of every cell over its centre and edge midpoints
+            cell_errors = np.maximum.reduce(
+                [
+                    errors[1::2, 1::2],
+                    errors[0:-1:2, 1::2],
+                    errors[2::2, 1::2],
+                    errors[1::2, 0:-1:2],
+                    errors[1::2, 2::2],
+                ]
+            )
+            usable = (
+                corners[:-1, :-1] & corners[1:, :-1] & corners[:-1, 1:] & corners[1:, 1:]
+                & (cell_errors.max(axis=2) <= max_error)
+            )
+            table.usable[:, :, chunk] = usable
+            table.normal_error[chunk] = np.where(usable, cell_errors[:, :, 0], 0).max(axis=(0, 1))
+            table.degrees_error[chunk] = np.where(usable, cell_errors[:, :, 1], 0).max(axis=(0, 1))
+
+        if path is not None:
+            for name in _arrays:
+                getattr(table, name).flush()
+        return table
+
+    @classmethod
+    def from_state(cls, state, target, **kwargs):
+        """Tabulates every heliostat of a `FieldState` for `target`, see `build`."""
+        return cls.build(state.vector_dests(target), state.mount_offset, **kwargs)
+
+    @classmethod
+    def load(cls, path, mode="r"):
+        """Opens tables written by `build` or `save` memory-mapped."""
+        path = Path(path)
+        return cls(**{name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in _arrays})
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(exist_ok=True, parents=True)
+        for name in _arrays:
+            np.save(path / f"{name}.npy", getattr(self, name))
+
+    def lookup(self, sun_degrees_azimuth, sun_degrees_elevation, heliostats=None, mount_offset=True):
+        """
+        Interpolates the normals and actuator angles for a sun position.
+
+        Elevations outside the tabulated range are clamped to it.
+
+        Parameters:
+            sun_degrees_azimuth (float or np.array): The azimuth angle of the sun in degrees.
+            sun_degrees_elevation (float or np.array): The elevation angle of the sun in degrees.
+            heliostats (np.array): Indices of the heliostats to look up, defaults to all.
+            mount_offset (bool): Subtract the mount offsets from the angles, like
+                `FieldState.set_normals`.
+
+        Returns:
+            tuple: The unit normals of shape sun shape + (heliostats, 3) and the
+                degrees_from_north and degrees_elevation of shape sun shape + (heliostats, 2).
+        """
+        fa, fe, corners = self._cell(sun_degrees_azimuth, sun_degrees_elevation, heliostats)
+        fa, fe = fa[..., None, None], fe[..., None, None]
+
+        def interpolate(c00, c10, c01, c11):
+            return (1 - fa) * ((1 - fe) * c00 + fe * c01) + fa * ((1 - fe) * c10 + fe * c11)
+
+        normals = interpolate(*(corners(self.normals, di, dj) for di, dj in _corners))
+        normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+
+        # Interpolate the angles relative to the first corner, so that they do not jump
+        # where get_degrees wraps around
+        d00, d10, d01, d11 = (
+            corners(self.degrees, di, dj).astype(np.float64) for di, dj in _corners
+        )
+        degrees = d00 + interpolate(0, _wrap(d10 - d00), _wrap(d01 - d00), _wrap(d11 - d00))
+        if mount_offset:
+            offsets = self.mount_offset if heliostats is None else self.mount_offset[heliostats]
+            degrees -= offsets
+
+        return normals, degrees
+
+    def is_usable(self, sun_degrees_azimuth, sun_degrees_elevation, heliostats=None):
+        """
+        Returns whether the grid cell of a sun position is usable, i.e. whether `lookup`
+        is within the `max_error` of `build`, of shape sun shape + (heliostats,).
+        """
+        _, _, cell = self._cell(sun_degrees_azimuth, sun_degrees_elevation, heliostats)
+        return cell(self.usable, 0, 0)
+
+    def _cell(self, sun_degrees_azimuth, sun_degrees_elevation, heliostats):
+        """Returns the fractions within the grid cell and a function that reads its corners."""
+        azimuth = np.mod(np.asarray(sun_degrees_azimuth, dtype=np.float64), 360.0) / self.azimuth_step
+        elevation = (
+            np.clip(sun_degrees_elevation, self.elevation_min, self.elevation_max)
+            - self.elevation_min
+        ) / self.elevation_step
+
+        i = np.minimum(azimuth.astype(np.intp), self.n_azimuth - 2)
+        j = np.minimum(elevation.astype(np.intp), self.n_elevation - 2)
+
+        if heliostats is None:
+            corners = lambda table, di, dj: table[i + di, j + dj]
+        else:
+            heliostats = np.asarray(heliostats, dtype=np.intp)
+            corners = lambda table, di, dj: table[(i + di)[..., None], (j + dj)[..., None], heliostats]
+
+        return azimuth - i, elevation - j, corners
+
+    def track(self, state, sun_degrees_azimuth, sun_degrees_elevation):
+        """Stores the looked up normals and angles in a `FieldState`, see `FieldState.track`."""
+        state.normal[:], state.degrees[:] = self.lookup(sun_degrees_azimuth, sun_degrees_elevation)
+
+
+if __name__ == "__main__":
+    import time
+
+    from field_state import FieldState
+
+    rng = np.random.default_rng(0)
+    state = FieldState.from_positions(rng.uniform(-100, 100, (200, 3)) * [1, 1, 0])
+    target = [0, -60, 30]
+
+    for step in (1.0, 2.0, 5.0):
+        start = time.perf_counter()
+        table = NormalTable.from_state(state, target, azimuth_step=step, elevation_step=step)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(100):
+            normals, degrees = table.lookup(123.4, 45.6)
+        lookup_ms = (time.perf_counter() - start) * 10
+
+        print(
+            f"step {step:4}: {table.nbytes / 2**20:8.1f} MiB, build {build_s:6.2f} s, "
+            f"lookup {lookup_ms:6.3f} ms, normal error <= {table.normal_error.max():.4f} deg, "
+            f"degrees error <= {np.median(table.degrees_error):.4f} (median) "
+            f"{table.degrees_error.max():.4f} (max) deg, "
+            f"usable {table.usable.mean():.1%}"
+        )
@@ -61,6 +61,25 @@ def get_sunray(sun_degrees_azimuth, sun_degrees_elevation):
     return point
 
 
+def get_mirror_normal(sun_degrees_azimuth, sun_degrees_elevation, vector_dest):
+    """
+    Calculate the mirror normal that reflects the sun towards a destination.
+
+    Parameters:
+        sun_degrees_azimuth (float): The azimuth angle of the sun in degrees.
+        sun_degrees_elevation (float): The elevation angle of the sun in degrees.
+        vector_dest (np.array): The direction from the mirror to the destination.
+
+    Returns:
+        np.array: The (unnormalized) bisector of the sun and destination directions.
+    """
+
+    ray = get_sunray(sun_degrees_azimuth, sun_degrees_elevation)
+    vector_dest = np.asarray(vector_dest, dtype=np.float64)
+
+    return ((-ray / np.linalg.norm(ray)) + (vector_dest / np.linalg.norm(vector_dest))) / 2
+
+
 def plot_point(ax, midpoint, point, **kwargs):
     if not "arrow_length_ratio" in kwargs:
         kwargs["arrow_length_ratio"] = 0
@@ -191,7 +210,7 @@ if __name__ == "__main__":
 
         plot_sunray(ax, (-10, 0, 2.7), row["azimuth"] -8, row["elevation"], color="y")
 
-        surface_normal = ((-ray / np.linalg.norm(ray)) + (vector_dest/ np.linalg.norm(vector_dest)))/2
+        surface_normal = get_mirror_normal(row["azimuth"] -8, row["elevation"], vector_dest)
 
         degrees_from_north, degrees_elivation = get_degrees(surface_normal)
         reflection = reflect_ray(
@@ -5,13 +5,7 @@ import numpy as np
 #from pvlib import solarposition
 #import matplotlib.colors as mcolors
 
-import helioc
-from helioc.solar_position import solar_az_el
-from helioc.math_functions import to_180_form
-
-
-def flatten(lst):
-    return [item for sublist in lst for item in sublist]
+from sun_path import get_sun_path, bin_sun_path
 
 
 #def to_180_form(degrees):
@@ -34,36 +28,28 @@ ax.set_thetamin(-180)
 ax.set_thetamax(180)
 
 
-for date in flatten([[f'2023-{i:02d}-{int(j)}' for j in np.linspace(1, 31, 10)] for i in range(1, 13)]):
-    # Generate time range for the specific date
-    try:
-        times = pd.date_range(date, freq="5min", periods=288, tz=tz)
-    except pd._libs.tslibs.parsing.DateParseError:
-        continue
-
-    # Calculate solar position
-    #solpos = solarposition.get_solarposition(times, latitude, longitude)
-    solpos = [solar_az_el(i.year, i.month, i.day, i.hour, i.minute, i.second - i.utcoffset().seconds, latitude, longitude, 0) for i in times]
-
-    solpos = [list(sp)+[times[i]] for i, sp in enumerate(solpos) if sp[1] >= 0]
-    # Filter out times when the sun is below the horizon
-    #solpos = solpos[solpos["elevation"] >= 0]
-
-    # Normalize colors
-    norm = plt.Normalize(vmin=0, vmax=23)
-
-    # Convert azimuth to radians
-    azimuth_radians = np.radians([to_180_form(i[0]) for i in solpos])
-
-    # Plot the sun path
-    sc = ax.scatter(
-        azimuth_radians,
-        [to_180_form(90 - i[1]) for i in solpos],
-        c=[i[2].hour for i in solpos],
-        cmap="bwr",
-        norm=norm,
-        s=10,
-    )
+sun_path = get_sun_path(latitude, longitude, tz=tz, backend="helioc")
+
+# Aggregate the dense point cloud into bins before handing it to matplotlib
+azimuth, elevation, hour = bin_sun_path(
+    (sun_path.azimuth.to_numpy() + 180) % 360 - 180,
+    sun_path.elevation.to_numpy(),
+    sun_path.hour.to_numpy(),
+    statistic="nearest",
+)
+
+# Normalize colors
+norm = plt.Normalize(vmin=0, vmax=23)
+
+# Plot the sun path
+sc = ax.scatter(
+    np.radians(azimuth),
+    90 - elevation,
+    c=hour,
+    cmap="bwr",
+    norm=norm,
+    s=10,
+)
 
 
 # Customize the tick labels
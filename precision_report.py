@@ -0,0 +1,128 @@
+r"""
+Compares the float32 helioc build against the float64 build.
+
+Build both precisions first, e.g. with `set HELIOC_PRECISIONS=double,float` before
+running `compile.py`, then run this script to print the angular error report.
+"""
+
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from helioc import math_functions as f64
+from helioc import solar_position as sp64
+from helioc import spa as spa64
+
+try:
+    from helioc import math_functions_f32 as f32
+    from helioc import solar_position_f32 as sp32
+except ImportError:
+    f32 = sp32 = None
+
+# compile.py builds the SPA in double precision only, see compile.double_only
+try:
+    from helioc import spa_f32 as spa32
+except ImportError:
+    spa32 = None
+
+
+def _angle_between(a, b):
+    a = a / np.linalg.norm(a, axis=-1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=-1, keepdims=True)
+    chord = np.linalg.norm(a - b, axis=-1)
+    return np.degrees(2 * np.arcsin(np.clip(chord / 2, 0, 1)))
+
+
+def _wrapped_difference(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180.0) % 360.0 - 180.0)
+
+
+def _summary(name, errors):
+    errors = np.asarray(errors, dtype=np.float64)
+    return {
+        "function": name,
+        "samples": len(errors),
+        "mean_deg": errors.mean(),
+        "p99_deg": np.percentile(errors, 99),
+        "max_deg": errors.max(),
+        "max_arcsec": errors.max() * 3600,
+    }
+
+
+def accuracy_report(samples=2000, seed=0):
+    """
+    Calculate the angular error of the float32 kernels against the float64 kernels.
+
+    Parameters:
+    - samples (int): Number of random inputs per function.
+    - seed (int): Seed of the random inputs.
+
+    Returns:
+    - pd.DataFrame: One row per function with the mean, p99 and max error in degrees.
+                    The SPA is included if a float build of it exists.
+    """
+    if f32 is None:
+        raise ImportError(
+            "The float32 helioc build is missing, compile with HELIOC_PRECISIONS=double,float"
+        )
+
+    rng = np.random.default_rng(seed)
+    degrees_from_north = rng.uniform(-180, 180, samples)
+    degrees_elevation = rng.uniform(-90, 90, samples)
+
+    normal_errors = []
+    for theta, phi in zip(degrees_from_north, degrees_elevation):
+        normal_errors.append(
+            _angle_between(
+                f64.get_normal_vector(theta, phi), f32.get_normal_vector(theta, phi)
+            )
+        )
+
+    degrees_errors = []
+    for normal in rng.normal(size=(samples, 3)):
+        theta_64, phi_64 = f64.get_degrees(normal)
+        theta_32, phi_32 = f32.get_degrees(normal)
+        degrees_errors.append(
+            _angle_between(
+                f64.get_normal_vector(theta_64, phi_64),
+                f64.get_normal_vector(float(theta_32), float(phi_32)),
+            )
+        )
+
+    azimuth_errors, elevation_errors = [], []
+    times = pd.Timestamp("2000-01-01", tz="UTC") + pd.to_timedelta(
+        rng.uniform(0, 50 * 365.25 * 86400, samples), unit="s"
+    )
+    latitudes = rng.uniform(-90, 90, samples)
+    longitudes = rng.uniform(-180, 180, samples)
+    for time, latitude, longitude in zip(times, latitudes, longitudes):
+        args = (time.year, time.month, time.day, time.hour, time.minute, time.second)
+        az_64, el_64 = sp64.solar_az_el(*args, latitude, longitude, 0)
+        az_32, el_32 = sp32.solar_az_el(*args, latitude, longitude, 0)
+        azimuth_errors.append(_wrapped_difference(az_64, az_32))
+        elevation_errors.append(abs(el_64 - el_32))
+
+    rows = [
+        _summary("get_normal_vector", normal_errors),
+        _summary("get_degrees", degrees_errors),
+        _summary("solar_az_el azimuth", azimuth_errors),
+        _summary("solar_az_el elevation", elevation_errors),
+    ]
+
+    if spa32 is not None:
+        azimuth_errors, elevation_errors = [], []
+        for time, latitude, longitude in zip(times, latitudes, longitudes):
+            args = (time.year, time.month, time.day, time.hour, time.minute, time.second, 67.0)
+            site = (latitude, longitude, 0, 1013.25, 12)
+            az_64, el_64 = spa64.spa_az_el(*args, *site)
+            az_32, el_32 = spa32.spa_az_el(*args, *site)
+            azimuth_errors.append(_wrapped_difference(az_64, az_32))
+            elevation_errors.append(abs(el_64 - el_32))
+        rows += [_summary("spa_az_el azimuth", azimuth_errors), _summary("spa_az_el elevation", elevation_errors)]
+
+    return pd.DataFrame(rows).set_index("function")
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 200)
+    print(accuracy_report())
@@ -0,0 +1,254 @@
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from kinematics import normals_to_degrees
+from plot3d_surfaces import get_sunray
+from sun_vector import get_solar_position_spa
+
+
+# Columns of a tracking schedule, one row per timestamp and heliostat. The time is
+# stored as int64 nanoseconds since the Unix epoch in UTC.
+schedule_columns = {
+    "time": np.int64,
+    "heliostat": np.int32,
+    "azimuth": np.float64,
+    "elevation": np.float64,
+    "normal_x": np.float64,
+    "normal_y": np.float64,
+    "normal_z": np.float64,
+    "degrees_from_north": np.float64,
+    "degrees_elevation": np.float64,
+}
+
+_NPY_HEADER_LENGTH = 128
+
+
+def _npy_header(dtype, length):
+    """Returns a .npy version 1.0 header of fixed length for a 1-d array."""
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": (length,),
+        }
+    )
+    header = header.ljust(_NPY_HEADER_LENGTH - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class _ColumnWriter:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NpyWriter(_ColumnWriter):
+    """
+    Streams columns into one .npy file per column in `directory`.
+
+    Chunks are appended to the files as raw bytes and the headers are rewritten
+    with the final length on `close()`, so the files can be opened with
+    `np.load(..., mmap_mode="r")` without copying.
+    """
+
+    def __init__(self, directory, columns=schedule_columns):
+        self.directory = Path(directory)
+        self.directory.mkdir(exist_ok=True, parents=True)
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self.length = 0
+        self._files = {}
+        for name, dtype in self.columns.items():
+            file = open(self.directory / f"{name}.npy", "wb")
+            file.write(_npy_header(dtype, 0))
+            self._files[name] = file
+
+    def write(self, chunk):
+        lengths = {len(chunk[name]) for name in self.columns}
+        if len(lengths) != 1:
+            raise ValueError(f"All columns of a chunk must have the same length, got {lengths}")
+
+        for name, dtype in self.columns.items():
+            self._files[name].write(np.ascontiguousarray(chunk[name], dtype=dtype).tobytes())
+        self.length += lengths.pop()
+
+    def close(self):
+        for name, file in self._files.items():
+            file.seek(0)
+            file.write(_npy_header(self.columns[name], self.length))
+            file.close()
+
+
+class ArrowWriter(_ColumnWriter):
+    """
+    Streams columns into an Arrow IPC file, one record batch per chunk. Requires pyarrow.
+    The file can be memory-mapped without copying, see `read_schedule`.
+    """
+
+    def __init__(self, path, columns=schedule_columns):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self.schema = pa.schema(
+            [(name, pa.from_numpy_dtype(dtype)) for name, dtype in self.columns.items()]
+        )
+        self._sink = pa.OSFile(str(path), "wb")
+        self._writer = pa.ipc.new_file(self._sink, self.schema)
+
+    def write(self, chunk):
+        self._writer.write_batch(
+            self._pa.record_batch(
+                [np.ascontiguousarray(chunk[name], dtype=dtype) for name, dtype in self.columns.items()],
+                schema=self.schema,
+            )
+        )
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
+
+
+class ParquetWriter(_ColumnWriter):
+    """Streams columns into a Parquet file, one row group per chunk. Requires pyarrow."""
+
+    def __init__(self, path, columns=schedule_columns, compression="snappy"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self.schema = pa.schema(
+            [(name, pa.from_numpy_dtype(dtype)) for name, dtype in self.columns.items()]
+        )
+        self._writer = pq.ParquetWriter(str(path), self.schema, compression=compression)
+
+    def write(self, chunk):
+        self._writer.write_table(
+            self._pa.table(
+                [np.ascontiguousarray(chunk[name], dtype=dtype) for name, dtype in self.columns.items()],
+                schema=self.schema,
+            )
+        )
+
+    def close(self):
+        self._writer.close()
+
+
+writers = {
+    "npy": NpyWriter,
+    "arrow": ArrowWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def read_schedule(path, format="npy"):
+    """
+    Open an exported schedule without copying where the format allows it.
+
+    Parameters:
+    - path (str or Path): Directory for npy, file for arrow and parquet.
+    - format (str): One of "npy", "arrow" or "parquet".
+
+    Returns:
+    - dict or pyarrow.Table: A dict of memory-mapped arrays for npy, otherwise a
+                             pyarrow Table (memory-mapped for arrow).
+    """
+    if format == "npy":
+        return {
+            file.stem: np.load(file, mmap_mode="r") for file in sorted(Path(path).glob("*.npy"))
+        }
+
+    import pyarrow as pa
+
+    if format == "arrow":
+        return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(str(path), memory_map=True)
+    raise ValueError(f"Unknown format {format!r}, expected one of {list(writers)}")
+
+
+def schedule_chunks(start, end, freq, latitude, longitude, vector_dests, chunk_size=1440, elevation=0):
+    """
+    Compute a tracking schedule in chunks of `chunk_size` timestamps.
+
+    Parameters:
+    - start (str or pd.Timestamp): First timestamp. Naive times are taken as UTC.
+    - end (str or pd.Timestamp): Last timestamp. Naive times are taken as UTC.
+    - freq (str): Frequency of the timestamps, e.g. "1min".
+    - latitude (float): Latitude of the field in decimal degrees.
+    - longitude (float): Longitude of the field in decimal degrees.
+    - vector_dests (np.array): (n, 3) directions from every mirror to the destination.
+    - chunk_size (int): Number of timestamps per chunk.
+    - elevation (float): Elevation of the field in meters.
+
+    Yields:
+    - dict: NumPy arrays of every column in `schedule_columns` for one chunk.
+    """
+    vector_dests = np.atleast_2d(np.asarray(vector_dests, dtype=np.float64))
+    vector_dests = vector_dests / np.linalg.norm(vector_dests, axis=1, keepdims=True)
+    n_heliostats = len(vector_dests)
+
+    start = pd.Timestamp(start)
+    start = start.tz_localize("UTC") if start.tzinfo is None else start.tz_convert("UTC")
+    end = pd.Timestamp(end)
+    end = end.tz_localize("UTC") if end.tzinfo is None else end.tz_convert("UTC")
+    step = pd.Timedelta(freq)
+
+    while start <= end:
+        times = pd.date_range(start, min(start + step * (chunk_size - 1), end), freq=step)
+        start = times[-1] + step
+
+        azimuth, elevation_angle = get_solar_position_spa(times, latitude, longitude, elevation)
+        azimuth, elevation_angle = azimuth[:, 0], elevation_angle[:, 0]
+
+        rays = np.array([get_sunray(az, el) for az, el in zip(azimuth, elevation_angle)])
+        normals = (-rays[:, None, :] + vector_dests[None, :, :]) / 2
+        normals /= np.linalg.norm(normals, axis=2, keepdims=True)
+        degrees = normals_to_degrees(normals)
+
+        nanoseconds = np.asarray(
+            (times - pd.Timestamp("1970-01-01", tz="UTC")) // pd.Timedelta(nanoseconds=1),
+            dtype=np.int64,
+        )
+        yield {
+            "time": np.repeat(nanoseconds, n_heliostats),
+            "heliostat": np.tile(np.arange(n_heliostats, dtype=np.int32), len(times)),
+            "azimuth": np.repeat(azimuth, n_heliostats),
+            "elevation": np.repeat(elevation_angle, n_heliostats),
+            "normal_x": normals[:, :, 0].ravel(),
+            "normal_y": normals[:, :, 1].ravel(),
+            "normal_z": normals[:, :, 2].ravel(),
+            "degrees_from_north": degrees[:, :, 0].ravel(),
+            "degrees_elevation": degrees[:, :, 1].ravel(),
+        }
+
+
+def export_schedule(path, chunks, format="npy", columns=schedule_columns):
+    """
+    Write chunks, e.g. from `schedule_chunks`, to disk with constant memory use.
+
+    Parameters:
+    - path (str or Path): Directory for npy, file for arrow and parquet.
+    - chunks (iterable): Dicts of NumPy arrays, one entry per column.
+    - format (str): One of "npy", "arrow" or "parquet".
+    - columns (dict): Name and dtype of every column.
+
+    Returns:
+    - int: Number of rows written.
+    """
+    if format not in writers:
+        raise ValueError(f"Unknown format {format!r}, expected one of {list(writers)}")
+
+    rows = 0
+    with writers[format](path, columns) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+            rows += len(chunk["time"])
+    return rows
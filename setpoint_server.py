@@ -0,0 +1,303 @@
+import asyncio
+import struct
+import time
+from collections import deque
+
+import numpy as np
+
+
+# Frame sent by the server: header followed by `count` setpoint records
+FRAME_MAGIC = b"HSET"
+FRAME_HEADER = struct.Struct("<4sHHIQdI")  # magic, version, flags, group, sequence, time, count
+
+# Message sent by a controller after connecting: header followed by `count` uint32 group ids
+SUBSCRIBE_MAGIC = b"HSUB"
+SUBSCRIBE_HEADER = struct.Struct("<4sHI")  # magic, version, count
+
+VERSION = 1
+
+setpoint_dtype = np.dtype(
+    [("heliostat", "<u4"), ("degrees_from_north", "<f4"), ("degrees_elevation", "<f4")]
+)
+
+
+def encode_frame(group, sequence, heliostats, degrees, frame_time=None):
+    """
+    Encode the setpoints of one controller group as a binary frame.
+
+    Parameters:
+        group (int): The controller group id.
+        sequence (int): Sequence number of the frame.
+        heliostats (np.array): (n,) heliostat ids.
+        degrees (np.array): (n, 2) degrees_from_north and degrees_elevation.
+        frame_time (float): Unix time of the setpoints, defaults to now.
+
+    Returns:
+        bytes: The frame.
+    """
+    records = np.empty(len(heliostats), dtype=setpoint_dtype)
+    records["heliostat"] = heliostats
+    records["degrees_from_north"] = degrees[:, 0]
+    records["degrees_elevation"] = degrees[:, 1]
+
+    frame_time = time.time() if frame_time is None else frame_time
+    header = FRAME_HEADER.pack(
+        FRAME_MAGIC, VERSION, 0, group, sequence, frame_time, len(records)
+    )
+    return header + records.tobytes()
+
+
+def decode_header(data):
+    """Returns (group, sequence, time, count) of a frame header."""
+    magic, version, _, group, sequence, frame_time, count = FRAME_HEADER.unpack(data)
+    if magic != FRAME_MAGIC or version != VERSION:
+        raise ValueError(f"Unexpected frame header {magic!r} version {version}")
+    return group, sequence, frame_time, count
+
+
+class _Subscriber:
+    def __init__(self, writer, groups, max_queued_frames):
+        self.writer = writer
+        self.groups = groups
+        self.frames = deque(maxlen=max_queued_frames)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, frame):
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self.ready.set()
+
+
+class SetpointServer:
+    """
+    Pushes batched setpoint frames to heliostat controllers over persistent
+    TCP or Unix socket connections.
+
+    Every controller subscribes to one or more groups of heliostats and receives
+    one frame per group per `publish`. Each controller has a bounded queue of
+    `max_queued_frames` frames. If a controller reads slower than setpoints are
+    published, its oldest frames are dropped, since only the latest setpoints
+    matter, and counted in `stats()`.
+    """
+
+    def __init__(self, groups, host="127.0.0.1", port=0, path=None, max_queued_frames=4):
+        """
+        Parameters:
+            groups (dict): Maps a group id to the heliostat indices of that group.
+            host (str): Host to listen on for TCP.
+            port (int): Port to listen on for TCP, 0 picks a free port.
+            path (str): Listen on this Unix socket instead of TCP.
+            max_queued_frames (int): Frames queued per controller before dropping the oldest.
+        """
+        self.groups = {
+            int(group): np.asarray(heliostats, dtype=np.uint32)
+            for group, heliostats in groups.items()
+        }
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_queued_frames = max_queued_frames
+        self.subscribers = []
+        self.sequence = 0
+        self.frames_sent = 0
+        self.setpoints_sent = 0
+        # Frames dropped by controllers that have disconnected
+        self.frames_dropped = 0
+        self._server = None
+        self._loop = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self.path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self._server.close()
+        for subscriber in list(self.subscribers):
+            subscriber.writer.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            magic, version, count = SUBSCRIBE_HEADER.unpack(
+                await reader.readexactly(SUBSCRIBE_HEADER.size)
+            )
+            if magic != SUBSCRIBE_MAGIC or version != VERSION:
+                raise ValueError(f"Unexpected subscribe header {magic!r} version {version}")
+            groups = set(
+                np.frombuffer(await reader.readexactly(4 * count), dtype="<u4").tolist()
+            )
+        except (asyncio.IncompleteReadError, ValueError):
+            writer.close()
+            return
+
+        subscriber = _Subscriber(writer, groups, self.max_queued_frames)
+        self.subscribers.append(subscriber)
+        try:
+            while not writer.is_closing():
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                while subscriber.frames:
+                    writer.write(subscriber.frames.popleft())
+                # Waits while the socket buffer is above its high-water mark
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.remove(subscriber)
+            self.frames_dropped += subscriber.dropped
+            writer.close()
+
+    def publish(self, degrees, frame_time=None):
+        """
+        Queue one frame per group for every subscribed controller. Must be called
+        from the event loop thread, see `publish_threadsafe`.
+
+        Parameters:
+            degrees (np.array): (n, 2) setpoints of the whole field, e.g. `FieldState.degrees`.
+            frame_time (float): Unix time of the setpoints, defaults to now.
+        """
+        self.sequence += 1
+        frame_time = time.time() if frame_time is None else frame_time
+
+        for group, heliostats in self.groups.items():
+            subscribers = [i for i in self.subscribers if group in i.groups]
+            if not subscribers:
+                continue
+
+            frame = encode_frame(
+                group, self.sequence, heliostats, degrees[heliostats], frame_time
+            )
+            for subscriber in subscribers:
+                subscriber.push(frame)
+            self.frames_sent += len(subscribers)
+            self.setpoints_sent += len(subscribers) * len(heliostats)
+
+    def publish_state(self, state):
+        """Publishes the degrees column of a `FieldState`, usable as `aim_field` output."""
+        self.publish(state.degrees)
+
+    def publish_threadsafe(self, degrees, frame_time=None):
+        degrees = np.array(degrees)
+        self._loop.call_soon_threadsafe(self.publish, degrees, frame_time)
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscribers),
+            "frames_sent": self.frames_sent,
+            "setpoints_sent": self.setpoints_sent,
+            "frames_dropped": self.frames_dropped + sum(i.dropped for i in self.subscribers),
+        }
+
+
+class ControllerClient:
+    """
+    Stand-in heliostat controller that subscribes to groups and receives frames,
+    used to load test `SetpointServer`.
+    """
+
+    def __init__(self, groups, host="127.0.0.1", port=None, path=None):
+        self.groups = list(groups)
+        self.host = host
+        self.port = port
+        self.path = path
+        self.frames_received = 0
+        self.setpoints_received = 0
+        self.latest = {}
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        if self.path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        self._writer.write(
+            SUBSCRIBE_HEADER.pack(SUBSCRIBE_MAGIC, VERSION, len(self.groups))
+            + np.asarray(self.groups, dtype="<u4").tobytes()
+        )
+        await self._writer.drain()
+        return self
+
+    async def receive(self):
+        """Receives one frame and returns (group, sequence, time, setpoints)."""
+        group, sequence, frame_time, count = decode_header(
+            await self._reader.readexactly(FRAME_HEADER.size)
+        )
+        setpoints = np.frombuffer(
+            await self._reader.readexactly(count * setpoint_dtype.itemsize),
+            dtype=setpoint_dtype,
+        )
+        self.frames_received += 1
+        self.setpoints_received += count
+        self.latest[group] = setpoints
+        return group, sequence, frame_time, setpoints
+
+    async def run(self):
+        try:
+            while True:
+                await self.receive()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def load_test(heliostats=10000, groups=100, controllers=100, rate=1.0, duration=5.0):
+    """
+    Runs a server and `controllers` stand-in clients in one event loop and
+    returns the sustained setpoint throughput per second.
+
+    Parameters:
+        heliostats (int): Number of heliostats in the field.
+        groups (int): Number of controller groups, heliostats are split evenly.
+        controllers (int): Number of clients, each subscribing to one group.
+        rate (float): Field-wide setpoint batches published per second.
+        duration (float): Duration of the test in seconds.
+    """
+    group_heliostats = dict(enumerate(np.array_split(np.arange(heliostats), groups)))
+    server = await SetpointServer(group_heliostats).start()
+
+    clients = [
+        await ControllerClient([i % groups], port=server.port).connect()
+        for i in range(controllers)
+    ]
+    tasks = [asyncio.create_task(client.run()) for client in clients]
+    while len(server.subscribers) < controllers:
+        await asyncio.sleep(0.01)
+
+    degrees = np.zeros((heliostats, 2))
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        degrees += 0.01
+        server.publish(degrees)
+        await asyncio.sleep(1 / rate)
+
+    # Let the clients catch up before counting
+    await asyncio.sleep(0.5)
+    elapsed = time.perf_counter() - start
+    received = sum(client.setpoints_received for client in clients)
+
+    for client in clients:
+        await client.close()
+    for task in tasks:
+        task.cancel()
+    await server.close()
+
+    return {"setpoints_per_second": received / elapsed, **server.stats()}
+
+
+if __name__ == "__main__":
+    print(asyncio.run(load_test(rate=20.0)))
@@ -0,0 +1,317 @@
+import hashlib
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import helioc  # noqa
+from helioc.math_functions import get_degrees_batch, get_normal_vector_batch
+from flux import intercepts, mirror_images
+
+
+def _row_keys(*columns):
+    """Returns the (n,) uint64 hashes of the rows of the columns, all converted to float64."""
+    rows = np.ascontiguousarray(np.column_stack([np.asarray(c, dtype=np.float64) for c in columns]))
+    keys = [hashlib.blake2b(row.tobytes(), digest_size=8).digest() for row in rows]
+    return np.frombuffer(b"".join(keys), dtype=np.uint64).copy()
+
+
+def _overlaps(distances, radii1, radii2):
+    """Returns the overlap areas of circles with the radii at the distances between their centres."""
+    distances, radii1, radii2 = np.broadcast_arrays(distances, radii1, radii2)
+    small, large = np.minimum(radii1, radii2), np.maximum(radii1, radii2)
+    areas = np.zeros(distances.shape)
+
+    inside = distances <= large - small
+    areas[inside] = np.pi * small[inside] ** 2
+    partial = ~inside & (distances < small + large)
+    d, r1, r2 = distances[partial], radii1[partial], radii2[partial]
+    alpha = np.arccos(np.clip((d**2 + r1**2 - r2**2) / (2 * d * r1), -1, 1))
+    beta = np.arccos(np.clip((d**2 + r2**2 - r1**2) / (2 * d * r2), -1, 1))
+    chord = np.sqrt(np.maximum((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2), 0))
+    areas[partial] = r1**2 * alpha + r2**2 * beta - chord / 2
+    return areas
+
+
+class SimulationCache:
+    """
+    Per-mirror results of a field over a fixed set of sun positions, recomputed
+    incrementally when mirrors are moved, added, removed or re-offset.
+
+    Every mirror has three keys, hashes of the inputs its results depend on:
+
+        geometry: position and mirror area, which decide what a mirror blocks and shades.
+        own: the geometry and the mount offset, which decide normals, angles, cosines and
+            the unblocked power on the receiver.
+        interaction: the geometry and the geometry keys of all mirrors within
+            `neighbour_radius`, which decide shading, blocking and the delivered power.
+
+    `update` hashes the new layout and reuses every result whose key is unchanged, so a
+    moved mirror is recomputed together with its old and new neighbours only, and a new
+    mount offset only recomputes the angles of that mirror. The aggregated outputs are
+    patched with the difference of the replaced rows instead of being summed anew.
+
+    Shading and blocking are estimated per pair of neighbours: both mirrors are seen
+    along the sun ray or the beam to the receiver as circles of their projected area,
+    and the overlap of the neighbour in front is the fraction lost, summed over the
+    neighbours and clipped to one.
+
+    Parameters:
+        sun_degrees_azimuth (np.array): (t,) azimuth angles of the sun in degrees.
+        sun_degrees_elevation (np.array): (t,) elevation angles of the sun in degrees.
+        receiver (flux.Receiver): The receiver, every mirror aims at its centre.
+        dni (float or np.array): Direct normal irradiance at every sun position in W/m^2.
+        hours (float or np.array): Hours represented by every sun position, e.g. from
+            binning a year of sun positions, to sum the energy.
+        neighbour_radius (float): Largest distance in meters at which mirrors interact.
+        reflectivity (float): Reflectivity of the mirrors.
+        **image_kwargs: Error terms of `flux.mirror_images`, e.g. slope_error.
+    """
+
+    def __init__(
+        self,
+        sun_degrees_azimuth,
+        sun_degrees_elevation,
+        receiver,
+        dni=1000.0,
+        hours=1.0,
+        neighbour_radius=20.0,
+        reflectivity=0.9,
+        **image_kwargs,
+    ):
+        self.sun_degrees_azimuth = np.atleast_1d(np.asarray(sun_degrees_azimuth, dtype=np.float64))
+        self.sun_degrees_elevation = np.atleast_1d(np.asarray(sun_degrees_elevation, dtype=np.float64))
+        t = len(self.sun_degrees_azimuth)
+        self.receiver = receiver
+        self.dni = np.broadcast_to(np.asarray(dni, dtype=np.float64), (t,))
+        self.hours = np.broadcast_to(np.asarray(hours, dtype=np.float64), (t,))
+        self.neighbour_radius = neighbour_radius
+        self.reflectivity = reflectivity
+        self.image_kwargs = image_kwargs
+        self.to_sun = get_normal_vector_batch(np.column_stack([self.sun_degrees_azimuth, self.sun_degrees_elevation]))
+
+        self.positions = np.zeros((0, 3))
+        self.mirror_area = np.zeros(0)
+        self.mount_offset = np.zeros((0, 2))
+        self.keys = {name: np.zeros(0, dtype=np.uint64) for name in ("geometry", "own", "interaction")}
+        # Per-mirror results of shape (n, t, ...), in single precision
+        self.normals = np.zeros((0, t, 3), dtype=np.float32)
+        self.degrees = np.zeros((0, t, 2), dtype=np.float32)
+        self.cosine = np.zeros((0, t), dtype=np.float32)
+        self.unblocked_power = np.zeros((0, t), dtype=np.float32)
+        self.shading = np.zeros((0, t), dtype=np.float32)
+        self.blocking = np.zeros((0, t), dtype=np.float32)
+        self.power = np.zeros((0, t), dtype=np.float32)
+        # Aggregated outputs, patched on every update
+        self.field_power = np.zeros(t)
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def energy(self):
+        """The (n,) energy of every mirror over the sun positions in Wh."""
+        return self.power @ self.hours.astype(np.float32)
+
+    @property
+    def field_energy(self):
+        """The energy of the field over the sun positions in Wh."""
+        return float(self.field_power @ self.hours)
+
+    def _local(self, positions, mirror_area, mount_offset):
+        """Returns the (m, t, ...) normals, degrees, cosines and unblocked powers of mirrors."""
+        m, t = len(positions), len(self.to_sun)
+        beams = self.receiver.center - positions
+        beams /= np.linalg.norm(beams, axis=1, keepdims=True)
+        bisectors = self.to_sun[None, :, :] + beams[:, None, :]
+        # Half the length of the sum of two unit vectors is the cosine of half their angle
+        cosine = np.linalg.norm(bisectors, axis=2) / 2
+        normals = bisectors / np.maximum(2 * cosine, 1e-300)[..., None]
+        # The actuators compensate for the rotation of the mount, like FieldState.set_normals
+        degrees = get_degrees_batch(normals.reshape(-1, 3)).reshape(m, t, 2) - mount_offset[:, None, :]
+
+        power = np.empty((m, t))
+        for i in range(t):
+            images = mirror_images(
+                positions,
+                self.sun_degrees_azimuth[i],
+                self.sun_degrees_elevation[i],
+                self.receiver,
+                mirror_area=mirror_area,
+                dni=self.dni[i],
+                reflectivity=self.reflectivity,
+                **self.image_kwargs,
+            )
+            power[:, i] = images.power * intercepts(images, self.receiver)
+        return normals, degrees, cosine, power
+
+    def _interactions(self, mirrors, pairs, pair_chunk=20_000):
+        """
+        Returns the (m, t) shading and blocking fractions of `mirrors`, given the (p, 2)
+        pairs of mirrors and their neighbours, sorted by the first column.
+        """
+        t = len(self.to_sun)
+        shading, blocking = np.zeros((len(mirrors), t)), np.zeros((len(mirrors), t))
+        row = np.full(len(self), -1)
+        row[mirrors] = np.arange(len(mirrors))
+        beams = self.receiver.center - self.positions
+        beams /= np.linalg.norm(beams, axis=1, keepdims=True)
+
+        for first in range(0, len(pairs), pair_chunk):
+            i, j = pairs[first : first + pair_chunk].T
+            offsets = self.positions[j] - self.positions[i]
+            squared = np.sum(offsets**2, axis=1)[:, None]
+            area_i, area_j = self.mirror_area[i, None], self.mirror_area[j, None]
+
+            # Seen along the sun ray, the neighbour shades if it lies towards the sun
+            ahead = offsets @ self.to_sun.T
+            radii_i = np.sqrt(area_i * self.cosine[i] / np.pi)
+            radii_j = np.sqrt(area_j * self.cosine[j] / np.pi)
+            overlap = _overlaps(np.sqrt(np.maximum(squared - ahead**2, 0)), radii_i, radii_j)
+            lost = np.where(ahead > 0, overlap / np.maximum(np.pi * radii_i**2, 1e-12), 0.0)
+            np.add.at(shading, row[i], lost)
+
+            # Seen along the beam, the neighbour blocks if it lies towards the receiver
+            ahead = np.sum(offsets * beams[i], axis=1)[:, None]
+            radii_j = np.sqrt(area_j * np.abs(np.sum(self.normals[j] * beams[i, None, :], axis=2)) / np.pi)
+            overlap = _overlaps(np.sqrt(np.maximum(squared - ahead**2, 0)), radii_i, radii_j)
+            lost = np.where(ahead > 0, overlap / np.maximum(np.pi * radii_i**2, 1e-12), 0.0)
+            np.add.at(blocking, row[i], lost)
+
+        return np.minimum(shading, 1.0), np.minimum(blocking, 1.0)
+
+    def update(self, positions, mount_offset=None, mirror_area=4.0):
+        """
+        Moves the cache to a new layout and recomputes what its changes affect.
+
+        Parameters:
+            positions (np.array): (n, 3) positions of the mirrors, in any order.
+            mount_offset (np.array): (n, 2) mount offsets in degrees, defaults to zero.
+            mirror_area (float or np.array): Reflective area of the mirrors in square meters.
+
+        Returns:
+            SimpleNamespace: local (mirrors whose angles and unblocked power were
+                recomputed), interactions (mirrors whose shading and blocking were
+                recomputed) and seconds.
+        """
+        start = time.perf_counter()
+        positions = np.ascontiguousarray(positions, dtype=np.float64)
+        n, t = len(positions), len(self.to_sun)
+        mount_offset = np.zeros((n, 2)) if mount_offset is None else np.asarray(mount_offset, dtype=np.float64)
+        mirror_area = np.broadcast_to(np.asarray(mirror_area, dtype=np.float64), (n,)).copy()
+
+        geometry = _row_keys(positions, mirror_area)
+        own = _row_keys(positions, mirror_area, mount_offset)
+        pairs = cKDTree(positions).query_pairs(self.neighbour_radius, output_type="ndarray")
+        pairs = np.concatenate([pairs, pairs[:, ::-1]])
+        pairs = pairs[np.lexsort((geometry[pairs[:, 1]], pairs[:, 0]))]
+        # The neighbour keys of every mirror in a fixed order, hashed with its own
+        first = np.searchsorted(pairs[:, 0], np.arange(n + 1))
+        neighbour_keys = geometry[pairs[:, 1]].tobytes()
+        interaction = np.frombuffer(
+            b"".join(
+                hashlib.blake2b(
+                    geometry[k].tobytes() + neighbour_keys[8 * first[k] : 8 * first[k + 1]], digest_size=8
+                ).digest()
+                for k in range(n)
+            ),
+            dtype=np.uint64,
+        ).copy()
+
+        # Results are reused by key, whatever the order of the mirrors
+        def matches(old_keys, new_keys):
+            lookup = dict(zip(old_keys.tolist(), range(len(old_keys))))
+            old = np.array([lookup.get(key, -1) for key in new_keys.tolist()], dtype=np.intp)
+            return old, old >= 0
+
+        old_own, reuse_own = matches(self.keys["own"], own)
+        old_interaction, reuse_interaction = matches(self.keys["interaction"], interaction)
+        local = np.flatnonzero(~reuse_own)
+        interactions = np.flatnonzero(~reuse_interaction)
+
+        # The rows of the old layout that are replaced are taken out of the aggregates
+        replaced = np.ones(len(self), dtype=bool)
+        replaced[old_interaction[reuse_interaction]] = False
+        self.field_power -= self.power[replaced].sum(axis=0, dtype=np.float64)
+
+        results = {}
+        for name in ("normals", "degrees", "cosine", "unblocked_power"):
+            old = getattr(self, name)
+            array = np.empty((n,) + old.shape[1:], dtype=np.float32)
+            array[reuse_own] = old[old_own[reuse_own]]
+            results[name] = array
+        if len(local):
+            computed = self._local(positions[local], mirror_area[local], mount_offset[local])
+            for name, values in zip(("normals", "degrees", "cosine", "unblocked_power"), computed):
+                results[name][local] = values
+
+        for name in ("shading", "blocking"):
+            array = np.empty((n, t), dtype=np.float32)
+            array[reuse_interaction] = getattr(self, name)[old_interaction[reuse_interaction]]
+            results[name] = array
+
+        self.positions, self.mirror_area, self.mount_offset = positions, mirror_area, mount_offset
+        self.keys = {"geometry": geometry, "own": own, "interaction": interaction}
+        for name, array in results.items():
+            setattr(self, name, array)
+
+        if len(interactions):
+            selected = np.zeros(n, dtype=bool)
+            selected[interactions] = True
+            shading, blocking = self._interactions(interactions, pairs[selected[pairs[:, 0]]])
+            self.shading[interactions] = shading
+            self.blocking[interactions] = blocking
+
+        power = np.empty((n, t), dtype=np.float32)
+        power[reuse_interaction] = self.power[old_interaction[reuse_interaction]]
+        power[interactions] = (
+            self.unblocked_power[interactions] * (1 - self.shading[interactions]) * (1 - self.blocking[interactions])
+        )
+        self.power = power
+        self.field_power += power[interactions].sum(axis=0, dtype=np.float64)
+
+        return SimpleNamespace(local=local, interactions=interactions, seconds=time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from flux import Receiver
+    from sun_vector import get_solar_position_spa
+
+    # Hourly sun positions on the 15th of every month, each standing for its month
+    latitude, longitude = -33.8352, 18.6510
+    times = pd.DatetimeIndex(
+        [t for month in range(1, 13) for t in pd.date_range(f"2023-{month:02d}-15", periods=24, freq="1h")]
+    )
+    azimuth, elevation = get_solar_position_spa(times, latitude, longitude)
+    up = elevation[:, 0] > 5
+    hours = times[up].days_in_month.to_numpy().astype(np.float64)
+
+    rng = np.random.default_rng(0)
+    n = 5000
+    radius, angle = np.sqrt(rng.uniform(100**2, 800**2, n)), rng.uniform(-np.pi / 2, np.pi / 2, n)
+    positions = np.column_stack([radius * np.sin(angle), radius * np.cos(angle), np.full(n, 3.0)])
+    receiver = Receiver([0, 0, 150], [0, 1, -0.3], width=20, height=20)
+
+    cache = SimulationCache(azimuth[up, 0], elevation[up, 0], receiver, dni=900.0, hours=hours)
+    result = cache.update(positions, mirror_area=10.0)
+    print(f"{n} mirrors at {up.sum()} sun positions: full run in {result.seconds:.2f} s")
+    print(f"energy {cache.field_energy / 1e9:.2f} GWh, shading {cache.shading.mean():.3f}, blocking {cache.blocking.mean():.3f}")
+
+    # Move ten mirrors and re-offset fifty others
+    moved = positions.copy()
+    moved[:10, :2] += rng.normal(0, 5, (10, 2))
+    offsets = np.zeros((n, 2))
+    offsets[100:150] = rng.normal(0, 0.5, (50, 2))
+    result = cache.update(moved, offsets, mirror_area=10.0)
+    print(
+        f"edit: {len(result.local)} mirrors recomputed, {len(result.interactions)} interactions "
+        f"in {result.seconds:.2f} s, energy {cache.field_energy / 1e9:.2f} GWh"
+    )
+
+    # The patched aggregates agree with a run from scratch
+    fresh = SimulationCache(azimuth[up, 0], elevation[up, 0], receiver, dni=900.0, hours=hours)
+    fresh.update(moved, offsets, mirror_area=10.0)
+    print(f"largest difference to a full rerun {np.abs(fresh.field_power - cache.field_power).max():.2e} W")
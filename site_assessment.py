@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from helioc.spa import spa_time_terms_batch, spa_az_el_grid, spa_accumulate_sites
+from sun_vector import get_julian_days
+
+
+def grid_sites(latitudes, longitudes):
+    """
+    Flatten a grid of candidate sites.
+
+    Parameters:
+    - latitudes (np.array): Latitudes of the grid rows in decimal degrees.
+    - longitudes (np.array): Longitudes of the grid columns in decimal degrees.
+
+    Returns:
+    - tuple: (latitudes, longitudes) arrays with one entry per site, row by row.
+    """
+    latitudes, longitudes = np.meshgrid(latitudes, longitudes, indexing="ij")
+    return latitudes.ravel(), longitudes.ravel()
+
+
+def _sites(latitudes, longitudes, elevation):
+    latitudes, longitudes, elevations = np.broadcast_arrays(
+        np.atleast_1d(latitudes), np.atleast_1d(longitudes), np.atleast_1d(elevation)
+    )
+    return (np.ascontiguousarray(i, dtype=np.float64) for i in (latitudes, longitudes, elevations))
+
+
+def solar_position_block(
+    latitudes, longitudes, times, elevation=0, pressure=1013.25, temperature=12, delta_t=67.0
+):
+    """
+    Calculate the solar positions of many sites over a common UTC time axis in one native pass.
+
+    The part of the SPA that only depends on time is computed once per timestamp
+    and shared by all sites. No timezones are looked up.
+
+    Parameters:
+    - latitudes (np.array): Latitudes of the sites in decimal degrees.
+    - longitudes (np.array): Longitudes of the sites in decimal degrees.
+    - times (pd.DatetimeIndex): Timestamps. Naive times are taken as UTC.
+    - elevation (float or np.array): Elevations of the sites in meters.
+    - pressure (float): Annual average local pressure in millibars.
+    - temperature (float): Annual average local temperature in degrees Celsius.
+    - delta_t (float): Difference between terrestrial time and UT1 in seconds.
+
+    Returns:
+    - tuple: (azimuth, elevation) arrays of shape (number of sites, len(times)) in degrees.
+    """
+    latitudes, longitudes, elevations = _sites(latitudes, longitudes, elevation)
+    terms = spa_time_terms_batch(get_julian_days(times), delta_t)
+
+    azimuth = np.empty((len(latitudes), len(terms)))
+    apparent_elevation = np.empty((len(latitudes), len(terms)))
+    status = spa_az_el_grid(
+        terms,
+        latitudes,
+        longitudes,
+        elevations,
+        pressure,
+        temperature,
+        1,
+        azimuth.reshape(-1),
+        apparent_elevation.reshape(-1),
+    )
+    if status != 0:
+        raise ValueError("spa_az_el_grid: the outputs must hold one value per timestamp and site")
+    return azimuth, apparent_elevation
+
+
+def site_summary(
+    latitudes,
+    longitudes,
+    start,
+    end,
+    freq="10min",
+    elevation=0,
+    pressure=1013.25,
+    temperature=12,
+    delta_t=67.0,
+    chunk_size=4096,
+):
+    """
+    Summarise the sun at many sites over a UTC period without storing the positions.
+
+    The period is split into intervals of `freq`, each represented by the sun
+    position at its midpoint. The time terms are computed once per interval and
+    the statistics of all sites are accumulated natively, `chunk_size` intervals
+    at a time, so memory use does not grow with the number of sites times the
+    number of intervals.
+
+    Parameters:
+    - latitudes (np.array): Latitudes of the sites in decimal degrees.
+    - longitudes (np.array): Longitudes of the sites in decimal degrees.
+    - start (str or pd.Timestamp): Start of the period. Naive times are taken as UTC,
+                                   aware times are converted to UTC.
+    - end (str or pd.Timestamp): End of the period, exclusive, after the start.
+    - freq (str): Length of the intervals, e.g. "10min".
+    - elevation (float or np.array): Elevations of the sites in meters.
+    - pressure (float): Annual average local pressure in millibars.
+    - temperature (float): Annual average local temperature in degrees Celsius.
+    - delta_t (float): Difference between terrestrial time and UT1 in seconds.
+    - chunk_size (int): Number of intervals whose time terms are held at once.
+
+    Returns:
+    - pd.DataFrame: One row per site with the latitude, longitude, elevation and
+                    - daylight_hours: hours with the centre of the sun above the horizon,
+                    - cosine_hours: insolation on a horizontal surface in kWh/m^2 per
+                      kW/m^2 of direct normal irradiance,
+                    - max_elevation: the highest sun elevation in degrees.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    start = start.tz_convert("UTC").tz_localize(None) if start.tzinfo is not None else start
+    end = end.tz_convert("UTC").tz_localize(None) if end.tzinfo is not None else end
+    if end <= start:
+        raise ValueError(f"The period from {start} to {end} is empty")
+    latitudes, longitudes, elevations = _sites(latitudes, longitudes, elevation)
+    step = pd.Timedelta(freq)
+    times = pd.date_range(start, end, freq=step, inclusive="left") + step / 2
+    interval_hours = step / pd.Timedelta(hours=1)
+
+    daylight_hours = np.zeros(len(latitudes))
+    cosine_hours = np.zeros(len(latitudes))
+    max_elevation = np.full(len(latitudes), -90.0)
+
+    julian_days = get_julian_days(times)
+    for chunk in range(0, len(julian_days), chunk_size):
+        terms = spa_time_terms_batch(julian_days[chunk : chunk + chunk_size], delta_t)
+        spa_accumulate_sites(
+            terms,
+            latitudes,
+            longitudes,
+            elevations,
+            daylight_hours,
+            cosine_hours,
+            max_elevation,
+            pressure,
+            temperature,
+            interval_hours,
+        )
+
+    return pd.DataFrame(
+        {
+            "latitude": latitudes,
+            "longitude": longitudes,
+            "elevation": elevations,
+            "daylight_hours": daylight_hours,
+            "cosine_hours": cosine_hours,
+            "max_elevation": max_elevation,
+        }
+    )
+
+
+def annual_summary(latitudes, longitudes, year=2023, freq="10min", **kwargs):
+    """Summarises the sun at many sites over a calendar year in UTC, see `site_summary`."""
+    return site_summary(
+        latitudes, longitudes, f"{year}-01-01", f"{year + 1}-01-01", freq=freq, **kwargs
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    latitudes, longitudes = grid_sites(np.arange(-40, -19, 1.0), np.arange(14, 34, 1.0))
+
+    start = time.perf_counter()
+    summary = annual_summary(latitudes, longitudes, year=2023, freq="10min")
+    print(f"{len(summary)} sites in {time.perf_counter() - start:.2f} s")
+    print(summary.sort_values("cosine_hours", ascending=False).head(10).to_string(index=False))
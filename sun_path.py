@@ -0,0 +1,172 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pvlib
+
+import helioc  # noqa
+from helioc.solar_position import solar_az_el
+
+
+_cache = {}
+
+
+def _cache_key(latitude, longitude, year, freq, tz, backend):
+    return (round(float(latitude), 6), round(float(longitude), 6), int(year), freq, tz, backend)
+
+
+def _cache_file(cache_dir, key):
+    latitude, longitude, year, freq, tz, backend = key
+    tz = (tz or "UTC").replace("/", "-")
+    return Path(cache_dir) / f"sun_path_{latitude}_{longitude}_{year}_{freq}_{tz}_{backend}.npz"
+
+
+def _helioc_solar_position(times, latitude, longitude):
+    positions = np.array(
+        [
+            solar_az_el(
+                time.year, time.month, time.day, time.hour, time.minute, time.second,
+                latitude, longitude, 0,
+            )
+            for time in times
+        ]
+    ).reshape(-1, 2)
+    return pd.DataFrame(
+        {"azimuth": positions[:, 0], "elevation": positions[:, 1]}, index=times
+    )
+
+
+def get_sun_path(
+    latitude, longitude, year=2023, freq="5min", tz=None, cache_dir=None, backend="pvlib"
+):
+    """
+    Calculate the daylight sun path of a site for a whole year.
+
+    With the "pvlib" backend the positions are computed in one vectorized pass;
+    the "helioc" backend calls the native `solar_az_el` once per sample.
+
+    Results are cached per site in memory and, if `cache_dir` is given, as an
+    .npz file so that repeated reports for the same site are free.
+
+    Parameters:
+    - latitude (float): Latitude of the location in decimal degrees.
+    - longitude (float): Longitude of the location in decimal degrees.
+    - year (int): Year to calculate.
+    - freq (str): Sampling frequency, e.g. "5min".
+    - tz (str): Timezone used for the hour column. Defaults to UTC.
+    - cache_dir (str or Path): Optional directory for the on-disk cache.
+    - backend (str): "pvlib" or "helioc", the solar position implementation to use.
+
+    Returns:
+    - pd.DataFrame: DataFrame with azimuth, elevation and hour columns for every
+                    sample with the sun above the horizon.
+    """
+    if backend not in ("pvlib", "helioc"):
+        raise ValueError(f"Unknown solar position backend {backend!r}")
+
+    key = _cache_key(latitude, longitude, year, freq, tz, backend)
+    if key in _cache:
+        return _cache[key]
+
+    cache_file = _cache_file(cache_dir, key) if cache_dir is not None else None
+    if cache_file is not None and cache_file.exists():
+        with np.load(cache_file) as data:
+            sun_path = pd.DataFrame({name: data[name] for name in data.files})
+        _cache[key] = sun_path
+        return sun_path
+
+    times = pd.date_range(
+        f"{year}-01-01", f"{year + 1}-01-01", freq=freq, inclusive="left", tz="UTC"
+    )
+    if backend == "helioc":
+        solar_position = _helioc_solar_position(times, latitude, longitude)
+    else:
+        solar_position = pvlib.solarposition.get_solarposition(times, latitude, longitude)
+
+    daylight = solar_position["elevation"].to_numpy() >= 0
+    local_times = times.tz_convert(tz) if tz is not None else times
+    sun_path = pd.DataFrame(
+        {
+            "azimuth": solar_position["azimuth"].to_numpy()[daylight],
+            "elevation": solar_position["elevation"].to_numpy()[daylight],
+            "hour": local_times.hour.to_numpy()[daylight].astype(np.int8),
+        }
+    )
+
+    if cache_file is not None:
+        cache_file.parent.mkdir(exist_ok=True, parents=True)
+        np.savez(cache_file, **{name: sun_path[name].to_numpy() for name in sun_path})
+
+    _cache[key] = sun_path
+    return sun_path
+
+
+def bin_sun_path(
+    azimuth, elevation, values, azimuth_bins=360, elevation_bins=90, statistic="mean"
+):
+    """
+    Aggregate a dense sun path point cloud onto an (azimuth, elevation) grid.
+
+    Parameters:
+    - azimuth (np.array): Azimuth of every sample in degrees, in [-180, 180].
+    - elevation (np.array): Elevation of every sample in degrees, in [0, 90].
+    - values (np.array): Value of every sample to aggregate per bin, e.g. the hour.
+    - azimuth_bins (int): Number of azimuth bins over [-180, 180].
+    - elevation_bins (int): Number of elevation bins over [0, 90].
+    - statistic (str): "mean" averages the samples of a bin, "nearest" takes the
+                       value of the sample closest to the bin centre. Use "nearest"
+                       for values that must not be mixed, such as the hour of day.
+
+    Returns:
+    - tuple: (azimuth, elevation, value) of the bin centres of all occupied bins.
+    """
+    if statistic not in ("mean", "nearest"):
+        raise ValueError(f"Unknown statistic {statistic!r}")
+
+    azimuth = np.asarray(azimuth, dtype=np.float64)
+    elevation = np.asarray(elevation, dtype=np.float64)
+    values = np.asarray(values)
+
+    azimuth_edges = np.linspace(-180, 180, azimuth_bins + 1)
+    elevation_edges = np.linspace(0, 90, elevation_bins + 1)
+    azimuth_centres = (azimuth_edges[:-1] + azimuth_edges[1:]) / 2
+    elevation_centres = (elevation_edges[:-1] + elevation_edges[1:]) / 2
+
+    if statistic == "mean":
+        counts, _, _ = np.histogram2d(
+            azimuth, elevation, bins=[azimuth_edges, elevation_edges]
+        )
+        sums, _, _ = np.histogram2d(
+            azimuth, elevation, bins=[azimuth_edges, elevation_edges], weights=values
+        )
+
+        azimuth_index, elevation_index = np.nonzero(counts)
+        return (
+            azimuth_centres[azimuth_index],
+            elevation_centres[elevation_index],
+            sums[azimuth_index, elevation_index] / counts[azimuth_index, elevation_index],
+        )
+
+    # Same bin assignment as np.histogram2d: half open bins, the last one closed
+    azimuth_index = np.clip(np.searchsorted(azimuth_edges, azimuth, side="right") - 1, 0, azimuth_bins - 1)
+    elevation_index = np.clip(np.searchsorted(elevation_edges, elevation, side="right") - 1, 0, elevation_bins - 1)
+    inside = (
+        (azimuth >= azimuth_edges[0]) & (azimuth <= azimuth_edges[-1])
+        & (elevation >= elevation_edges[0]) & (elevation <= elevation_edges[-1])
+    )
+    azimuth_index, elevation_index = azimuth_index[inside], elevation_index[inside]
+    distances = np.hypot(
+        azimuth[inside] - azimuth_centres[azimuth_index],
+        elevation[inside] - elevation_centres[elevation_index],
+    )
+
+    bins = azimuth_index * elevation_bins + elevation_index
+    order = np.lexsort((distances, bins))
+    _, first = np.unique(bins[order], return_index=True)
+    nearest = order[first]
+
+    return (
+        azimuth_centres[azimuth_index[nearest]],
+        elevation_centres[elevation_index[nearest]],
+        values[inside][nearest],
+    )
@@ -1,8 +1,12 @@
+from types import SimpleNamespace
+
+import numpy as np
 import pandas as pd
 import pvlib
 from timezonefinder import TimezoneFinder
 import helioc # noqa
 from helioc.solar_position import solar_az_el
+from helioc.spa import spa_time_terms_batch, spa_az_el_grid
 
 
 def get_solar_position_pvlib(date, latitude, longitude):
@@ -78,4 +82,189 @@ def get_solar_position(date, latitude, longitude):
     solar_position = pd.DataFrame(positions, columns=["azimuth", "elevation", "time"])
     solar_position = solar_position[solar_position['elevation'] >= 0]
 
-    return solar_position[['azimuth', 'elevation', "time"]]
\ No newline at end of file
+    return solar_position[['azimuth', 'elevation', "time"]]
+
+def get_julian_days(times):
+    """
+    Calculate the Julian Days of timestamps as used by the NREL SPA.
+
+    Parameters:
+    - times (pd.DatetimeIndex): Timestamps. Naive times are taken as UTC.
+
+    Returns:
+    - np.array: The Julian Days in UTC.
+    """
+    times = pd.DatetimeIndex(times)
+    if times.tz is not None:
+        times = times.tz_convert("UTC").tz_localize(None)
+    julian_days = (times - pd.Timestamp("1970-01-01")) / pd.Timedelta(days=1) + 2440587.5
+    return np.asarray(julian_days, dtype=np.float64)
+
+
+def get_solar_position_spa(times, latitudes, longitudes, elevation=0, pressure=1013.25, temperature=12, delta_t=67.0):
+    """
+    Calculate solar positions with the native NREL SPA for many timestamps and sites.
+
+    The site independent part of the SPA is computed once per timestamp with
+    `spa_time_terms_batch` and reused for every site by `spa_az_el_grid`.
+
+    Parameters:
+    - times (pd.DatetimeIndex): Timestamps. Naive times are taken as UTC.
+    - latitudes (float or np.array): Latitudes of the sites in decimal degrees.
+    - longitudes (float or np.array): Longitudes of the sites in decimal degrees.
+    - elevation (float or np.array): Elevations of the sites in meters.
+    - pressure (float): Annual average local pressure in millibars.
+    - temperature (float): Annual average local temperature in degrees Celsius.
+    - delta_t (float): Difference between terrestrial time and UT1 in seconds.
+
+    Returns:
+    - tuple: (azimuth, elevation) arrays of shape (len(times), number of sites) in degrees.
+    """
+    julian_days = get_julian_days(times)
+
+    latitudes, longitudes, elevations = np.broadcast_arrays(
+        np.atleast_1d(latitudes), np.atleast_1d(longitudes), np.atleast_1d(elevation)
+    )
+    azimuth = np.empty((len(times), len(latitudes)))
+    apparent_elevation = np.empty((len(times), len(latitudes)))
+
+    terms = spa_time_terms_batch(julian_days, delta_t)
+    status = spa_az_el_grid(
+        terms,
+        latitudes,
+        longitudes,
+        elevations,
+        pressure,
+        temperature,
+        0,
+        azimuth.reshape(-1),
+        apparent_elevation.reshape(-1),
+    )
+    if status != 0:
+        raise ValueError("spa_az_el_grid: the outputs must hold one value per timestamp and site")
+
+    return azimuth, apparent_elevation
+
+
+def iter_solar_positions(
+    start,
+    end,
+    freq,
+    latitude,
+    longitude,
+    chunk_size=4096,
+    buffers=2,
+    elevation=0,
+    pressure=1013.25,
+    temperature=12,
+    delta_t=67.0,
+):
+    """
+    Iterate over the solar positions of a site from start to end in chunks of fixed size.
+
+    Every chunk is computed with the native SPA, see `get_solar_position_spa`, into one of
+    a ring of `buffers` preallocated buffers, so memory use is bounded by the chunk size
+    whatever the length of the period. The arrays of a chunk are views of its buffer:
+    they stay valid until `buffers - 1` further chunks have been drawn, which lets a
+    consumer hand a chunk to another thread, e.g. for writing, while the next one is computed.
+    Copy the arrays to keep them longer.
+
+    Parameters:
+    - start (str or pd.Timestamp): The first timestamp. Naive times are taken as UTC.
+    - end (str or pd.Timestamp): The end of the period, exclusive.
+    - freq (str or pd.Timedelta): The positive step between timestamps, e.g. "1min".
+    - latitude (float): Latitude of the site in decimal degrees.
+    - longitude (float): Longitude of the site in decimal degrees.
+    - chunk_size (int): Number of timestamps per chunk, at least 1. The last chunk may be shorter.
+    - buffers (int): Number of chunk buffers reused in turn, at least 1.
+    - elevation (float): Elevation of the site in meters.
+    - pressure (float): Annual average local pressure in millibars.
+    - temperature (float): Annual average local temperature in degrees Celsius.
+    - delta_t (float): Difference between terrestrial time and UT1 in seconds.
+
+    Yields:
+    - SimpleNamespace: time (datetime64[ns] in UTC), azimuth and elevation in degrees, and
+                       the (n, 3) sun_vector, the same as `get_normal_vector_batch` of the angles.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    if buffers < 1:
+        raise ValueError(f"buffers must be at least 1, got {buffers}")
+    if pd.Timedelta(freq) <= pd.Timedelta(0):
+        raise ValueError(f"freq must be a positive step, got {freq}")
+
+    # Validated here rather than in the generator, so bad arguments fail at the call
+    return _iter_solar_positions(
+        start, end, freq, latitude, longitude, chunk_size, buffers, elevation, pressure, temperature, delta_t
+    )
+
+
+def _iter_solar_positions(
+    start, end, freq, latitude, longitude, chunk_size, buffers, elevation, pressure, temperature, delta_t
+):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    start = start.tz_convert("UTC").tz_localize(None) if start.tzinfo is not None else start
+    end = end.tz_convert("UTC").tz_localize(None) if end.tzinfo is not None else end
+    nanosecond = pd.Timedelta(nanoseconds=1)
+    step = pd.Timedelta(freq) // nanosecond
+    first = (start - pd.Timestamp("1970-01-01")) // nanosecond
+    count = max(0, -(-((end - start) // nanosecond) // step))
+
+    latitudes, longitudes, elevations = (np.array([value], dtype=np.float64) for value in (latitude, longitude, elevation))
+    offsets = np.arange(chunk_size, dtype=np.int64) * step
+    ring = [
+        SimpleNamespace(
+            nanoseconds=np.empty(chunk_size, dtype=np.int64),
+            julian_days=np.empty(chunk_size),
+            azimuth=np.empty(chunk_size),
+            elevation=np.empty(chunk_size),
+            sun_vector=np.empty((chunk_size, 3)),
+            radians=np.empty(chunk_size),
+            cosine=np.empty(chunk_size),
+        )
+        for _ in range(min(buffers, -(-count // chunk_size)))
+    ]
+
+    for index, chunk_start in enumerate(range(0, count, chunk_size)):
+        n = min(chunk_size, count - chunk_start)
+        buffer = ring[index % len(ring)]
+        nanoseconds, julian_days = buffer.nanoseconds[:n], buffer.julian_days[:n]
+        azimuth, sun_elevation = buffer.azimuth[:n], buffer.elevation[:n]
+        sun_vector, radians, cosine = buffer.sun_vector[:n], buffer.radians[:n], buffer.cosine[:n]
+
+        np.add(offsets[:n], first + chunk_start * step, out=nanoseconds)
+        # The Julian Days of get_julian_days, without going through a DatetimeIndex
+        np.multiply(nanoseconds, 1 / pd.Timedelta(days=1).value, out=julian_days)
+        julian_days += 2440587.5
+        status = spa_az_el_grid(
+            spa_time_terms_batch(julian_days, delta_t),
+            latitudes,
+            longitudes,
+            elevations,
+            pressure,
+            temperature,
+            0,
+            azimuth,
+            sun_elevation,
+        )
+        if status != 0:
+            raise ValueError("spa_az_el_grid: the outputs must hold one value per timestamp and site")
+
+        # get_normal_vector rotates [0, -1, 0] by -elevation about x after -azimuth about z
+        np.radians(azimuth, out=radians)
+        np.cos(radians, out=cosine)
+        np.sin(radians, out=sun_vector[:, 0])
+        np.negative(sun_vector[:, 0], out=sun_vector[:, 0])
+        np.radians(sun_elevation, out=radians)
+        np.cos(radians, out=sun_vector[:, 1])
+        np.sin(radians, out=sun_vector[:, 2])
+        sun_vector[:, 1] *= cosine
+        np.negative(sun_vector[:, 1], out=sun_vector[:, 1])
+        sun_vector[:, 2] *= cosine
+
+        yield SimpleNamespace(
+            time=nanoseconds.view("datetime64[ns]"),
+            azimuth=azimuth,
+            elevation=sun_elevation,
+            sun_vector=sun_vector,
+        )
@@ -0,0 +1,140 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory log-linear (HDR-style) histogram of latencies in nanoseconds.
+
+    Values below 2**significant_bits are counted exactly, larger values in buckets
+    that keep the top `significant_bits` bits, i.e. with a relative error below
+    2**(1 - significant_bits). Values above `highest_ns` are counted in the last
+    bucket, while the exact maximum is kept separately.
+    """
+
+    def __init__(self, significant_bits=7, highest_ns=3600 * 10**9):
+        self.significant_bits = significant_bits
+        self.half = 1 << (significant_bits - 1)
+        self.counts = np.zeros(self._index(highest_ns) + 1, dtype=np.int64)
+        self.total = 0
+        self.max_ns = 0
+
+    def _index(self, value_ns):
+        shift = max(value_ns.bit_length() - self.significant_bits, 0)
+        return shift * self.half + (value_ns >> shift)
+
+    def _value(self, index):
+        shift = max(index // self.half - 1, 0)
+        low = (index - shift * self.half) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, value_ns):
+        value_ns = max(int(value_ns), 0)
+        self.counts[min(self._index(value_ns), len(self.counts) - 1)] += 1
+        self.total += 1
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, q):
+        """Returns the latency in nanoseconds below which `q` percent of the values fall."""
+        if self.total == 0:
+            return 0.0
+        rank = max(int(np.ceil(q / 100 * self.total)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self._value(index), self.max_ns)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.total += other.total
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def reset(self):
+        self.counts[:] = 0
+        self.total = 0
+        self.max_ns = 0
+
+    def summary(self):
+        """Returns the count and the p50, p99 and max latency in milliseconds."""
+        return {
+            "count": self.total,
+            "p50_ms": self.percentile(50) / 1e6,
+            "p99_ms": self.percentile(99) / 1e6,
+            "max_ms": self.max_ns / 1e6,
+        }
+
+
+class TrackingTelemetry:
+    """
+    Per-stage latency histograms and deadline tracking for the aiming loop.
+
+    Wrap every field-wide setpoint batch in `tick()` and every stage of it in
+    `stage(name)`. Ticks that take longer than `deadline_s` are counted as
+    deadline misses. If `snapshot_path` is given, a JSON snapshot of `summary()`
+    is written atomically at most every `snapshot_interval_s` seconds.
+    """
+
+    stages = ("sun_position", "normals", "angles", "output")
+
+    def __init__(self, deadline_s=1.0, snapshot_path=None, snapshot_interval_s=60.0):
+        self.deadline_ns = int(deadline_s * 1e9)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path is not None else None
+        self.snapshot_interval_s = snapshot_interval_s
+        self.histograms = {name: LatencyHistogram() for name in self.stages + ("tick",)}
+        self.deadline_misses = 0
+        self._last_snapshot = time.monotonic()
+
+    @contextmanager
+    def stage(self, name):
+        if name not in self.histograms:
+            self.histograms[name] = LatencyHistogram()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.histograms[name].record(time.perf_counter_ns() - start)
+
+    @contextmanager
+    def tick(self):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self.histograms["tick"].record(elapsed)
+            if elapsed > self.deadline_ns:
+                self.deadline_misses += 1
+            self._maybe_write_snapshot()
+
+    def summary(self):
+        """Returns the p50/p99/max of every stage and the deadline statistics."""
+        return {
+            "time": time.time(),
+            "deadline_ms": self.deadline_ns / 1e6,
+            "deadline_misses": self.deadline_misses,
+            "stages": {
+                name: histogram.summary() for name, histogram in self.histograms.items()
+            },
+        }
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.deadline_misses = 0
+
+    def write_snapshot(self, path=None):
+        path = Path(path) if path is not None else self.snapshot_path
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.summary(), indent=2))
+        os.replace(tmp_path, path)
+        self._last_snapshot = time.monotonic()
+
+    def _maybe_write_snapshot(self):
+        if self.snapshot_path is None:
+            return
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval_s:
+            self.write_snapshot()
@@ -0,0 +1,73 @@
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from helioc.solar_position import solar_az_el
+
+
+def _stage(telemetry, name):
+    return telemetry.stage(name) if telemetry is not None else nullcontext()
+
+
+def aim_field(state, time, latitude, longitude, target, telemetry=None, output=None):
+    """
+    Compute one field-wide batch of setpoints and store it in a `FieldState`.
+
+    Parameters:
+        state (FieldState): The field, its normal and degrees columns are updated in place.
+        time (pd.Timestamp): The time to aim for. Naive times are taken as UTC.
+        latitude (float): Latitude of the field in decimal degrees.
+        longitude (float): Longitude of the field in decimal degrees.
+        target (np.array): The position of the destination.
+        telemetry (TrackingTelemetry): Optional telemetry that records every stage.
+        output (callable): Optional callable that receives the state to send the setpoints.
+
+    Returns:
+        tuple: The solar azimuth and elevation in degrees.
+    """
+
+    with telemetry.tick() if telemetry is not None else nullcontext():
+        with _stage(telemetry, "sun_position"):
+            time = pd.Timestamp(time)
+            time = time.tz_localize("UTC") if time.tzinfo is None else time.tz_convert("UTC")
+            az, el = solar_az_el(
+                time.year,
+                time.month,
+                time.day,
+                time.hour,
+                time.minute,
+                time.second,
+                latitude,
+                longitude,
+                0,
+            )
+
+        with _stage(telemetry, "normals"):
+            surface_normals = state.surface_normals(az, el, target)
+
+        with _stage(telemetry, "angles"):
+            state.set_normals(surface_normals)
+
+        with _stage(telemetry, "output"):
+            if output is not None:
+                output(state)
+
+    return az, el
+
+
+if __name__ == "__main__":
+    from field_state import FieldState
+    from telemetry import TrackingTelemetry
+
+    rng = np.random.default_rng(0)
+    state = FieldState.from_positions(rng.uniform(-50, 50, (500, 3)) * [1, 1, 0])
+    telemetry = TrackingTelemetry(deadline_s=0.05)
+
+    for time in pd.date_range("2023-08-01 08:00", periods=50, freq="1min"):
+        aim_field(state, time, -33.8352, 18.6510, [0, -60, 30], telemetry)
+
+    for name, summary in telemetry.summary()["stages"].items():
+        print(f"{name:<14}{summary}")
+    print(f"deadline misses: {telemetry.deadline_misses}")
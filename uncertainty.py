@@ -0,0 +1,296 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from helioc.math_functions import closest_point_distance_batch
+from calibration import commanded_degrees, reflected_directions, sun_rays
+
+
+class ErrorModel:
+    """
+    Random errors of the actuator angles and the mount of a heliostat, in degrees.
+
+    Every realization draws, per axis, a uniform encoder quantization error of up to
+    half the resolution, since the drive stops once the encoder reads the commanded
+    step, and half the backlash with a random sign, since the side of the gear play
+    the drive rests on depends on the direction it last moved in. The mount errors
+    are normal and use the parameters of `calibration.parameters`: encoder offsets
+    that add to the mount offset, and the tilt and yaw of the pedestal.
+
+    Parameters:
+        encoder_resolution (float or tuple): Step of the encoders, for both axes or per
+            axis as (degrees_from_north, degrees_elevation).
+        backlash (float or tuple): Play of the drives, for both axes or per axis.
+        offset_std (float or tuple): Standard deviation of the encoder offsets.
+        tilt_std (float): Standard deviation of the tilt of the pedestal.
+        yaw_std (float): Standard deviation of the yaw of the pedestal.
+    """
+
+    def __init__(self, encoder_resolution=0.0, backlash=0.0, offset_std=0.0, tilt_std=0.0, yaw_std=0.0):
+        self.encoder_resolution = np.broadcast_to(np.asarray(encoder_resolution, dtype=np.float64), (2,))
+        self.backlash = np.broadcast_to(np.asarray(backlash, dtype=np.float64), (2,))
+        self.offset_std = np.broadcast_to(np.asarray(offset_std, dtype=np.float64), (2,))
+        self.tilt_std = float(tilt_std)
+        self.yaw_std = float(yaw_std)
+
+    def __repr__(self):
+        return (
+            f"ErrorModel(encoder_resolution={self.encoder_resolution.tolist()}, backlash={self.backlash.tolist()}, "
+            f"offset_std={self.offset_std.tolist()}, tilt_std={self.tilt_std}, yaw_std={self.yaw_std})"
+        )
+
+    def max_deviation(self, sigmas=4.0):
+        """
+        Returns a bound in degrees of the deviation of the mirror normal, with the normal
+        errors taken at `sigmas` standard deviations and all errors adding up.
+        """
+        bounded = np.sum(self.encoder_resolution / 2 + self.backlash / 2)
+        return float(bounded + sigmas * (np.sum(self.offset_std) + self.tilt_std + self.yaw_std))
+
+    def sample(self, rng, shape):
+        """
+        Draws error realizations.
+
+        Parameters:
+            rng (np.random.Generator): The random number generator.
+            shape (tuple): Shape of the realizations, e.g. (heliostats, samples).
+
+        Returns:
+            tuple: shape + (2,) errors of the actuator angles and shape + (4,) errors of
+                the parameters, see `calibration.parameters`.
+        """
+        shape = tuple(shape)
+        angles = rng.uniform(-0.5, 0.5, shape + (2,)) * self.encoder_resolution
+        angles += (rng.integers(0, 2, shape + (2,)) - 0.5) * self.backlash
+
+        params = np.empty(shape + (4,))
+        params[..., :2] = rng.standard_normal(shape + (2,)) * self.offset_std
+        params[..., 2] = rng.standard_normal(shape) * self.tilt_std
+        params[..., 3] = rng.standard_normal(shape) * self.yaw_std
+        return angles, params
+
+
+class MissStatistics:
+    """
+    Streaming statistics of the miss distances of every heliostat, in fixed memory.
+
+    The mean and variance are combined batch by batch with the update of Chan et al.,
+    so they do not lose precision over millions of samples, and the percentiles come
+    from a histogram per heliostat with bins of `bin_width` meters. Distances beyond
+    the last bin are counted in an overflow bin while the exact maximum is kept.
+
+    Parameters:
+        n (int): Number of heliostats.
+        bin_width (float): Width of the histogram bins in meters.
+        bins (int): Number of histogram bins, memory grows with n times bins.
+    """
+
+    def __init__(self, n, bin_width=0.01, bins=200):
+        self.bin_width = bin_width
+        self.counts = np.zeros((n, bins + 1), dtype=np.int64)
+        self.total = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.max = np.zeros(n)
+
+    def __len__(self):
+        return len(self.total)
+
+    def add(self, heliostats, distances):
+        """
+        Adds a batch of miss distances.
+
+        Parameters:
+            heliostats (np.array): (m,) distinct indices of the heliostats.
+            distances (np.array): (m, s) miss distances in meters, s samples per heliostat.
+        """
+        heliostats = np.asarray(heliostats, dtype=np.intp)
+        m, s = distances.shape
+        bins = self.counts.shape[1]
+
+        mean = distances.mean(axis=1)
+        m2 = np.sum((distances - mean[:, None]) ** 2, axis=1)
+        total = self.total[heliostats]
+        combined = total + s
+        delta = mean - self.mean[heliostats]
+        self.mean[heliostats] += delta * s / combined
+        self.m2[heliostats] += m2 + delta**2 * total * s / combined
+        self.total[heliostats] = combined
+        self.max[heliostats] = np.maximum(self.max[heliostats], distances.max(axis=1))
+
+        # One bincount for the whole batch, every heliostat its own range of bins
+        indices = np.minimum((distances / self.bin_width).astype(np.intp), bins - 1)
+        indices += np.arange(m)[:, None] * bins
+        self.counts[heliostats] += np.bincount(indices.ravel(), minlength=m * bins).reshape(m, bins)
+
+    def merge(self, other):
+        """Adds the statistics of another instance over the same heliostats, e.g. of another worker."""
+        if other.bin_width != self.bin_width or other.counts.shape != self.counts.shape:
+            raise ValueError(
+                f"Cannot merge statistics with {other.counts.shape} bins of {other.bin_width} m "
+                f"into {self.counts.shape} bins of {self.bin_width} m"
+            )
+        total = self.total + other.total
+        delta = other.mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(total > 0, other.total / total, 0.0)
+        self.mean += delta * share
+        self.m2 += other.m2 + delta**2 * self.total * share
+        self.total = total
+        self.counts += other.counts
+        self.max = np.maximum(self.max, other.max)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / np.maximum(self.total - 1, 1))
+
+    @property
+    def rms(self):
+        return np.sqrt(self.mean**2 + self.m2 / np.maximum(self.total, 1))
+
+    def percentile(self, q):
+        """
+        Returns the (n,) miss distances in meters below which `q` percent of the samples
+        fall. Where the percentile lies beyond the histogram, the maximum is returned
+        and a warning is issued.
+        """
+        ranks = np.maximum(np.ceil(q / 100 * self.total), 1)
+        bins = np.argmax(np.cumsum(self.counts, axis=1) >= ranks[:, None], axis=1)
+        overflow = (bins == self.counts.shape[1] - 1) & (self.total > 0)
+        if overflow.any():
+            warnings.warn(
+                f"The {q}th percentile of {overflow.sum()} heliostats lies beyond the histogram range of "
+                f"{(self.counts.shape[1] - 1) * self.bin_width:g} m, their maximum is returned instead"
+            )
+        # The upper edge of the bin, the maximum for the overflow bin
+        return np.minimum((bins + 1) * self.bin_width, self.max)
+
+    def within(self, radius):
+        """Returns the (n,) fraction of the samples that miss by less than `radius` meters, rounded down to whole bins."""
+        edge = min(int(radius / self.bin_width), self.counts.shape[1] - 1)
+        return self.counts[:, :edge].sum(axis=1) / np.maximum(self.total, 1)
+
+    def summary(self, percentiles=(50, 95)):
+        """Returns a DataFrame with the samples, mean, std, rms, percentiles and max of every heliostat in meters."""
+        summary = pd.DataFrame({"samples": self.total, "mean": self.mean, "std": self.std, "rms": self.rms})
+        for q in percentiles:
+            summary[f"p{q:g}"] = self.percentile(q)
+        summary["max"] = self.max
+        return summary.rename_axis("heliostat")
+
+
+def simulate_misses(
+    state,
+    sun_degrees_azimuth,
+    sun_degrees_elevation,
+    target,
+    errors,
+    samples=1000,
+    indices=None,
+    statistics=None,
+    batch_size=1_000_000,
+    seed=None,
+):
+    """
+    Propagate random tracking errors to the miss distance of the reflected beams at the target.
+
+    The heliostats are commanded to the actuator angles of `get_degrees` that reflect
+    the sun onto the target, like `FieldState.track`. Every sample perturbs these angles
+    and the mount with a realization of `errors`, recomputes the mirror normal with
+    `get_normal_vector` and the pedestal rotation, reflects the sun ray and measures
+    how far the beam passes from the target with `closest_point_distance`, all in
+    batches of at most `batch_size` rays. Only the statistics are kept, so the memory
+    does not grow with the number of samples.
+
+    Parameters:
+        state (FieldState): The field, its mount_offset column is the nominal encoder offset.
+        sun_degrees_azimuth (float): The azimuth angle of the sun in degrees.
+        sun_degrees_elevation (float): The elevation angle of the sun in degrees.
+        target (np.array): The position of the destination.
+        errors (ErrorModel): The error model.
+        samples (int): Number of error realizations per heliostat.
+        indices (np.array): Heliostats to simulate, defaults to all.
+        statistics (MissStatistics): Add to these statistics, e.g. to continue a run,
+            defaults to new ones over the heliostats of the field, whose histogram
+            covers the misses of `errors.max_deviation` at the largest slant range.
+        batch_size (int): Largest number of rays computed at once.
+        seed (int or np.random.Generator): Seed of the random numbers.
+
+    Returns:
+        MissStatistics: The statistics, indexed like the heliostats of the field.
+    """
+    rng = np.random.default_rng(seed)
+    indices = np.arange(len(state)) if indices is None else np.asarray(indices, dtype=np.intp)
+    target = np.asarray(target, dtype=np.float64)
+    positions = np.asarray(state.position[indices], dtype=np.float64)
+
+    if statistics is None:
+        # A beam turns by twice the angle of the normal
+        slant_range = np.linalg.norm(target - positions, axis=1).max(initial=0.0)
+        extent = 2 * np.radians(errors.max_deviation()) * slant_range
+        bins = 200
+        statistics = MissStatistics(len(state), bin_width=extent / bins if extent > 0 else 0.01, bins=bins)
+
+    nominal = np.zeros((len(indices), 4))
+    nominal[:, :2] = state.mount_offset[indices]
+    surface_normals = state.surface_normals(sun_degrees_azimuth, sun_degrees_elevation, target, indices)
+    degrees = commanded_degrees(surface_normals, nominal)
+    ray = sun_rays(sun_degrees_azimuth, sun_degrees_elevation)
+
+    sample_block = min(samples, batch_size)
+    heliostat_block = max(1, batch_size // sample_block)
+    for first in range(0, len(indices), heliostat_block):
+        block = slice(first, first + heliostat_block)
+        m = len(indices[block])
+        for done in range(0, samples, sample_block):
+            s = min(sample_block, samples - done)
+            angle_errors, param_errors = errors.sample(rng, (m, s))
+            directions = reflected_directions(
+                np.broadcast_to(ray, (m * s, 3)),
+                (degrees[block, None, :] + angle_errors).reshape(-1, 2),
+                (nominal[block, None, :] + param_errors).reshape(-1, 4),
+            )
+            misses = closest_point_distance_batch(
+                np.broadcast_to(target, (m * s, 3)),
+                np.repeat(positions[block], s, axis=0),
+                directions,
+            )
+            statistics.add(indices[block], misses.reshape(m, s))
+
+    return statistics
+
+
+if __name__ == "__main__":
+    import time
+
+    from field_state import FieldState
+
+    rng = np.random.default_rng(0)
+    n, target = 2000, np.array([0.0, 0.0, 150.0])
+    radius, angle = np.sqrt(rng.uniform(100**2, 800**2, n)), rng.uniform(-np.pi / 3, np.pi / 3, n)
+    state = FieldState.from_positions(np.column_stack([radius * np.sin(angle), radius * np.cos(angle), np.zeros(n)]))
+    state.mount_offset[:] = rng.normal(0, 0.5, (n, 2))
+
+    # Without errors every beam passes through the target
+    exact = simulate_misses(state, 150.0, 40.0, target, ErrorModel(), samples=10)
+    print(f"max miss without errors {exact.max.max():.2e} m")
+
+    # The contribution of every error source alone, then all together
+    sources = {
+        "encoder 0.01 deg": ErrorModel(encoder_resolution=0.01),
+        "backlash 0.02 deg": ErrorModel(backlash=0.02),
+        "offsets 0.01 deg": ErrorModel(offset_std=0.01),
+        "tilt and yaw 0.02 deg": ErrorModel(tilt_std=0.02, yaw_std=0.02),
+    }
+    sources["all"] = ErrorModel(encoder_resolution=0.01, backlash=0.02, offset_std=0.01, tilt_std=0.02, yaw_std=0.02)
+    for name, errors in sources.items():
+        start = time.perf_counter()
+        statistics = simulate_misses(state, 150.0, 40.0, target, errors, samples=1000, seed=1)
+        elapsed = time.perf_counter() - start
+        summary = statistics.summary()
+        print(
+            f"{name:>22}: median p95 {summary['p95'].median():.3f} m, worst p95 {summary['p95'].max():.3f} m, "
+            f"within 0.5 m {statistics.within(0.5).mean():.3f}, {statistics.total.sum() / elapsed / 1e6:.1f} M samples/s"
+        )
@@ -0,0 +1,389 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import helioc  # noqa
+from helioc.math_functions import get_normal_vector_batch
+from schedule_export import NpyWriter, read_schedule
+from site_assessment import solar_position_block
+
+
+# How to read the weather files of common sources. time lists the columns of the
+# timestamp, either one column parsed by pandas or year, month, day, hour and
+# optionally minute, and columns maps the cached names to the columns of the file.
+formats = {
+    "csv": {"skiprows": 0, "header": 0, "time": ["time"], "columns": {"dni": "dni"}},
+    # NSRDB PSM downloads have two lines of site metadata before the header
+    "nsrdb": {
+        "skiprows": 2,
+        "header": 0,
+        "time": ["Year", "Month", "Day", "Hour", "Minute"],
+        "columns": {"dni": "DNI", "ghi": "GHI", "dhi": "DHI", "temperature": "Temperature"},
+    },
+    # EnergyPlus weather files have eight header lines and hours from 1 to 24 that
+    # label the end of the hour
+    "epw": {
+        "skiprows": 8,
+        "header": None,
+        "time": [0, 1, 2, 3],
+        "columns": {"dni": 14, "ghi": 13, "dhi": 15, "temperature": 6},
+        "label": "end",
+    },
+}
+
+_NANOSECONDS = {"hour": 3_600_000_000_000, "day": 86_400_000_000_000}
+_EPOCH = pd.Timestamp("1970-01-01")
+
+
+def _chunk_times(chunk, time):
+    """Parses the timestamps of one chunk of a weather file to naive datetimes, vectorized."""
+    if len(time) == 1:
+        return pd.DatetimeIndex(pd.to_datetime(chunk[time[0]]))
+    parts = [chunk[column].to_numpy() for column in time]
+    dates = pd.to_datetime({"year": parts[0], "month": parts[1], "day": parts[2]})
+    # Hours and minutes are added as offsets, so that 24:00 rolls over to the next day
+    offsets = pd.to_timedelta(parts[3], unit="h")
+    if len(parts) > 4:
+        offsets += pd.to_timedelta(parts[4], unit="min")
+    return pd.DatetimeIndex(dates + offsets)
+
+
+def _year_offsets(nanoseconds):
+    """
+    Returns the nanoseconds since the start of the year of int64 UTC timestamps,
+    counted in a year of 365 days: February 29 repeats February 28.
+    """
+    times = np.asarray(nanoseconds, dtype=np.int64).view("datetime64[ns]")
+    years = times.astype("datetime64[Y]")
+    offsets = (times - years.astype("datetime64[ns]")).astype(np.int64)
+    year_numbers = years.astype(np.int64) + 1970
+    leap = (year_numbers % 4 == 0) & ((year_numbers % 100 != 0) | (year_numbers % 400 == 0))
+    after_february_28 = offsets >= 59 * _NANOSECONDS["day"]
+    return offsets - np.where(leap & after_february_28, _NANOSECONDS["day"], 0)
+
+
+class WeatherCache:
+    """
+    Weather time series parsed once into a memory-mapped columnar cache.
+
+    The cache is a directory with one .npy file per column, written by `ingest_weather`,
+    and a metadata.json. The time column holds the start of every interval as int64
+    nanoseconds since the Unix epoch in UTC, sorted. Opening a cache maps the files
+    without reading them, so only the pages of the timestamps that are sampled are read.
+    """
+
+    def __init__(self, columns, metadata):
+        self.columns = columns
+        self.metadata = metadata
+        self.time = columns["time"]
+        self.interval = int(metadata["interval_ns"])
+        self.typical_year = bool(metadata["typical_year"])
+        if self.typical_year:
+            # A typical year mixes months of different years, so it is matched by the time of the year
+            self._year_offsets = _year_offsets(self.time)
+            self._order = np.argsort(self._year_offsets, kind="stable")
+            self._year_offsets = self._year_offsets[self._order]
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @classmethod
+    def load(cls, path):
+        """Opens a cache written by `ingest_weather` memory-mapped."""
+        path = Path(path)
+        metadata = json.loads((path / "metadata.json").read_text())
+        return cls(read_schedule(path), metadata)
+
+    def align(self, times):
+        """
+        Finds the interval of the weather data that contains every timestamp.
+
+        Parameters:
+            times (np.array or pd.DatetimeIndex): Timestamps, as int64 nanoseconds in
+                UTC or datetimes. Naive datetimes are taken as UTC.
+
+        Returns:
+            np.array: Index of the interval of every timestamp, -1 where none contains it.
+        """
+        nanoseconds = _nanoseconds(times)
+        if self.typical_year:
+            starts = self._year_offsets
+            nanoseconds = _year_offsets(nanoseconds)
+        else:
+            starts = self.time
+
+        indices = np.searchsorted(starts, nanoseconds, side="right") - 1
+        found = (indices >= 0) & (nanoseconds < starts[np.maximum(indices, 0)] + self.interval)
+        if self.typical_year:
+            indices = self._order[np.maximum(indices, 0)]
+        return np.where(found, indices, -1)
+
+    def sample(self, name, times, fill=np.nan):
+        """Returns the value of a column in the interval containing every timestamp, `fill` where there is none."""
+        indices = self.align(times)
+        values = np.asarray(self.columns[name][np.maximum(indices, 0)], dtype=np.float64)
+        return np.where(indices >= 0, values, fill)
+
+
+def _nanoseconds(times):
+    if isinstance(times, np.ndarray) and times.dtype == np.int64:
+        return times
+    times = pd.DatetimeIndex(times)
+    if times.tz is not None:
+        times = times.tz_convert("UTC").tz_localize(None)
+    return np.asarray((times - _EPOCH) // pd.Timedelta(nanoseconds=1), dtype=np.int64)
+
+
+def ingest_weather(
+    path,
+    cache,
+    format="csv",
+    utc_offset=0.0,
+    label=None,
+    typical_year=False,
+    metadata=None,
+    chunk_size=100_000,
+    **options,
+):
+    """
+    Parse a weather CSV once into a memory-mapped columnar cache.
+
+    The file is read `chunk_size` rows at a time and every chunk is converted with
+    vectorized pandas operations and appended to the cache, so files of any length
+    are ingested in constant memory.
+
+    Parameters:
+        path (str or Path): The weather file.
+        cache (str or Path): Directory of the cache, created if needed.
+        format (str): One of `formats`.
+        utc_offset (float): Hours the timestamps of the file are ahead of UTC, e.g. 2 for
+            local standard time in South Africa.
+        label (str): Whether the timestamps label the "start", "center" or "end" of
+            the intervals, defaults to the format's, or "start".
+        typical_year (bool): Whether the file is a typical meteorological year, which is
+            then matched to any year by the time of the year, see `WeatherCache.align`.
+        metadata (dict): Extra metadata to store, e.g. the latitude and longitude of the site.
+        chunk_size (int): Number of rows parsed at a time.
+        **options: Overrides of the entries of the format, e.g. columns={"dni": "DNI (W/m2)"}.
+
+    Returns:
+        WeatherCache: The cache, opened memory-mapped.
+    """
+    if format not in formats:
+        raise ValueError(f"Unknown format {format!r}, expected one of {list(formats)}")
+    settings = {**formats[format], **options}
+    label = settings.get("label", "start") if label is None else label
+    if label not in ("start", "center", "end"):
+        raise ValueError(f"Unknown label {label!r}, expected 'start', 'center' or 'end'")
+
+    columns = {"time": np.int64, **{name: np.float32 for name in settings["columns"]}}
+    reader = pd.read_csv(
+        path,
+        skiprows=settings["skiprows"],
+        header=settings["header"],
+        usecols=list(settings["time"]) + list(settings["columns"].values()),
+        chunksize=chunk_size,
+    )
+
+    interval = None
+    previous = None
+    with NpyWriter(cache, columns) as writer:
+        for chunk in reader:
+            nanoseconds = _nanoseconds(_chunk_times(chunk, settings["time"])) - int(
+                round(utc_offset * _NANOSECONDS["hour"])
+            )
+            if interval is None:
+                interval = int(np.median(np.diff(nanoseconds))) if len(nanoseconds) > 1 else _NANOSECONDS["hour"]
+            if label == "center":
+                nanoseconds -= interval // 2
+            elif label == "end":
+                nanoseconds -= interval
+
+            if not typical_year and (
+                np.any(np.diff(nanoseconds) <= 0) or (previous is not None and nanoseconds[0] <= previous)
+            ):
+                raise ValueError(f"The timestamps of {path} are not strictly increasing")
+            previous = nanoseconds[-1]
+
+            writer.write(
+                {
+                    "time": nanoseconds,
+                    **{name: chunk[column].to_numpy() for name, column in settings["columns"].items()},
+                }
+            )
+
+    (Path(cache) / "metadata.json").write_text(
+        json.dumps(
+            {
+                "source": str(path),
+                "format": format,
+                "interval_ns": interval,
+                "typical_year": typical_year,
+                **(metadata or {}),
+            },
+            indent=2,
+        )
+    )
+    return WeatherCache.load(cache)
+
+
+def _time_axis(start, end, freq):
+    """Returns the first midpoint, the step in nanoseconds and the number of intervals of a UTC period."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    start = start.tz_convert("UTC").tz_localize(None) if start.tzinfo is not None else start
+    end = end.tz_convert("UTC").tz_localize(None) if end.tzinfo is not None else end
+    step = pd.Timedelta(freq) // pd.Timedelta(nanoseconds=1)
+    count = -(-((end - start) // pd.Timedelta(nanoseconds=1)) // step)
+    return (start - _EPOCH) // pd.Timedelta(nanoseconds=1) + step // 2, step, count
+
+
+def field_output_chunks(
+    caches,
+    latitudes,
+    longitudes,
+    vector_dests,
+    start,
+    end,
+    freq="1h",
+    mirror_area=1.0,
+    reflectivity=1.0,
+    availability=1.0,
+    elevation=0,
+    chunk_size=1024,
+    **sun_kwargs,
+):
+    """
+    Compute the output of a field at several sites over a UTC period, in chunks.
+
+    The period is split into intervals of `freq`, each represented by its midpoint.
+    For every chunk of intervals the sun positions of all sites are computed in one
+    native pass, see `site_assessment.solar_position_block`, the weather is looked up
+    in the memory-mapped caches, and the output of every site is the DNI times the
+    cosine weighted mirror area times the availability. Only one chunk is held at a
+    time, so runs over decades use constant memory.
+
+    Parameters:
+        caches (list): One `WeatherCache` per site, with a dni column in W/m^2.
+        latitudes (np.array): Latitudes of the sites in decimal degrees.
+        longitudes (np.array): Longitudes of the sites in decimal degrees.
+        vector_dests (np.array): (n, 3) directions from every mirror to the receiver,
+            see `FieldState.vector_dests`, the same layout at every site.
+        start (str or pd.Timestamp): Start of the period. Naive times are taken as UTC.
+        end (str or pd.Timestamp): End of the period, exclusive.
+        freq (str): Length of the intervals, e.g. "1h".
+        mirror_area (float or np.array): Area of every mirror in square meters.
+        reflectivity (float): Reflectivity of the mirrors.
+        availability (float or str): Fraction of the field in operation, or the name of
+            a cache column that holds it per interval.
+        elevation (float or np.array): Elevations of the sites in meters.
+        chunk_size (int): Number of intervals per chunk, memory use grows with the chunk
+            size times the number of mirrors.
+        **sun_kwargs: pressure, temperature and delta_t, see `solar_position_block`.
+
+    Yields:
+        SimpleNamespace: times (int64 nanoseconds in UTC of the midpoints), and arrays of
+            shape (sites, times): dni, cosine (mean cosine of incidence of the mirrors,
+            zero with the sun below the horizon), availability and power in W.
+    """
+    latitudes, longitudes = np.atleast_1d(latitudes), np.atleast_1d(longitudes)
+    if len(caches) != len(latitudes):
+        raise ValueError(f"Got {len(caches)} weather caches for {len(latitudes)} sites")
+    vector_dests = np.atleast_2d(np.asarray(vector_dests, dtype=np.float64))
+    vector_dests = vector_dests / np.linalg.norm(vector_dests, axis=1, keepdims=True)
+    areas = np.broadcast_to(np.asarray(mirror_area, dtype=np.float64), (len(vector_dests),))
+
+    first, step, count = _time_axis(start, end, freq)
+    for chunk in range(0, count, chunk_size):
+        nanoseconds = first + step * np.arange(chunk, min(chunk + chunk_size, count), dtype=np.int64)
+        times = pd.DatetimeIndex(nanoseconds.astype("datetime64[ns]"))
+        azimuth, sun_elevation = solar_position_block(latitudes, longitudes, times, elevation, **sun_kwargs)
+
+        # The direction to the sun is get_normal_vector of its angles, and the cosine of
+        # incidence of a mirror is the cosine of half the angle between the sun and target
+        cosine = np.empty(azimuth.shape)
+        for site in range(len(latitudes)):
+            to_sun = get_normal_vector_batch(np.column_stack([azimuth[site], sun_elevation[site]]))
+            cosines = np.sqrt(np.clip((1 + to_sun @ vector_dests.T) / 2, 0, 1))
+            cosine[site] = (cosines @ areas) / areas.sum()
+        cosine[sun_elevation <= 0] = 0.0
+
+        dni = np.stack([cache.sample("dni", nanoseconds, fill=0.0) for cache in caches])
+        if isinstance(availability, str):
+            available = np.stack([cache.sample(availability, nanoseconds, fill=0.0) for cache in caches])
+        else:
+            available = np.full(dni.shape, float(availability))
+
+        yield SimpleNamespace(
+            times=nanoseconds,
+            dni=dni,
+            cosine=cosine,
+            availability=available,
+            power=dni * cosine * available * areas.sum() * reflectivity,
+        )
+
+
+def annual_yield(caches, latitudes, longitudes, vector_dests, start, end, freq="1h", **kwargs):
+    """
+    Sum the energy of a field at several sites per calendar year in UTC, see
+    `field_output_chunks` for the parameters.
+
+    Returns:
+        pd.DataFrame: Energy in MWh with one row per site and one column per year.
+    """
+    step_hours = pd.Timedelta(freq) / pd.Timedelta(hours=1)
+    totals = {}
+    for chunk in field_output_chunks(caches, latitudes, longitudes, vector_dests, start, end, freq, **kwargs):
+        years = chunk.times.astype("datetime64[ns]").astype("datetime64[Y]").astype(np.int64) + 1970
+        for year in np.unique(years):
+            energy = chunk.power[:, years == year].sum(axis=1) * step_hours / 1e6
+            totals[year] = totals.get(year, 0) + energy
+    return pd.DataFrame(totals).rename_axis(index="site", columns="year")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    # A synthetic typical year of hourly clear-sky DNI in local standard time, as EPW
+    rng = np.random.default_rng(0)
+    hours = pd.date_range("2005-01-01 01:00", periods=8760, freq="1h")
+    local_hour = (hours - pd.Timedelta(minutes=30)).hour + 0.5
+    dni = np.clip(900 * np.sin(np.pi * (local_hour - 6) / 12), 0, None) * rng.choice([1.0, 0.3], 8760, p=[0.8, 0.2])
+    epw = pd.DataFrame(
+        {
+            0: (hours - pd.Timedelta(hours=1)).year,
+            1: (hours - pd.Timedelta(hours=1)).month,
+            2: (hours - pd.Timedelta(hours=1)).day,
+            3: (hours - pd.Timedelta(hours=1)).hour + 1,
+            **{i: 0 for i in range(4, 13)},
+            13: 0,
+            14: dni.round(),
+            15: 0,
+        }
+    )
+    epw[6] = 20.0
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "site.epw"
+        path.write_text("HEADER\n" * 8 + epw.to_csv(header=False, index=False))
+
+        start = time.perf_counter()
+        cache = ingest_weather(path, Path(directory) / "cache", format="epw", utc_offset=2, typical_year=True)
+        print(f"ingested {len(cache)} rows in {time.perf_counter() - start:.2f} s")
+
+        positions = rng.uniform(-300, 300, (2000, 3)) * [1, 1, 0] + [0, 400, 0]
+        vector_dests = np.array([0, 0, 150.0]) - positions
+        sites = np.array([[-33.8352, 18.6510], [-28.5, 21.0], [-23.0, 17.5]])
+
+        start = time.perf_counter()
+        energy = annual_yield(
+            [cache] * len(sites), sites[:, 0], sites[:, 1], vector_dests, "2000-01-01", "2030-01-01", mirror_area=10.0
+        )
+        print(f"30 years at {len(sites)} sites in {time.perf_counter() - start:.2f} s")
+        print((energy.iloc[:, :5] / 1e3).round(1).to_string())